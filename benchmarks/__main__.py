@@ -0,0 +1,77 @@
+"""
+Run the benchmark suite and write the results as JSON.
+
+    python -m benchmarks --quick
+    python -m benchmarks --only actor routers.fan_out --output results.json
+    python -m benchmarks --compare baseline.json --threshold 0.2
+
+With --compare the exit code is 1 if any metric regressed by more
+than threshold compared to the baseline results.
+"""
+import argparse
+import json
+import sys
+
+from benchmarks import actor, lifecycle, logging_overhead, routers
+from benchmarks import durable, memory, supervisor
+from benchmarks.harness import run, compare
+
+
+BENCHMARKS = [
+    *actor.BENCHMARKS,
+    *routers.BENCHMARKS,
+    *lifecycle.BENCHMARKS,
+    *supervisor.BENCHMARKS,
+    *logging_overhead.BENCHMARKS,
+    *memory.BENCHMARKS,
+    *durable.BENCHMARKS,
+]
+
+
+def _print(result):
+    params = ", ".join(f"{k}={v}" for k, v in result["params"].items())
+    metrics = ", ".join(
+        f"{k}={v:,.2f}" for k, v in result["metrics"].items()
+    )
+    print(f"{result['benchmark']} [{params}]: {metrics}", file=sys.stderr)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks")
+    parser.add_argument(
+        "--quick", action="store_true",
+        help="smaller sizes, for smoke testing"
+    )
+    parser.add_argument(
+        "--only", nargs="*", default=None,
+        help="run benchmarks whose name starts with one of these"
+    )
+    parser.add_argument("--output", help="write JSON results to this file")
+    parser.add_argument("--compare", help="JSON results to compare with")
+    parser.add_argument("--threshold", type=float, default=0.2)
+    args = parser.parse_args(argv)
+
+    report = run(BENCHMARKS, quick=args.quick, select=args.only, progress=_print)
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(report, file, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+
+    if args.compare:
+        with open(args.compare) as file:
+            baseline = json.load(file)
+        regressions = compare(report, baseline, args.threshold)
+        for name, params, metric, old, new, change in regressions:
+            print(
+                f"REGRESSION {name} {params} {metric}: "\
+                f"{old:,.2f} -> {new:,.2f} ({change:+.0%})",
+                file=sys.stderr
+            )
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
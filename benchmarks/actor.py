@@ -0,0 +1,89 @@
+"""Throughput, latency and request-reply ping-pong of a single Actor"""
+import asyncio
+import time
+
+from minions.actors import Actor
+
+from benchmarks.harness import Benchmark, Stopwatch, latency_metrics
+
+
+class EchoActor(Actor):
+    async def handle_message(self, message, sender):
+        return message
+
+
+class PingActor(Actor):
+    async def handle_message(self, message, sender):
+        pong, rounds = message
+        for i in range(rounds):
+            await pong(i, self)
+        return rounds
+
+
+async def throughput(messages, tell, metrics=True):
+    actor = (
+        EchoActor() if metrics else EchoActor(metrics_registry=None)
+    )
+    with Stopwatch() as watch:
+        if tell:
+            for i in range(messages):
+                actor.tell(i, 'bench')
+            await actor.join()
+        else:
+            await asyncio.gather(*[actor(i, 'bench') for i in range(messages)])
+    await actor.stop()
+    return {"msgs_per_sec": messages / watch.elapsed}
+
+
+async def latency(messages):
+    actor = EchoActor()
+    latencies = []
+    for i in range(messages):
+        started = time.perf_counter()
+        await actor(i, 'bench')
+        latencies.append(time.perf_counter() - started)
+    await actor.stop()
+    return latency_metrics(latencies)
+
+
+async def ping_pong(rounds):
+    ping = PingActor()
+    pong = EchoActor()
+    with Stopwatch() as watch:
+        await ping((pong, rounds), 'bench')
+    await ping.stop()
+    await pong.stop()
+    return {
+        "round_trips_per_sec": rounds / watch.elapsed,
+        "round_trip_us": watch.elapsed / rounds * 1e6,
+    }
+
+
+BENCHMARKS = [
+    Benchmark(
+        "actor.throughput",
+        throughput,
+        [
+            dict(messages=200000, tell=tell, metrics=metrics)
+            for tell in (False, True)
+            for metrics in (True, False)
+        ],
+        [
+            dict(messages=20000, tell=tell, metrics=metrics)
+            for tell in (False, True)
+            for metrics in (True, False)
+        ],
+    ),
+    Benchmark(
+        "actor.latency",
+        latency,
+        [dict(messages=50000)],
+        [dict(messages=5000)],
+    ),
+    Benchmark(
+        "actor.ping_pong",
+        ping_pong,
+        [dict(rounds=100000)],
+        [dict(rounds=10000)],
+    ),
+]
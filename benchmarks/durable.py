@@ -0,0 +1,51 @@
+"""Throughput of a DurableActor, messages logged and acknowledged"""
+import asyncio
+import shutil
+import tempfile
+
+from minions.actors import DurableActor
+
+from benchmarks.harness import Benchmark, Stopwatch
+
+
+class EchoActor(DurableActor):
+    async def handle_message(self, message, sender):
+        return message
+
+
+async def throughput(messages, tell, fsync):
+    path = tempfile.mkdtemp(prefix="minions-durable-")
+    try:
+        actor = EchoActor(path=path, fsync=fsync, metrics_registry=None)
+        with Stopwatch() as watch:
+            if tell:
+                for i in range(messages):
+                    actor.tell(i, 'bench')
+                await actor.join()
+            else:
+                await asyncio.gather(
+                    *[actor(i, 'bench') for i in range(messages)]
+                )
+            await actor.commit()
+        await actor.stop()
+    finally:
+        shutil.rmtree(path)
+    return {"msgs_per_sec": messages / watch.elapsed}
+
+
+BENCHMARKS = [
+    Benchmark(
+        "durable.throughput",
+        throughput,
+        [
+            dict(messages=100000, tell=tell, fsync=fsync)
+            for tell in (False, True)
+            for fsync in (True, False)
+        ],
+        [
+            dict(messages=10000, tell=tell, fsync=fsync)
+            for tell in (False, True)
+            for fsync in (True, False)
+        ],
+    ),
+]
@@ -0,0 +1,125 @@
+import asyncio
+import gc
+import platform
+import subprocess
+import sys
+import time
+
+
+class Benchmark:
+    """
+    An async benchmark function run once per parameter set,
+    it returns a dict of metrics. Metrics ending with _per_sec are
+    better when higher, all others (latencies, durations, bytes)
+    are better when lower.
+    """
+    def __init__(self, name, func, params, quick_params=None):
+        self.name = name
+        self.func = func
+        self.params = params
+        self.quick_params = quick_params or params
+
+    def run(self, quick=False):
+        for params in (self.quick_params if quick else self.params):
+            gc.collect()
+            metrics = asyncio.run(self.func(**params))
+            yield {
+                "benchmark": self.name,
+                "params": params,
+                "metrics": metrics,
+            }
+
+
+def percentile(values, q):
+    """q-th percentile of values, values have to be sorted"""
+    if not values:
+        return None
+    index = min(len(values) - 1, int(round(q / 100 * (len(values) - 1))))
+    return values[index]
+
+
+def latency_metrics(latencies):
+    """p50/p99/max in microseconds of latencies given in seconds"""
+    latencies = sorted(latencies)
+    return {
+        "p50_us": percentile(latencies, 50) * 1e6,
+        "p99_us": percentile(latencies, 99) * 1e6,
+        "max_us": latencies[-1] * 1e6,
+    }
+
+
+class Stopwatch:
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.elapsed = time.perf_counter() - self.started
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except Exception:
+        return None
+
+
+def run(benchmarks, quick=False, select=None, progress=None):
+    """Run benchmarks whose name starts with one of select"""
+    results = []
+    for benchmark in benchmarks:
+        if select and not any(
+            benchmark.name.startswith(prefix) for prefix in select
+        ):
+            continue
+        for result in benchmark.run(quick=quick):
+            if progress:
+                progress(result)
+            results.append(result)
+    return {
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "commit": _git_commit(),
+        "created": time.time(),
+        "quick": quick,
+        "results": results,
+    }
+
+
+def _key(result):
+    return result["benchmark"], tuple(sorted(result["params"].items()))
+
+
+def compare(report, baseline, threshold=0.2):
+    """
+    Return (benchmark, params, metric, baseline, current, change)
+    for every metric that got worse by more than threshold
+    """
+    previous = {_key(result): result for result in baseline["results"]}
+    regressions = []
+    for result in report["results"]:
+        old = previous.get(_key(result))
+        if old is None:
+            continue
+        for metric, value in result["metrics"].items():
+            old_value = old["metrics"].get(metric)
+            if not old_value or value is None:
+                continue
+            change = (value - old_value) / old_value
+            if metric.endswith("_per_sec"):
+                change = -change
+            if change > threshold:
+                regressions.append((
+                    result["benchmark"],
+                    result["params"],
+                    metric,
+                    old_value,
+                    value,
+                    change,
+                ))
+    return regressions
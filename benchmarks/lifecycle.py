@@ -0,0 +1,34 @@
+"""Cost of spawning and tearing down actors"""
+from minions.actors import Actor, Supervisor
+
+from benchmarks.harness import Benchmark, Stopwatch
+
+
+class EchoActor(Actor):
+    async def handle_message(self, message, sender):
+        return message
+
+
+async def spawn_teardown(actors):
+    supervisor = Supervisor()
+    with Stopwatch() as spawn:
+        for _ in range(actors):
+            supervisor.spawn_child(EchoActor)
+    with Stopwatch() as teardown:
+        await supervisor.stop()
+    return {
+        "spawns_per_sec": actors / spawn.elapsed,
+        "teardowns_per_sec": actors / teardown.elapsed,
+        "spawn_us": spawn.elapsed / actors * 1e6,
+        "teardown_us": teardown.elapsed / actors * 1e6,
+    }
+
+
+BENCHMARKS = [
+    Benchmark(
+        "lifecycle.spawn_teardown",
+        spawn_teardown,
+        [dict(actors=actors) for actors in (1000, 10000)],
+        [dict(actors=1000)],
+    ),
+]
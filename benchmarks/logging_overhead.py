@@ -0,0 +1,82 @@
+"""
+Per-message overhead of hot-path logging.
+
+    python -m benchmarks.logging_overhead
+"""
+import asyncio
+import io
+import logging
+import time
+
+from minions.actors import Actor
+
+from benchmarks.harness import Benchmark, Stopwatch
+
+
+class EchoActor(Actor):
+    async def handle_message(self, message, sender):
+        return message
+
+
+async def overhead(logging_on, messages, payload_size):
+    payload = list(range(payload_size))
+    logger = logging.getLogger('top')
+    handler = logging.StreamHandler(io.StringIO())
+    if logging_on:
+        logger.setLevel(logging.DEBUG)
+        logger.addHandler(handler)
+    else:
+        logger.setLevel(logging.WARNING)
+    try:
+        actor = EchoActor(name="bench-echo")
+        with Stopwatch() as watch:
+            await asyncio.gather(
+                *[actor(payload, 'bench') for _ in range(messages)]
+            )
+        await actor.stop()
+    finally:
+        logger.removeHandler(handler)
+        logger.setLevel(logging.NOTSET)
+    return {"message_us": watch.elapsed / messages * 1e6}
+
+
+def _eager_formatting(messages, payload):
+    """What every message paid before: three f-strings with the payload"""
+    started = time.perf_counter()
+    for _ in range(messages):
+        f"actor received {payload}"
+        f"actor took {payload} from mailbox"
+        f"actor starts handling {payload}"
+    return (time.perf_counter() - started) / messages
+
+
+BENCHMARKS = [
+    Benchmark(
+        "logging.overhead",
+        overhead,
+        [
+            dict(logging_on=on, messages=20000, payload_size=1000)
+            for on in (False, True)
+        ],
+        [
+            dict(logging_on=on, messages=2000, payload_size=1000)
+            for on in (False, True)
+        ],
+    ),
+]
+
+
+def main():
+    for benchmark in BENCHMARKS:
+        for result in benchmark.run():
+            state = "on" if result["params"]["logging_on"] else "off"
+            print(
+                f"{'logging_' + state:>24}: "\
+                f"{result['metrics']['message_us']:8.2f} us/message"
+            )
+    per_message = _eager_formatting(20000, list(range(1000)))
+    print(f"{'eager_formatting_only':>24}: {per_message * 1e6:8.2f} us/message")
+
+
+if __name__ == '__main__':
+    main()
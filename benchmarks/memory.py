@@ -0,0 +1,55 @@
+"""Memory held per idle actor, Actor compared to CompactActor"""
+import asyncio
+import gc
+import tracemalloc
+
+from minions.actors import Actor, CompactActor
+
+from benchmarks.harness import Benchmark
+
+
+class EchoActor(Actor):
+    async def handle_message(self, message, sender):
+        return message
+
+
+class CompactEchoActor(CompactActor):
+    __slots__ = ()
+
+    async def handle_message(self, message, sender):
+        return message
+
+
+KINDS = {
+    "actor": EchoActor,
+    "compact": CompactEchoActor,
+}
+
+
+async def idle_actors(kind, actors):
+    cls = KINDS[kind]
+    gc.collect()
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        population = [cls() for _ in range(actors)]
+        ## every actor handled a message and is idle again
+        await asyncio.gather(*[actor(0, 'bench') for actor in population])
+        await asyncio.sleep(0)
+        gc.collect()
+        after = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    for actor in population:
+        await actor.stop()
+    return {"bytes_per_actor": (after - before) / actors}
+
+
+BENCHMARKS = [
+    Benchmark(
+        "memory.idle_actors",
+        idle_actors,
+        [dict(kind=kind, actors=100000) for kind in KINDS],
+        [dict(kind=kind, actors=10000) for kind in KINDS],
+    ),
+]
@@ -0,0 +1,69 @@
+"""Fan-out through the routers to 10 up to 10k children"""
+import asyncio
+from functools import partial
+
+from minions.actors import Actor
+from minions.actors.custom.routers import RandomRouter
+from minions.actors.custom.routers import RoundRobinRouter
+from minions.actors.custom.routers import ShortestQueueRouter
+from minions.actors.custom.routers import WeightedRoundRobinRouter
+
+from benchmarks.harness import Benchmark, Stopwatch
+
+
+class ScanShortestQueueRouter(ShortestQueueRouter):
+    """
+    The former O(n) ShortestQueueRouter, as baseline:
+    no depth index and no mailbox listeners
+    """
+    def _add_target(self, child):
+        super(ShortestQueueRouter, self)._add_target(child)
+
+    def _remove_target(self, child):
+        super(ShortestQueueRouter, self)._remove_target(child)
+
+    def _route(self, message, sender):
+        return min(self._healthy, key=self._load)
+
+
+ROUTERS = {
+    "random": RandomRouter,
+    "round_robin": RoundRobinRouter,
+    "weighted_round_robin": WeightedRoundRobinRouter,
+    "shortest_queue": ShortestQueueRouter,
+    "shortest_queue_p2c": partial(ShortestQueueRouter, choices=2),
+    "shortest_queue_scan": ScanShortestQueueRouter,
+}
+
+
+class EchoActor(Actor):
+    async def handle_message(self, message, sender):
+        return message
+
+
+async def fan_out(router, children, messages):
+    router = ROUTERS[router](
+        children=[EchoActor() for _ in range(children)]
+    )
+    with Stopwatch() as watch:
+        await asyncio.gather(*[router(i, 'bench') for i in range(messages)])
+    await router.stop()
+    return {"msgs_per_sec": messages / watch.elapsed}
+
+
+BENCHMARKS = [
+    Benchmark(
+        "routers.fan_out",
+        fan_out,
+        [
+            dict(router=router, children=children, messages=50000)
+            for router in ROUTERS
+            for children in (10, 100, 1000, 10000)
+        ],
+        [
+            dict(router=router, children=children, messages=5000)
+            for router in ROUTERS
+            for children in (10, 1000)
+        ],
+    ),
+]
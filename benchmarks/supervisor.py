@@ -0,0 +1,58 @@
+"""Restart storms: many children crashing under the RESTART policy"""
+import asyncio
+import logging
+
+from minions.actors import Actor, Supervisor, RESTART
+
+from benchmarks.harness import Benchmark, Stopwatch
+
+
+class CrashActor(Actor):
+    async def handle_message(self, message, sender):
+        raise RuntimeError("crash")
+
+
+async def _running(children):
+    while any(not child.alive for child in children):
+        await asyncio.sleep(0)
+
+
+async def restart_storm(children, crashes):
+    ## every crash is logged as error
+    logger = logging.getLogger('top')
+    level = logger.level
+    logger.setLevel(logging.CRITICAL)
+    try:
+        return await _restart_storm(children, crashes)
+    finally:
+        logger.setLevel(level)
+
+
+async def _restart_storm(children, crashes):
+    ## no intensity limit and no backoff, measure the restarts alone
+    supervisor = Supervisor(policy=RESTART, max_restarts=None, backoff=0)
+    for _ in range(children):
+        supervisor.spawn_child(CrashActor)
+    actors = list(supervisor._children)
+    with Stopwatch() as watch:
+        for _ in range(crashes):
+            await _running(actors)
+            results = [actor('crash', 'bench') for actor in actors]
+            await asyncio.gather(*results, return_exceptions=True)
+        await _running(actors)
+    await supervisor.stop()
+    restarts = children * crashes
+    return {
+        "restarts_per_sec": restarts / watch.elapsed,
+        "restart_us": watch.elapsed / restarts * 1e6,
+    }
+
+
+BENCHMARKS = [
+    Benchmark(
+        "supervisor.restart_storm",
+        restart_storm,
+        [dict(children=children, crashes=10) for children in (100, 1000)],
+        [dict(children=100, crashes=5)],
+    ),
+]
@@ -2,4 +2,18 @@ from minions.actors.actor import Actor
 from minions.actors.supervisor import Supervisor, Gru
 from minions.actors.supervisor import RESTART, RESUME
 from minions.actors.source import Source
-from minions.actors.router import Router
+from minions.actors.router import Router, QuorumNotReachedError
+from minions.actors.router import NoHealthyChildError
+from minions.actors.process_actor import ProcessActor
+from minions.actors.compact_actor import CompactActor
+from minions.actors.mailbox import BLOCK, DROP_NEW, DROP_OLD, REJECT
+from minions.actors.mailbox import MailboxFullError, MessageDroppedError
+from minions.actors.metrics import MetricsRegistry, REGISTRY
+from minions.actors.tracing import Tracer, set_tracer
+from minions.actors.tracing import InMemoryExporter, JSONFileExporter
+from minions.actors.virtual_actor import VirtualActor, VirtualActorRegistry
+from minions.actors.stores import InMemoryStore, SQLiteStore
+from minions.actors.durable_actor import DurableActor
+from minions.actors.event_sourced_actor import EventSourcedActor
+from minions.actors.journal import InMemoryJournal, FileJournal
+from minions.actors.stream import Stream
@@ -4,6 +4,12 @@ from contextlib import suppress
 from itertools import count
 import logging, sys, weakref
 from functools import partial
+from time import perf_counter, time
+
+from minions.actors.mailbox import Mailbox, BLOCK, SYSTEM
+from minions.actors.metrics import REGISTRY
+from minions.actors import tracing
+from minions.actors.timeouts import get_scheduler
 
 
 class ActorStatus:
@@ -14,6 +20,22 @@ class ActorStatus:
         return self.__ident__
 
 
+class SystemMessage:
+    def __init__(self,identifier):
+        self.__ident__ = identifier
+    
+    def __str__(self):
+        return self.__ident__
+
+
+## cancel all queued messages and exit the worker
+STOP = SystemMessage("STOP")
+## exit the worker, queued messages stay in the mailbox
+SUSPEND = SystemMessage("SUSPEND")
+## the mailbox stayed empty for actor_ttl seconds, never queued
+EXPIRE = SystemMessage("EXPIRE")
+
+
 class Actor:
     id_iter = count()
     
@@ -27,20 +49,44 @@ class Actor:
         name=None, 
         actor_ttl=None, 
         actor_timeout=None,
+        max_batch=None,
+        max_linger=None,
+        mailbox_size=None,
+        overflow=BLOCK,
+        priority=None,
+        metrics_registry=REGISTRY,
         **kwargs
     ):
         self.context = SimpleNamespace(**kwargs)
         self._logger = logging.getLogger('top')
         self._loop = asyncio.get_event_loop()
-        self._inbox = asyncio.Queue()
+        self._inbox = Mailbox(
+            maxsize=mailbox_size or 0,
+            overflow=overflow,
+            priority=priority
+        )
         self._timeout = actor_timeout
+        self._timeouts = get_scheduler(self._loop)
         self._ttl = actor_ttl
+        self._max_batch = max_batch
+        self._max_linger = max_linger
         self.name = name if name else f"actor-{next(Actor.id_iter)}"
+        ## ActorMetrics, None if metrics_registry is None
+        self.metrics = (
+            metrics_registry.register(self)
+            if metrics_registry is not None else None
+        )
+        self.refresh_log_level()
         self.start()
     
     def __str__(self):
         return f"<{type(self).__name__} \"{self.name}\">"
 
+    @property
+    def alive(self):
+        """True if the actor accepts messages"""
+        return self.status is Actor.RUNNING and not self._worker.done()
+
     def __call__(
         self, 
         message, 
@@ -48,10 +94,59 @@ class Actor:
     ):
         if self.status is not Actor.RUNNING or self._worker.done():
             raise asyncio.CancelledError()
-        self._logger.debug(f"{self} received {message}")
+        if self._debug:
+            self._logger.debug("%s received %s", self, message)
         result = self._loop.create_future()
-        self._inbox.put_nowait((message, sender, result))
+        self._post(message, sender, result)
         return result
+
+    def tell(
+        self,
+        message,
+        sender
+    ):
+        """Fire and forget, enqueue message without a result future"""
+        if self.status is not Actor.RUNNING or self._worker.done():
+            raise asyncio.CancelledError()
+        if self._debug:
+            self._logger.debug("%s was told %s", self, message)
+        self._post(message, sender, None)
+
+    async def send(
+        self,
+        message,
+        sender
+    ):
+        """
+        Enqueue message like __call__ and return the result future,
+        but wait for free space if the mailbox is full and its
+        overflow policy is BLOCK
+        """
+        if self.status is not Actor.RUNNING or self._worker.done():
+            raise asyncio.CancelledError()
+        result = self._loop.create_future()
+        await self._put(message, sender, result)
+        return result
+
+    def _envelope(self, message, sender, result):
+        if self.metrics is not None:
+            self.metrics.received += 1
+        tracer = tracing.tracer
+        trace = (
+            tracer.enqueue(self.name, message)
+            if tracer is not None else None
+        )
+        return (message, sender, result, trace)
+
+    def _post(self, message, sender, result):
+        self._inbox.post(self._envelope(message, sender, result))
+
+    async def _put(self, message, sender, result):
+        envelope = self._envelope(message, sender, result)
+        if self._inbox.overflow is BLOCK:
+            await self._inbox.put(envelope)
+        else:
+            self._inbox.post(envelope)
     
     async def handle_message(self, message, sender):
         """Override in your own Actor subclass"""
@@ -59,6 +154,17 @@ class Actor:
             'Please subclass Actor and implement handle_message() method'
         )
     
+    async def handle_batch(self, messages):
+        """
+        Override in your own Actor subclass to handle several
+        (message, sender) pairs in one go, used if max_batch is set.
+        Has to return one answer per message, in the same order.
+        """
+        return [
+            await self.handle_message(message, sender)
+            for message, sender in messages
+        ]
+
     async def on_stop(self):
         """Override in your own Actor subclass if needed"""
         pass
@@ -67,39 +173,119 @@ class Actor:
     def prepare(cls, *args, **kwargs):
         return partial(cls, *args, **kwargs)
     
+    def refresh_log_level(self):
+        """
+        Cache whether DEBUG logging is enabled, the message hot path
+        only checks this flag. Called on every start().
+        """
+        self._debug = self._logger.isEnabledFor(logging.DEBUG)
+
     def start(self):
+        self.refresh_log_level()
         self._worker = self._loop.create_task(self._handle())
         self.status = Actor.RUNNING
+        if getattr(self, "_parent", None) is not None:
+            self._parent._child_started(self)
 
     async def _handle(self):
-        ## TODO: Create Timer ttl with custom Timeout class
+        in_flight = ()
+        expired = False
+        metrics = self.metrics
         try:
             while True:
-                message, sender, result = await self._inbox.get()
-                self._logger.debug(
-                    f"{self} took {message} from mailbox"
-                )
-                try:
+                if self._max_batch:
+                    in_flight = await self._receive_batch()
+                elif self._ttl is None:
+                    in_flight = (await self._inbox.get(),)
+                else:
+                    in_flight = (await self._receive(),)
+                if in_flight[0][1] is SYSTEM:
+                    signal = in_flight[0][0]
+                    in_flight = ()
+                    if signal is STOP:
+                        self._inbox.cancel_pending()
+                    if signal is EXPIRE:
+                        expired = True
+                    else:
+                        self._inbox.task_done()
+                    self._logger.debug(f"{self} received {signal}")
+                    break
+                if self._max_batch:
+                    await self._handle_batch(in_flight)
+                    in_flight = ()
+                    continue
+                message, sender, result, trace = in_flight[0]
+                if result is not None and result.done():
+                    ## cancelled while queued, e.g. a scatter straggler
+                    in_flight = ()
+                    if trace:
+                        trace.finish(asyncio.CancelledError())
+                    self._inbox.task_done()
+                    continue
+                if trace is not None:
+                    ## messages posted while handling join the trace
+                    token = tracing.current_span.set(trace)
+                    if trace:
+                        trace.dequeued = time()
+                if self._debug:
                     self._logger.debug(
-                        f"{self} starts handling {message}"
+                        "%s took %s from mailbox", self, message
                     )
-                    coro = self.handle_message(message, sender)
-                    answer = await asyncio.wait_for(
-                        coro, 
-                        timeout=self._timeout
+                try:
+                    if self._debug:
+                        self._logger.debug(
+                            "%s starts handling %s", self, message
+                        )
+                    timed = (
+                        metrics is not None
+                        and not metrics.handled % metrics.sample
                     )
-                    result.set_result(answer)
-                    self._inbox.task_done()
-                except asyncio.CancelledError as err:
-                    result.set_exception(err)
+                    if timed:
+                        started = perf_counter()
+                    coro = self.handle_message(message, sender)
+                    if self._timeout is None:
+                        answer = await coro
+                    else:
+                        answer = await self._timeouts.run(
+                            coro,
+                            self._timeout
+                        )
+                    if metrics is not None:
+                        if timed:
+                            metrics.latency.observe(
+                                perf_counter() - started
+                            )
+                        metrics.handled += 1
+                    if result is not None and not result.done():
+                        result.set_result(answer)
+                    if trace:
+                        trace.finish()
                     self._inbox.task_done()
-                except asyncio.TimeoutError as err:
-                    result.set_exception(err)
+                except (
+                    asyncio.CancelledError,
+                    asyncio.TimeoutError
+                ) as err:
+                    if (
+                        metrics is not None
+                        and isinstance(err, asyncio.TimeoutError)
+                    ):
+                        metrics.timeouts += 1
+                    if result is None:
+                        self._unobserved(message, err)
+                    elif not result.done():
+                        result.set_exception(err)
+                    if trace:
+                        trace.finish(err)
                     self._inbox.task_done()
+                finally:
+                    if trace is not None:
+                        tracing.current_span.reset(token)
+                in_flight = ()
         except Exception as err:
             self.status = Actor.CRASHED
-            result.set_exception(err)
-            self._inbox.task_done()
+            if metrics is not None:
+                metrics.crashes += 1
+            self._fail(in_flight, err)
             self._logger.error(f"{self} crashed with:\n{err}")
         finally:
             self._logger.debug(f"{self} is executing on_stop()")
@@ -107,6 +293,8 @@ class Actor:
                 await self.on_stop()
             except Exception as err:
                 self.status = Actor.CRASHED
+                if metrics is not None:
+                    metrics.crashes += 1
                 self._logger.error(
                     f"{self} crashed while executing on_stop() with:"\
                     f"\n{err}"
@@ -115,33 +303,183 @@ class Actor:
                 f"{self} has finished on_stop()"
             )
             if self.status is Actor.CRASHED:
-                if hasattr(self, "_parent") and self._parent:
+                if getattr(self, "_parent", None) is not None:
                     await self._parent._handle_child(
                         self, 
                         "crashed"
                     )
+            elif expired:
+                self.status = Actor.STOPPED
+                if getattr(self, "_parent", None) is not None:
+                    await self._parent._handle_child(
+                        self,
+                        "expired"
+                    )
+
+    async def _receive(self):
+        """
+        Next envelope, or an EXPIRE signal once the mailbox stayed
+        empty for actor_ttl seconds
+        """
+        inbox = self._inbox
+        while inbox.empty():
+            try:
+                return await self._timeouts.run(inbox.get(), self._ttl)
+            except asyncio.TimeoutError:
+                if inbox.empty():
+                    ## nothing gets posted once the actor is not RUNNING
+                    self._logger.debug(
+                        f"{self} expired after {self._ttl}s idle"
+                    )
+                    self.status = Actor.STOPPING
+                    return (EXPIRE, SYSTEM, None, None)
+        return inbox.get_nowait()
+
+    async def _receive_batch(self):
+        """
+        Wait for the next message, then drain everything that is
+        already queued, up to max_batch messages. If max_linger is
+        set, wait up to max_linger seconds for the batch to fill up.
+        """
+        inbox = self._inbox
+        if self._ttl is None:
+            batch = [await inbox.get()]
+        else:
+            batch = [await self._receive()]
+        if batch[0][1] is SYSTEM:
+            return batch
+        deadline = (
+            self._loop.time() + self._max_linger
+            if self._max_linger else None
+        )
+        while len(batch) < self._max_batch:
+            if inbox.signalled:
+                break
+            if not inbox.empty():
+                batch.append(inbox.get_nowait())
+                continue
+            if deadline is None:
+                break
+            remaining = deadline - self._loop.time()
+            if remaining <= 0:
+                break
+            try:
+                envelope = await asyncio.wait_for(inbox.get(), remaining)
+            except asyncio.TimeoutError:
+                break
+            if envelope[1] is SYSTEM:
+                inbox.requeue(envelope)
+                break
+            batch.append(envelope)
+        return batch
+
+    async def _handle_batch(self, batch):
+        if self._debug:
+            self._logger.debug(
+                "%s took a batch of %d messages from mailbox",
+                self, len(batch)
+            )
+        metrics = self.metrics
+        traces = [envelope[3] for envelope in batch if envelope[3]]
+        if traces:
+            now = time()
+            for trace in traces:
+                trace.dequeued = now
+            ## messages posted while handling join the first trace
+            token = tracing.current_span.set(traces[0])
+        try:
+            if metrics is not None:
+                started = perf_counter()
+            coro = self.handle_batch(
+                [(message, sender) for message, sender, _, _ in batch]
+            )
+            if self._timeout is None:
+                answers = await coro
+            else:
+                answers = await self._timeouts.run(coro, self._timeout)
+        except (asyncio.CancelledError, asyncio.TimeoutError) as err:
+            if (
+                metrics is not None
+                and isinstance(err, asyncio.TimeoutError)
+            ):
+                metrics.timeouts += len(batch)
+            for message, _, result, _ in batch:
+                if result is None:
+                    self._unobserved(message, err)
+                elif not result.done():
+                    result.set_exception(err)
+            for trace in traces:
+                trace.finish(err)
+        else:
+            if metrics is not None:
+                metrics.latency.observe(perf_counter() - started)
+                metrics.handled += len(batch)
+            if len(answers) != len(batch):
+                raise ValueError(
+                    f"{self} returned {len(answers)} answers "\
+                    f"for a batch of {len(batch)} messages"
+                )
+            for (_, _, result, _), answer in zip(batch, answers):
+                if result is not None and not result.done():
+                    result.set_result(answer)
+            for trace in traces:
+                trace.finish()
+        finally:
+            if traces:
+                tracing.current_span.reset(token)
+        for _ in batch:
+            self._inbox.task_done()
     
-    def stop(self):
+    def _fail(self, in_flight, err):
+        """Fail the envelopes the worker was handling when it crashed"""
+        for _, _, result, trace in in_flight:
+            if result is not None and not result.done():
+                result.set_exception(err)
+            if trace:
+                trace.finish(err)
+            self._inbox.task_done()
+
+    def _unobserved(self, message, err):
+        """Report the failure of a told message, nobody awaits it"""
+        self._logger.error(
+            f"{self} failed to handle told message {message} "\
+            f"with {type(err).__name__}"
+        )
+
+    def stop(self, drain=True):
+        """
+        Stop after all queued messages were handled, or with
+        drain=False right after the current one, cancelling the rest
+        """
         if self.status is not Actor.STOPPED:
             self._logger.debug(f"{self} received order to stop.")
             self.status = Actor.STOPPING
-            return self._loop.create_task(self._stop())
+            return self._loop.create_task(self._stop(drain))
         else:
             self._logger.debug(f"{self} is already stopped.")
 
-    async def _stop(self):
-        self._logger.debug(
-            f"{self} is waiting for remaining messages to be processed."
-        )
-        await self.join()
-        if not self._worker.done():
-            try:
-                self._worker.cancel()
-                await self._worker
-            except asyncio.CancelledError:
-                pass
+    async def _stop(self, drain=True):
+        if drain and not self._worker.done():
+            self._logger.debug(
+                f"{self} is waiting for remaining messages to be processed."
+            )
+            ## a worker that crashes while draining never finishes the join
+            joined = self._loop.create_task(self.join())
+            await asyncio.wait(
+                (joined, self._worker),
+                return_when=asyncio.FIRST_COMPLETED
+            )
+            joined.cancel()
+            if not self._worker.done():
+                try:
+                    self._worker.cancel()
+                    await self._worker
+                except asyncio.CancelledError:
+                    pass
+        ## cancels whatever a crashed worker left in the mailbox
+        await self._interrupt(STOP)
         self.status = Actor.STOPPED
-        if hasattr(self, "_parent") and self._parent:
+        if getattr(self, "_parent", None) is not None:
             await self._parent._handle_child(
                 self, 
                 "stopped"
@@ -152,10 +490,26 @@ class Actor:
 
     async def _restart(self):
         if self.status is Actor.RUNNING:
-            await self.stop()
+            self.status = Actor.STOPPING
+            await self._interrupt(SUSPEND)
+            self.status = Actor.STOPPED
         if self.status in [Actor.STOPPED,Actor.CRASHED]:
+            if self.metrics is not None:
+                self.metrics.restarts += 1
             self.start()
 
+    async def _interrupt(self, signal):
+        """
+        Put signal in the system lane of the mailbox, ahead of all
+        queued user messages, and wait for the worker to exit
+        """
+        if self._worker.done():
+            if signal is STOP:
+                self._inbox.cancel_pending()
+            return
+        self._inbox.post_system(signal)
+        await self._worker
+
     def register_parent(self, parent):
         self._parent = weakref.proxy(parent)
         self._logger.debug(
@@ -0,0 +1,198 @@
+import asyncio
+from collections import deque
+from functools import partial
+from itertools import count
+import logging
+from types import SimpleNamespace
+import weakref
+
+from minions.actors.actor import Actor
+
+
+class CompactActor:
+    """
+    Actor for millions of mostly idle instances (sessions, devices).
+
+    Uses __slots__ and no mailbox or worker task while idle: the first
+    message creates a deque mailbox and a worker task, both go away
+    once the mailbox is drained. Supports __call__, tell, send, stop,
+    restart and supervision like Actor, but no mailbox size, overflow
+    policies, timeouts, batching, metrics or tracing. Routers that
+    look into the mailbox (ShortestQueueRouter) need an Actor.
+    on_stop() is called once, when the actor stops.
+    Subclasses have to declare __slots__ too, or get a __dict__ again.
+    """
+    __slots__ = (
+        "_name",
+        "context",
+        "status",
+        "_loop",
+        "_mailbox",
+        "_worker",
+        "_parent",
+        "__weakref__",
+    )
+
+    id_iter = count()
+    _logger = logging.getLogger('top')
+
+    def __init__(self, name=None, **kwargs):
+        ## formatted on demand, saves a string per actor
+        self._name = name if name else next(CompactActor.id_iter)
+        self.context = SimpleNamespace(**kwargs) if kwargs else None
+        self._loop = asyncio.get_event_loop()
+        self._mailbox = None
+        self._worker = None
+        self._parent = None
+        self.status = Actor.RUNNING
+
+    @property
+    def name(self):
+        if isinstance(self._name, int):
+            return f"compact-{self._name}"
+        return self._name
+
+    def __str__(self):
+        return f"<{type(self).__name__} \"{self.name}\">"
+
+    @property
+    def alive(self):
+        """True if the actor accepts messages"""
+        return self.status is Actor.RUNNING
+
+    def __call__(self, message, sender):
+        if self.status is not Actor.RUNNING:
+            raise asyncio.CancelledError()
+        result = self._loop.create_future()
+        self._post(message, sender, result)
+        return result
+
+    def tell(self, message, sender):
+        """Fire and forget, enqueue message without a result future"""
+        if self.status is not Actor.RUNNING:
+            raise asyncio.CancelledError()
+        self._post(message, sender, None)
+
+    async def send(self, message, sender):
+        """Like __call__, the mailbox is never full"""
+        return self(message, sender)
+
+    def _post(self, message, sender, result):
+        mailbox = self._mailbox
+        if mailbox is None:
+            mailbox = self._mailbox = deque()
+        mailbox.append((message, sender, result))
+        if self._worker is None and self.status is Actor.RUNNING:
+            self._worker = self._loop.create_task(self._drain())
+
+    async def _put(self, message, sender, result):
+        self._post(message, sender, result)
+
+    async def handle_message(self, message, sender):
+        """Override in your own CompactActor subclass"""
+        raise NotImplementedError(
+            'Please subclass CompactActor and implement '\
+            'handle_message() method'
+        )
+
+    async def on_stop(self):
+        """Override in your own CompactActor subclass if needed"""
+        pass
+
+    @classmethod
+    def prepare(cls, *args, **kwargs):
+        return partial(cls, *args, **kwargs)
+
+    def start(self):
+        self.status = Actor.RUNNING
+        if self._mailbox and self._worker is None:
+            self._worker = self._loop.create_task(self._drain())
+        if self._parent is not None:
+            self._parent._child_started(self)
+
+    async def _drain(self):
+        mailbox = self._mailbox
+        try:
+            ## RUNNING or draining for stop(), restart() suspends
+            while mailbox and (
+                self.status is Actor.RUNNING
+                or self.status is Actor.STOPPING
+            ):
+                message, sender, result = mailbox.popleft()
+                if result is not None and result.done():
+                    continue
+                try:
+                    answer = await self.handle_message(message, sender)
+                except asyncio.CancelledError as err:
+                    if result is not None and not result.done():
+                        result.set_exception(err)
+                    raise
+                except Exception as err:
+                    self.status = Actor.CRASHED
+                    if result is not None and not result.done():
+                        result.set_exception(err)
+                    self._logger.error(f"{self} crashed with:\n{err}")
+                else:
+                    if result is not None and not result.done():
+                        result.set_result(answer)
+        finally:
+            self._worker = None
+            if not mailbox and self._mailbox is mailbox:
+                self._mailbox = None
+        if self.status is Actor.CRASHED and self._parent is not None:
+            await self._parent._handle_child(self, "crashed")
+
+    def _cancel_pending(self):
+        mailbox, self._mailbox = self._mailbox, None
+        for _, _, result in mailbox or ():
+            if result is not None:
+                result.cancel()
+        if mailbox:
+            mailbox.clear()
+
+    async def join(self):
+        """Wait until the mailbox is drained"""
+        while self._worker is not None:
+            await asyncio.wait((self._worker,))
+
+    def stop(self, drain=True):
+        """
+        Stop after all queued messages were handled, or with
+        drain=False right after the current one, cancelling the rest
+        """
+        if self.status is not Actor.STOPPED:
+            self.status = Actor.STOPPING
+            return self._loop.create_task(self._stop(drain))
+
+    async def _stop(self, drain=True):
+        if drain:
+            await self.join()
+        self._cancel_pending()
+        await self.join()
+        self.status = Actor.STOPPED
+        try:
+            await self.on_stop()
+        except Exception as err:
+            self._logger.error(
+                f"{self} crashed while executing on_stop() with:"\
+                f"\n{err}"
+            )
+        if self._parent is not None:
+            await self._parent._handle_child(self, "stopped")
+
+    def restart(self):
+        return self._loop.create_task(self._restart())
+
+    async def _restart(self):
+        if self.status is Actor.RUNNING:
+            ## the worker exits after the current message
+            self.status = Actor.STOPPED
+            await self.join()
+        if self.status in (Actor.STOPPED, Actor.CRASHED):
+            self.start()
+
+    def register_parent(self, parent):
+        self._parent = weakref.proxy(parent)
+
+    def unregister_parent(self, parent):
+        self._parent = None
@@ -1,3 +1,6 @@
 from minions.actors.custom.routers.shortest_queue_router import ShortestQueueRouter
 from minions.actors.custom.routers.random_router import RandomRouter
 from minions.actors.custom.routers.round_robin_router import RoundRobinRouter
+from minions.actors.custom.routers.consistent_hash_router import ConsistentHashRouter
+from minions.actors.custom.routers.elastic_router import ElasticRouter
+from minions.actors.custom.routers.weighted_round_robin_router import WeightedRoundRobinRouter
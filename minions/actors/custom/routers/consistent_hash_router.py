@@ -0,0 +1,88 @@
+import bisect
+import hashlib
+
+from minions.actors.router import Router, NoHealthyChildError
+
+
+def _hash(key):
+    """Same hash in every process, only for str, bytes and int keys"""
+    if isinstance(key, str):
+        key = key.encode()
+    elif isinstance(key, int):
+        key = key.to_bytes((key.bit_length() + 8) // 8, "big", signed=True)
+    elif not isinstance(key, bytes):
+        raise TypeError(
+            f"ConsistentHashRouter keys have to be str, bytes or int, "\
+            f"not {type(key).__name__}, pass key= to pick one"
+        )
+    return int.from_bytes(
+        hashlib.blake2b(key, digest_size=8).digest(),
+        "big"
+    )
+
+
+class ConsistentHashRouter(Router):
+    """
+    Routes messages with the same key to the same child.
+
+    key(message) picks the key, by default the message itself, it
+    has to be str, bytes or int so it hashes alike in every process.
+    Every child owns replicas virtual nodes on a hash ring, placed by
+    its name, a key goes to the first virtual node at or after its
+    hash (binary search). Adding or removing a child only moves the
+    keys of that child.
+    """
+    def __init__(self, *args, key=None, replicas=100, **kwargs):
+        self._key = key if key is not None else lambda message: message
+        self._replicas = replicas
+        ## sorted virtual node hashes and their children
+        self._ring = []
+        self._owners = []
+        super().__init__(*args, **kwargs)
+
+    def _route(self, message, sender):
+        if not self._ring:
+            raise NoHealthyChildError(
+                "ConsistentHashRouter has no children to route to!"
+            )
+        index = bisect.bisect_left(self._ring, _hash(self._key(message)))
+        if index == len(self._ring):
+            index = 0
+        return self._owners[index]
+
+    def _scatter_targets(self, message, sender, k):
+        """The owner of the key and the next k - 1 children on the ring"""
+        if k is None or k >= len(self._healthy):
+            return super()._scatter_targets(message, sender, k)
+        start = bisect.bisect_left(self._ring, _hash(self._key(message)))
+        targets = []
+        for offset in range(len(self._ring)):
+            owner = self._owners[(start + offset) % len(self._ring)]
+            if owner.alive and owner not in targets:
+                targets.append(owner)
+                if len(targets) == k:
+                    break
+        return targets
+
+    def _add_target(self, child):
+        if child in self._healthy_index:
+            return
+        super()._add_target(child)
+        for replica in range(self._replicas):
+            point = _hash(f"{child.name}#{replica}")
+            index = bisect.bisect_left(self._ring, point)
+            self._ring.insert(index, point)
+            self._owners.insert(index, child)
+
+    def _remove_target(self, child):
+        if child not in self._healthy_index:
+            return
+        super()._remove_target(child)
+        for replica in range(self._replicas):
+            point = _hash(f"{child.name}#{replica}")
+            index = bisect.bisect_left(self._ring, point)
+            ## other children may own the same point
+            while self._owners[index] is not child:
+                index += 1
+            del self._ring[index]
+            del self._owners[index]
@@ -0,0 +1,118 @@
+import asyncio
+import math
+
+from minions.actors.custom.routers.shortest_queue_router import ShortestQueueRouter
+
+
+class ElasticRouter(ShortestQueueRouter):
+    """
+    Pool of children spawned from factory (see Actor.prepare),
+    resized by the mailbox pressure of its children.
+
+    Every interval seconds the average number of queued messages per
+    child is checked. Above high_watermark the pool grows at once to
+    the size that brings it back to high_watermark, below
+    low_watermark an idle child is unregistered and stopped. Between
+    both nothing happens (hysteresis), and after a resize the pool
+    stays as it is for cooldown seconds. The size is kept between
+    min_children and max_children.
+    """
+    def __init__(
+        self,
+        *args,
+        factory,
+        min_children=1,
+        max_children=8,
+        high_watermark=10,
+        low_watermark=1,
+        interval=0.1,
+        cooldown=1.0,
+        **kwargs
+    ):
+        if not 0 < min_children <= max_children:
+            raise ValueError(
+                "Expected 0 < min_children <= max_children"
+            )
+        if not 0 <= low_watermark < high_watermark:
+            raise ValueError(
+                "Expected 0 <= low_watermark < high_watermark"
+            )
+        self._factory = factory
+        self._min_children = min_children
+        self._max_children = max_children
+        self._high_watermark = high_watermark
+        self._low_watermark = low_watermark
+        self._interval = interval
+        self._cooldown = cooldown
+        self._last_resize = None
+        self._monitor = None
+        super().__init__(*args, **kwargs)
+        while len(self._children) < min_children:
+            self.spawn_child(factory)
+
+    @property
+    def size(self):
+        return len(self._children)
+
+    def start(self):
+        super().start()
+        if self._monitor is not None:
+            self._monitor.cancel()
+        self._monitor = self._loop.create_task(self._watch())
+
+    async def _watch(self):
+        while True:
+            await asyncio.sleep(self._interval)
+            if self.status is not self.RUNNING:
+                continue
+            try:
+                await self._resize()
+            except Exception as err:
+                self._logger.error(
+                    f"{self} failed to resize its pool with:\n{err}"
+                )
+
+    async def _resize(self):
+        now = self._loop.time()
+        if (
+            self._last_resize is not None
+            and now - self._last_resize < self._cooldown
+        ):
+            return
+        size = len(self._children)
+        depth = sum(child._inbox.qsize() for child in self._children)
+        average = depth / size if size else math.inf
+        if average > self._high_watermark and size < self._max_children:
+            target = min(
+                self._max_children,
+                max(size + 1, math.ceil(depth / self._high_watermark))
+            )
+            for _ in range(target - size):
+                self.spawn_child(self._factory)
+            self._last_resize = now
+            self._logger.info(
+                f"{self} grew from {size} to {target} children, "\
+                f"{depth} messages queued"
+            )
+        elif average < self._low_watermark and size > self._min_children:
+            idle = next(
+                (
+                    child for child in reversed(self._children)
+                    if child._inbox.empty()
+                ),
+                None
+            )
+            if idle is None:
+                return
+            self.unregister_child(idle)
+            self._last_resize = now
+            self._logger.info(
+                f"{self} shrank from {size} to {size - 1} children"
+            )
+            await idle.stop()
+
+    async def stop(self, drain=True):
+        if self._monitor is not None:
+            self._monitor.cancel()
+            self._monitor = None
+        await super().stop(drain=drain)
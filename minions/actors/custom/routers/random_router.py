@@ -1,15 +1,15 @@
 import asyncio
 import random
 
-from minions.actors import Router
+from minions.actors import Router, NoHealthyChildError
 
 
 class RandomRouter(Router):
     """Routes received messages to a random child"""
     def _route(self, message, sender):
-        if self._children:
-            return random.choice(self._children)
+        if self._healthy:
+            return random.choice(self._healthy)
         else:
-            raise Exception(
+            raise NoHealthyChildError(
                 "RandomRouter has no children to route to!"
             )
@@ -1,22 +1,42 @@
 import asyncio
-import itertools
 
-from minions.actors import Router
+from minions.actors import Router, NoHealthyChildError
 
 
 class RoundRobinRouter(Router):
-    """Routes received messages in round robin fashion"""
+    """
+    Routes received messages in round robin fashion
+    over the healthy children, follows children being
+    registered, unregistered, crashing and restarting
+    """
     def __init__(self, *args, **kwargs):
+        self._cursor = 0
         super().__init__(*args, **kwargs)
-        self._next = self._round_robin_iterator()
+
     def _route(self, message, sender):
-        if self._children:
-            return next(self._next)
-        else:
-            raise Exception(
+        healthy = self._healthy
+        if not healthy:
+            raise NoHealthyChildError(
                 "RoundRobinRouter has no children to route to!"
             )
+        position = self._cursor
+        if position >= len(healthy):
+            position = 0
+        self._cursor = position + 1
+        return healthy[position]
 
-    def _round_robin_iterator(self):
-        for item in itertools.cycle(self._children):
-            yield item
\ No newline at end of file
+    def _remove_target(self, child):
+        position = self._healthy_index.get(child)
+        super()._remove_target(child)
+        if position is None or position >= self._cursor:
+            return
+        ## the last child was swapped in behind the cursor, move it to
+        ## the cursor so the children served in this cycle stay in front
+        self._cursor -= 1
+        cursor = self._cursor
+        healthy = self._healthy
+        if position != cursor and cursor < len(healthy):
+            moved, served = healthy[position], healthy[cursor]
+            healthy[position], healthy[cursor] = served, moved
+            self._healthy_index[served] = position
+            self._healthy_index[moved] = cursor
@@ -1,21 +1,109 @@
 import asyncio
+import heapq
+import random
 
-from minions.actors.router import Router
+from minions.actors.router import Router, NoHealthyChildError
 
 
 class ShortestQueueRouter(Router):
     """
     Routes received messages to the child
-    with the lowest number of enqueued tasks
+    with the lowest number of enqueued tasks,
+    children with a full mailbox come last.
+
+    Children are kept in buckets by mailbox depth, their mailboxes
+    report every change to a listener of the router, so finding the
+    target is O(1).
+    With choices=k (usually 2) no index is kept, the least loaded
+    of k random children is picked instead (power of k choices).
+    The index is the faster of the two, even for 1000 children
+    (see python -m benchmarks).
     """
+    def __init__(self, *args, choices=None, **kwargs):
+        self._choices = choices
+        ## child -> depth, depth -> [children], child -> bucket position
+        self._depth = {}
+        self._buckets = {}
+        self._position = {}
+        self._min_depth = 0
+        ## child -> listener added to its mailbox
+        self._listeners = {}
+        super().__init__(*args, **kwargs)
+
     def _route(self, message, sender):
-        if self._children:
-            item = min(
-                self._children,
-                key=lambda item: item._inbox.qsize()
-            )
-            return item
-        else:
-            raise Exception(
+        if not self._healthy:
+            raise NoHealthyChildError(
                 "ShortestQueueRouter has no children to route to!"
             )
+        if self._choices:
+            candidates = (
+                random.sample(self._healthy, self._choices)
+                if len(self._healthy) > self._choices
+                else self._healthy
+            )
+            return min(candidates, key=self._load)
+        item = self._buckets[self._min_depth][-1]
+        if item._inbox.full():
+            item = min(self._healthy, key=self._load)
+        return item
+
+    def _scatter_targets(self, message, sender, k):
+        healthy = [child for child in self._healthy if child.alive]
+        if k is None or k >= len(healthy):
+            return healthy
+        return heapq.nsmallest(k, healthy, key=self._load)
+
+    @staticmethod
+    def _load(item):
+        return (item._inbox.full(), item._inbox.qsize())
+
+    def _add_target(self, child):
+        super()._add_target(child)
+        if self._choices or child in self._depth:
+            return
+        self._insert(child, child._inbox.qsize())
+        listener = self._listeners[child] = (
+            lambda inbox, child=child: self._depth_changed(child, inbox)
+        )
+        child._inbox.add_listener(listener)
+
+    def _remove_target(self, child):
+        super()._remove_target(child)
+        if child not in self._depth:
+            return
+        child._inbox.remove_listener(self._listeners.pop(child))
+        self._take(child)
+        if not self._depth:
+            self._min_depth = 0
+        elif self._min_depth not in self._buckets:
+            self._min_depth = min(self._buckets)
+
+    def _depth_changed(self, child, inbox):
+        depth = inbox.qsize()
+        old = self._take(child)
+        self._insert(child, depth)
+        if old == self._min_depth and old not in self._buckets:
+            while self._min_depth not in self._buckets:
+                self._min_depth += 1
+
+    def _insert(self, child, depth):
+        bucket = self._buckets.get(depth)
+        if bucket is None:
+            bucket = self._buckets[depth] = []
+        self._position[child] = len(bucket)
+        bucket.append(child)
+        self._depth[child] = depth
+        if depth < self._min_depth or len(self._depth) == 1:
+            self._min_depth = depth
+
+    def _take(self, child):
+        depth = self._depth.pop(child)
+        bucket = self._buckets[depth]
+        position = self._position.pop(child)
+        last = bucket.pop()
+        if last is not child:
+            bucket[position] = last
+            self._position[last] = position
+        if not bucket:
+            del self._buckets[depth]
+        return depth
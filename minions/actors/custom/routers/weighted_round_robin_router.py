@@ -0,0 +1,75 @@
+import math
+
+from minions.actors import Router, NoHealthyChildError
+
+
+def context_weight(child):
+    """Weight given as Actor(weight=...), 1 if missing"""
+    return getattr(child.context, "weight", 1)
+
+
+class WeightedRoundRobinRouter(Router):
+    """
+    Routes received messages in round robin fashion,
+    child.context.weight (or weight(child)) times as often
+    to every healthy child.
+
+    The schedule is interleaved smoothly (no runs of the same child)
+    and rebuilt on the next message after the healthy children
+    changed, so picking the next target is O(1).
+    """
+    def __init__(self, *args, weight=context_weight, **kwargs):
+        self._weight = weight
+        self._schedule = []
+        self._cursor = 0
+        self._stale = True
+        super().__init__(*args, **kwargs)
+
+    def _route(self, message, sender):
+        if self._stale:
+            self._rebuild()
+        schedule = self._schedule
+        if not schedule:
+            raise NoHealthyChildError(
+                "WeightedRoundRobinRouter has no children to route to!"
+            )
+        position = self._cursor
+        if position >= len(schedule):
+            position = 0
+        self._cursor = position + 1
+        return schedule[position]
+
+    def _rebuild(self):
+        """
+        Give the k-th turn of a child with weight w the virtual
+        time (k + 0.5) / w and visit the turns in that order
+        (stride scheduling), which spreads every child evenly
+        """
+        weights = []
+        for child in self._healthy:
+            weight = self._weight(child)
+            if not isinstance(weight, int) or weight < 0:
+                raise ValueError(
+                    f"{child} has weight {weight!r}, "\
+                    f"expected an int >= 0"
+                )
+            if weight:
+                weights.append((child, weight))
+        divisor = math.gcd(*[weight for _, weight in weights]) or 1
+        turns = sorted(
+            ((turn + 0.5) * divisor / weight, index)
+            for index, (_, weight) in enumerate(weights)
+            for turn in range(weight // divisor)
+        )
+        schedule = [weights[index][0] for _, index in turns]
+        self._schedule = schedule
+        self._cursor = 0
+        self._stale = False
+
+    def _add_target(self, child):
+        super()._add_target(child)
+        self._stale = True
+
+    def _remove_target(self, child):
+        super()._remove_target(child)
+        self._stale = True
@@ -1,2 +1,4 @@
 from minions.actors.custom.sources.asgi_server import ASGIRestApi
 from minions.actors.custom.sources.asgi_server import ASGIWebServer
+from minions.actors.custom.sources.asgi_server import MetricsResource
+from minions.actors.custom.sources.asgi_server import TracingMiddleware
@@ -7,6 +7,8 @@ import falcon.asgi
 import uvicorn
 
 from minions.actors.source import Source
+from minions.actors.metrics import REGISTRY
+from minions.actors import tracing
 
 
 ## disable ctrl + c for uvicorn
@@ -15,17 +17,51 @@ class CustomUvicornServer(uvicorn.Server):
         pass
 
 
+class MetricsResource:
+    """Serves a MetricsRegistry in the Prometheus text format"""
+    def __init__(self, registry=REGISTRY):
+        self._registry = registry
+
+    async def on_get(self, req, resp):
+        resp.content_type = "text/plain; version=0.0.4; charset=utf-8"
+        resp.text = self._registry.render()
+
+
+class TracingMiddleware:
+    """
+    Starts a span for every request, messages the responder posts
+    to actors join its trace. Pass as ASGIRestApi(middleware=[...])
+    """
+    async def process_request(self, req, resp):
+        tracer = tracing.tracer
+        if tracer is None:
+            req.context.trace = None
+            return
+        req.context.trace = tracer.span(f"{req.method} {req.path}")
+        req.context.trace.__enter__()
+
+    async def process_response(self, req, resp, resource, req_succeeded):
+        trace = getattr(req.context, "trace", None)
+        if trace is not None:
+            req.context.trace = None
+            trace.__exit__(None, None, None)
+
+
 class ASGIRestApi(falcon.asgi.App):
     def __init__(
         self,
         routes: Mapping={},
         *args,
+        metrics_registry=REGISTRY,
+        metrics_route="/metrics",
         **kwargs
     ):
         super().__init__(*args, **kwargs)
         self._logger = logging.getLogger('top')
         self._routes = routes
         self.add_routes()
+        if metrics_registry is not None and metrics_route:
+            self.add_route(metrics_route, MetricsResource(metrics_registry))
 
     def add_routes(self):
         for route, handler in self._routes.items()\
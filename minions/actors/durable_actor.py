@@ -0,0 +1,144 @@
+from functools import partial
+import pickle
+
+from minions.actors.actor import Actor
+from minions.actors.mailbox import portable_sender
+from minions.actors.wal import MessageLog
+
+
+class DurableActor(Actor):
+    """
+    Actor whose queued messages survive crashes and process restarts.
+
+    Every message is appended to a MessageLog in the directory path
+    when it is queued and acknowledged once it is done with: answered,
+    timed out, dropped or cancelled. If handle_message raises, the
+    message goes back to the front of the mailbox and is handled again
+    after the restart, up to max_redeliveries times, then its future
+    gets the exception. A DurableActor opened on an existing log
+    handles the messages that were never acknowledged first, as if
+    they were told. They are queued even if there are more of them
+    than mailbox_size, which only applies to new messages.
+
+    Writes are batched (group commit), __call__ and tell return
+    before the message is on disk, send() waits until it is.
+    Messages have to be picklable, senders are logged by name.
+    Messages cancelled by stop() - also those requeued by a crash -
+    stay in the log and are handled once it is opened again.
+    """
+    def __init__(
+        self,
+        *args,
+        path,
+        segment_size=64 << 20,
+        fsync=True,
+        max_redeliveries=3,
+        **kwargs
+    ):
+        self._log = MessageLog(path, segment_size=segment_size, fsync=fsync)
+        self._max_redeliveries = max_redeliveries
+        ## result future -> sequence number of its message
+        self._seqs = {}
+        ## sequence number -> failed attempts
+        self._attempts = {}
+        super().__init__(*args, **kwargs)
+        self._recover()
+
+    def _recover(self):
+        recovered = self._log.recover()
+        for seq, payload, attempts in recovered:
+            message, sender = pickle.loads(payload)
+            result = self._loop.create_future()
+            if attempts:
+                self._attempts[seq] = attempts
+            ## accepted before the crash, may exceed mailbox_size
+            self._inbox.restore(self._envelope(message, sender, result))
+            self._track(seq, result, message, True)
+        if recovered:
+            self._logger.info(
+                f"{self} recovered {len(recovered)} unacknowledged messages"
+            )
+
+    def _payload(self, message, sender):
+        return pickle.dumps(
+            (message, portable_sender(sender)),
+            protocol=pickle.HIGHEST_PROTOCOL
+        )
+
+    def _post(self, message, sender, result):
+        payload = self._payload(message, sender)
+        told = result is None
+        if told:
+            ## acknowledged when done, like a called message
+            result = self._loop.create_future()
+        super()._post(message, sender, result)
+        self._track(self._log.append(payload), result, message, told)
+
+    async def _put(self, message, sender, result):
+        payload = self._payload(message, sender)
+        await super()._put(message, sender, result)
+        self._track(self._log.append(payload), result, message, False)
+
+    async def send(
+        self,
+        message,
+        sender
+    ):
+        """Like Actor.send, returns once the message is on disk"""
+        result = await super().send(message, sender)
+        await self._log.commit()
+        return result
+
+    def _track(self, seq, result, message, told):
+        self._seqs[result] = seq
+        if told:
+            result.add_done_callback(
+                partial(self._acknowledge_told, message)
+            )
+        else:
+            result.add_done_callback(self._acknowledge)
+
+    def _acknowledge(self, result):
+        seq = self._seqs.pop(result, None)
+        if seq is None:
+            return
+        if result.cancelled() and self.status is not Actor.RUNNING:
+            ## cancelled by stop() before it was handled
+            return
+        self._attempts.pop(seq, None)
+        self._log.ack(seq)
+
+    def _acknowledge_told(self, message, result):
+        self._acknowledge(result)
+        if not result.cancelled() and result.exception() is not None:
+            self._unobserved(message, result.exception())
+
+    def _fail(self, in_flight, err):
+        """Requeue logged messages, until they failed too often"""
+        failed = []
+        for envelope in reversed(in_flight):
+            result = envelope[2]
+            seq = self._seqs.get(result)
+            if seq is None or result.done():
+                failed.append(envelope)
+                continue
+            attempts = self._attempts.get(seq, 0) + 1
+            if attempts > self._max_redeliveries:
+                self._logger.error(
+                    f"{self} gave up on message {envelope[0]} after "\
+                    f"{attempts} failed attempts"
+                )
+                failed.append(envelope)
+                continue
+            self._attempts[seq] = attempts
+            self._log.attempt(seq)
+            self._inbox.requeue(envelope)
+        super()._fail(failed[::-1], err)
+
+    async def _stop(self, drain=True):
+        await super()._stop(drain)
+        await self._log.close()
+
+    async def commit(self):
+        """Wait until all messages queued so far are on disk"""
+        await self._log.commit()
@@ -0,0 +1,126 @@
+import pickle
+
+from minions.actors.actor import Actor
+from minions.actors.journal import InMemoryJournal
+
+
+class EventSourcedActor(Actor):
+    """
+    Actor whose state is the result of the events it emitted.
+
+    handle_command(command, sender) decides and emit()s events,
+    apply(state, event) returns the state after an event. Once
+    handle_command returned, its events are applied to state and
+    written to journal, the answer is returned once they are on
+    disk. If handle_command raises, its events are discarded.
+
+    start() - also on restart - rebuilds state from the latest
+    snapshot and the events after it, so a crash never leaves
+    half-mutated state behind. Keep everything in state, other
+    attributes survive restarts as they are. Every snapshot_every
+    events a snapshot is saved to snapshots (a store like
+    InMemoryStore or SQLiteStore, None disables snapshots).
+    Share one journal between actors to batch their writes,
+    persistence_id (by default the name) tells their events apart.
+    It has to be the same in every run, so either persistence_id or
+    name is required, generated names would start a new journal.
+    """
+    def __init__(
+        self,
+        *args,
+        journal=None,
+        snapshots=None,
+        persistence_id=None,
+        snapshot_every=1000,
+        **kwargs
+    ):
+        name = kwargs.get("name", args[0] if args else None)
+        if not (persistence_id or name):
+            raise ValueError(
+                f"{type(self).__name__} needs a persistence_id or a name"
+            )
+        self._journal = journal if journal is not None else InMemoryJournal()
+        self._snapshots = snapshots
+        self._persistence_id = persistence_id or name
+        self._snapshot_every = snapshot_every
+        self._staged = []
+        super().__init__(*args, **kwargs)
+
+    @property
+    def persistence_id(self):
+        return self._persistence_id
+
+    def initial_state(self):
+        """Override to give actors without events a state"""
+        return None
+
+    def apply(self, state, event):
+        """Override in your own EventSourcedActor subclass"""
+        raise NotImplementedError(
+            'Please subclass EventSourcedActor and implement '\
+            'apply() method'
+        )
+
+    async def handle_command(self, command, sender):
+        """Override in your own EventSourcedActor subclass"""
+        raise NotImplementedError(
+            'Please subclass EventSourcedActor and implement '\
+            'handle_command() method'
+        )
+
+    def emit(self, event):
+        """Stage event, applied and written once handle_command returned"""
+        self._staged.append(event)
+
+    async def handle_message(self, message, sender):
+        self._staged = []
+        answer = await self.handle_command(message, sender)
+        events, self._staged = self._staged, []
+        if not events:
+            return answer
+        first = self.seq
+        state = self.state
+        for event in events:
+            state = self.apply(state, event)
+        self.state = state
+        self.seq = first + len(events)
+        self._since_snapshot += len(events)
+        await self._journal.write(self.persistence_id, first, events)
+        if (
+            self._snapshots is not None
+            and self._since_snapshot >= self._snapshot_every
+        ):
+            self.snapshot()
+        return answer
+
+    def snapshot(self):
+        """Save state as of the latest event to snapshots"""
+        self._snapshots.save(
+            self.persistence_id,
+            (self.seq, pickle.dumps(self.state, pickle.HIGHEST_PROTOCOL))
+        )
+        self._since_snapshot = 0
+        self._journal.trim(self.persistence_id, self.seq)
+
+    def start(self):
+        self._recover()
+        super().start()
+
+    def _recover(self):
+        """Rebuild state from the latest snapshot and the journal"""
+        state, seq = self.initial_state(), 0
+        if self._snapshots is not None:
+            snapshot = self._snapshots.load(self.persistence_id)
+            if snapshot is not None:
+                seq, state = snapshot[0], pickle.loads(snapshot[1])
+        replayed = 0
+        for seq, event in self._journal.read(self.persistence_id, seq):
+            state = self.apply(state, event)
+            replayed += 1
+        self.state = state
+        self.seq = seq
+        self._since_snapshot = replayed
+        self._staged = []
+        self._logger.debug(
+            f"{self} recovered to event {seq}, replayed {replayed} events"
+        )
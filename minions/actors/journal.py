@@ -0,0 +1,132 @@
+from collections import deque
+import mmap
+import pickle
+import struct
+
+from minions.actors.wal import EVENT, SegmentWriter
+from minions.actors.wal import encode, read_at, records, segments
+
+
+## length of the persistence id in front of the pickled event
+ID_LENGTH = struct.Struct("<H")
+
+
+class InMemoryJournal:
+    """
+    Keeps the events of every persistence id in memory,
+    they outlive the actor but not the process
+    """
+    def __init__(self):
+        self._events = {}
+
+    async def write(self, persistence_id, seq, events):
+        """Append events, numbered from seq + 1 on"""
+        journal = self._events.setdefault(persistence_id, deque())
+        for event in events:
+            seq += 1
+            journal.append((seq, event))
+
+    def read(self, persistence_id, after=0):
+        """Yield the (seq, event) pairs of persistence_id after seq after"""
+        for seq, event in self._events.get(persistence_id, ()):
+            if seq > after:
+                yield seq, event
+
+    def trim(self, persistence_id, seq):
+        """Forget the events up to seq, a snapshot covers them"""
+        journal = self._events.get(persistence_id)
+        while journal and journal[0][0] <= seq:
+            journal.popleft()
+
+    async def close(self):
+        pass
+
+
+class FileJournal:
+    """
+    Appends the events of many actors to one segmented log in the
+    directory path, events written by different actors at the same
+    time share one write and fsync (group commit).
+
+    The journal is never rewritten. On open, the segments are
+    scanned for the position of every event, trim() drops the
+    positions of events a snapshot covers, read() fetches events
+    through mmap. Persistence ids have to be str, events picklable.
+    """
+    def __init__(self, path, segment_size=64 << 20, fsync=True):
+        self._writer = SegmentWriter(path, segment_size, fsync)
+        ## persistence id -> deque of (seq, segment path, offset)
+        self._index = {}
+        self._segment = 0
+        self._path = None
+        for number, path in segments(path):
+            self._segment = number + 1
+            for offset, seq, kind, payload in records(path):
+                if kind != EVENT:
+                    continue
+                size, = ID_LENGTH.unpack_from(payload)
+                persistence_id = payload[
+                    ID_LENGTH.size:ID_LENGTH.size + size
+                ].decode()
+                self._index.setdefault(persistence_id, deque()).append(
+                    (seq, path, offset)
+                )
+
+    async def write(self, persistence_id, seq, events):
+        """Append events, numbered from seq + 1 on, return once on disk"""
+        writer = self._writer
+        key = persistence_id.encode()
+        prefix = ID_LENGTH.pack(len(key)) + key
+        index = self._index.setdefault(persistence_id, deque())
+        for event in events:
+            seq += 1
+            if writer.rotating:
+                self._path = writer.open_segment(self._segment)
+                self._segment += 1
+            index.append((seq, self._path, writer.offset))
+            writer.append(encode(
+                seq,
+                EVENT,
+                prefix + pickle.dumps(event, protocol=pickle.HIGHEST_PROTOCOL)
+            ))
+        await writer.commit()
+
+    def read(self, persistence_id, after=0):
+        """Yield the (seq, event) pairs of persistence_id after seq after"""
+        positions = [
+            position for position in self._index.get(persistence_id, ())
+            if position[0] > after
+        ]
+        opened = {}
+        try:
+            for _, path, offset in positions:
+                data = opened.get(path)
+                if data is None:
+                    with open(path, "rb") as file:
+                        try:
+                            data = opened[path] = mmap.mmap(
+                                file.fileno(), 0, access=mmap.ACCESS_READ
+                            )
+                        except ValueError:
+                            ## empty, still being written
+                            return
+                record = read_at(data, offset)
+                if record is None:
+                    ## still being written or lost with a failed write
+                    return
+                seq, _, payload = record
+                size, = ID_LENGTH.unpack_from(payload)
+                yield seq, pickle.loads(payload[ID_LENGTH.size + size:])
+        finally:
+            for data in opened.values():
+                data.close()
+
+    def trim(self, persistence_id, seq):
+        """Forget the positions of the events up to seq"""
+        index = self._index.get(persistence_id)
+        while index and index[0][0] <= seq:
+            index.popleft()
+
+    async def close(self):
+        self._writer.close_segment()
+        await self._writer.commit()
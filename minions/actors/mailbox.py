@@ -0,0 +1,229 @@
+import asyncio
+import heapq
+from collections import deque
+from itertools import count
+
+
+class OverflowPolicy:
+    def __init__(self, identifier):
+        self.__ident__ = identifier
+
+    def __str__(self):
+        return self.__ident__
+
+
+## make send() wait for free space,
+## calling or telling a full actor raises MailboxFullError
+BLOCK = OverflowPolicy("BLOCK")
+## drop the new message
+DROP_NEW = OverflowPolicy("DROP_NEW")
+## drop the oldest queued message to make room
+DROP_OLD = OverflowPolicy("DROP_OLD")
+## raise MailboxFullError
+REJECT = OverflowPolicy("REJECT")
+
+
+class Sender:
+    def __init__(self, identifier):
+        self.__ident__ = identifier
+
+    def __str__(self):
+        return self.__ident__
+
+
+## sender of system messages
+SYSTEM = Sender("SYSTEM")
+
+
+def portable_sender(sender):
+    """Actors can't be pickled, they are sent by name"""
+    if sender is None or isinstance(sender, (str, int)):
+        return sender
+    return getattr(sender, "name", str(sender))
+
+
+class MailboxFullError(Exception):
+    __str__ = lambda x: "MailboxFullError"
+
+
+class MessageDroppedError(Exception):
+    __str__ = lambda x: "MessageDroppedError"
+
+
+class Mailbox(asyncio.Queue):
+    """
+    Actor inbox of (message, sender, result, trace) envelopes,
+    applies an OverflowPolicy once maxsize messages are queued.
+
+    System messages go to their own lane and are always taken first.
+    If priority is given, it is called with every user message and
+    user messages are taken lowest priority value first (heap),
+    otherwise in FIFO order (deque).
+    Listeners (see add_listener) are called with the mailbox whenever
+    the number of queued messages changed.
+    """
+    def __init__(self, maxsize=0, overflow=BLOCK, priority=None):
+        self._priority = priority
+        super().__init__(maxsize)
+        self.overflow = overflow
+        self.dropped = 0
+        self.rejected = 0
+
+    def _init(self, maxsize):
+        self._listeners = []
+        self._system = deque()
+        if self._priority is None:
+            self._queue = deque()
+        else:
+            self._queue = []
+            self._seq = count()
+
+    def _put(self, envelope):
+        if self._priority is None:
+            self._queue.append(envelope)
+        else:
+            heapq.heappush(
+                self._queue,
+                (self._priority(envelope[0]), next(self._seq), envelope)
+            )
+        if self._listeners:
+            self._notify()
+
+    def _get(self):
+        if self._system:
+            envelope = self._system.popleft()
+        elif self._priority is None:
+            envelope = self._queue.popleft()
+        else:
+            envelope = heapq.heappop(self._queue)[2]
+        if self._listeners:
+            self._notify()
+        return envelope
+
+    def add_listener(self, listener):
+        """Call listener(mailbox) whenever the queue length changed"""
+        self._listeners.append(listener)
+
+    def remove_listener(self, listener):
+        if listener in self._listeners:
+            self._listeners.remove(listener)
+
+    def _notify(self):
+        for listener in self._listeners:
+            listener(self)
+
+    def qsize(self):
+        return len(self._queue) + len(self._system)
+
+    def empty(self):
+        return not (self._queue or self._system)
+
+    def full(self):
+        """True if maxsize user messages are queued"""
+        return 0 < self._maxsize <= len(self._queue)
+
+    def get_nowait(self):
+        if self._system:
+            ## frees no space, so waiting senders are not woken
+            return self._get()
+        return super().get_nowait()
+
+    def post(self, envelope):
+        """Enqueue without waiting, apply the overflow policy if full"""
+        if not self.full():
+            self.put_nowait(envelope)
+        elif self.overflow is DROP_OLD:
+            self._drop(self._evict())
+            self.task_done()
+            self.put_nowait(envelope)
+        elif self.overflow is DROP_NEW:
+            self._drop(envelope)
+        else:
+            self.rejected += 1
+            raise MailboxFullError()
+
+    def post_system(self, message):
+        """Enqueue a system message, ignores maxsize"""
+        self._system.append((message, SYSTEM, None, None))
+        if self._listeners:
+            self._notify()
+        self._unfinished_tasks += 1
+        self._finished.clear()
+        self._wakeup_next(self._getters)
+
+    def restore(self, envelope):
+        """
+        Enqueue a user message that was accepted before,
+        ignores maxsize like post_system
+        """
+        self._put(envelope)
+        self._unfinished_tasks += 1
+        self._finished.clear()
+        self._wakeup_next(self._getters)
+
+    def requeue(self, envelope):
+        """Put a taken envelope back in front of its lane"""
+        if envelope[1] is not SYSTEM and self._priority is not None:
+            self._put(envelope)
+        else:
+            if envelope[1] is SYSTEM:
+                self._system.appendleft(envelope)
+            else:
+                self._queue.appendleft(envelope)
+            if self._listeners:
+                self._notify()
+        self._wakeup_next(self._getters)
+
+    @property
+    def signalled(self):
+        """True if a system message is waiting"""
+        return bool(self._system)
+
+    def cancel_pending(self):
+        """
+        Cancel the result futures of all queued user messages
+        and the put() calls waiting for free space
+        """
+        if self._priority is None:
+            envelopes = list(self._queue)
+        else:
+            envelopes = [item[2] for item in self._queue]
+        self._queue.clear()
+        if self._listeners:
+            self._notify()
+        for _, _, result, trace in envelopes:
+            if result is not None:
+                result.cancel()
+            if trace:
+                trace.finish(asyncio.CancelledError())
+            self.task_done()
+        ## senders waiting for space must not enqueue into a stopped actor
+        while self._putters:
+            self._putters.popleft().cancel()
+        return len(envelopes)
+
+    def _evict(self):
+        """
+        Remove the oldest user message,
+        with priorities the one that would be taken last
+        """
+        queue = self._queue
+        if self._priority is None:
+            envelope = queue.popleft()
+        else:
+            index = max(range(len(queue)), key=queue.__getitem__)
+            envelope = queue[index][2]
+            queue[index] = queue[-1]
+            queue.pop()
+            heapq.heapify(queue)
+        if self._listeners:
+            self._notify()
+        return envelope
+
+    def _drop(self, envelope):
+        self.dropped += 1
+        _, _, result, trace = envelope
+        if result is not None and not result.done():
+            result.set_exception(MessageDroppedError())
+        if trace:
+            trace.finish(MessageDroppedError())
@@ -0,0 +1,191 @@
+from bisect import bisect_left
+import weakref
+
+
+## upper bounds of the handler latency buckets in seconds
+LATENCY_BUCKETS = (
+    0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0
+)
+
+
+class Histogram:
+    """Fixed bucket histogram, buckets are cumulated on export only"""
+    __slots__ = ("bounds", "counts", "sum")
+
+    def __init__(self, bounds=LATENCY_BUCKETS):
+        self.bounds = tuple(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+
+
+class ActorMetrics:
+    """
+    Counters of one actor, updated in place by the actor itself.
+    Mailbox depth, dropped and rejected messages are read from the
+    mailbox on export.
+    """
+    __slots__ = (
+        "received",
+        "handled",
+        "timeouts",
+        "crashes",
+        "restarts",
+        "child_restarts",
+        "latency",
+        "sample",
+    )
+
+    def __init__(self, buckets=LATENCY_BUCKETS, sample=1):
+        self.received = 0
+        self.handled = 0
+        self.timeouts = 0
+        self.crashes = 0
+        self.restarts = 0
+        ## restarts this actor ordered as supervisor
+        self.child_restarts = 0
+        self.latency = Histogram(buckets)
+        ## time every sample-th handled message
+        self.sample = sample
+
+
+class MetricsRegistry:
+    """
+    Keeps weak references to the actors registered with it
+    and renders their metrics in the Prometheus text format.
+
+    Counters are exact, the handler latency histogram only times every
+    sample-th message, as reading the clock twice costs more than
+    handling a trivial message. Use sample=1 to time all of them.
+    Series are labelled by actor name and class, actors sharing both
+    are reported as one series with their values summed up.
+    """
+    def __init__(self, prefix="minions", buckets=LATENCY_BUCKETS, sample=8):
+        self.prefix = prefix
+        self.buckets = tuple(buckets)
+        self.sample = sample
+        self._actors = weakref.WeakSet()
+
+    def __len__(self):
+        return len(self._actors)
+
+    def register(self, actor):
+        """Add actor, return the ActorMetrics it has to update"""
+        self._actors.add(actor)
+        return ActorMetrics(self.buckets, self.sample)
+
+    def unregister(self, actor):
+        self._actors.discard(actor)
+
+    def collect(self):
+        """
+        Yield (name, type, help, samples) families, samples are
+        (labels, value) or (labels, value, name suffix) tuples
+        """
+        groups = {}
+        for actor in list(self._actors):
+            if actor.metrics is not None:
+                groups.setdefault(
+                    (actor.name, type(actor).__name__),
+                    []
+                ).append(actor)
+        keys = sorted(groups)
+        labels = {key: {"actor": key[0], "class": key[1]} for key in keys}
+
+        def total(value):
+            return [
+                (labels[key], sum(value(actor) for actor in groups[key]))
+                for key in keys
+            ]
+
+        counters = (
+            ("received", "messages_received_total",
+             "Messages posted to the mailbox"),
+            ("handled", "messages_handled_total",
+             "Messages handled"),
+            ("timeouts", "timeouts_total",
+             "Messages that exceeded actor_timeout"),
+            ("crashes", "crashes_total",
+             "Crashes of the actor"),
+            ("restarts", "restarts_total",
+             "Restarts of the actor"),
+            ("child_restarts", "supervisor_child_restarts_total",
+             "Children restarted by the supervisor"),
+        )
+        for attribute, name, text in counters:
+            yield name, "counter", text, total(
+                lambda actor: getattr(actor.metrics, attribute)
+            )
+        yield "mailbox_depth", "gauge", "Messages waiting in the mailbox", \
+            total(lambda actor: actor._inbox.qsize())
+        yield "mailbox_dropped_total", "counter", \
+            "Messages dropped by the overflow policy", \
+            total(lambda actor: actor._inbox.dropped)
+        yield "mailbox_rejected_total", "counter", \
+            "Messages rejected by a full mailbox", \
+            total(lambda actor: actor._inbox.rejected)
+        samples = []
+        for key in keys:
+            histograms = [actor.metrics.latency for actor in groups[key]]
+            cumulated = 0
+            for index, bound in enumerate(
+                histograms[0].bounds + (float("inf"),)
+            ):
+                cumulated += sum(
+                    histogram.counts[index] for histogram in histograms
+                )
+                samples.append((
+                    dict(labels[key], le=_format_bound(bound)),
+                    cumulated,
+                    "_bucket"
+                ))
+            samples.append((
+                labels[key],
+                sum(histogram.sum for histogram in histograms),
+                "_sum"
+            ))
+            samples.append((labels[key], cumulated, "_count"))
+        yield "handler_seconds", "histogram", \
+            "Time spent in handle_message or handle_batch (sampled)", \
+            samples
+
+    def render(self):
+        """Metrics in the Prometheus text exposition format (0.0.4)"""
+        lines = []
+        for name, kind, text, samples in self.collect():
+            name = f"{self.prefix}_{name}"
+            lines.append(f"# HELP {name} {text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for sample in samples:
+                labels, value = sample[0], sample[1]
+                suffix = sample[2] if len(sample) > 2 else ""
+                lines.append(
+                    f"{name}{suffix}{_format_labels(labels)} {value}"
+                )
+        return "\n".join(lines) + "\n"
+
+
+def _format_bound(bound):
+    return "+Inf" if bound == float("inf") else repr(bound)
+
+
+def _format_labels(labels):
+    pairs = ",".join(
+        f'{key}="{_escape(str(value))}"' for key, value in labels.items()
+    )
+    return f"{{{pairs}}}"
+
+
+def _escape(value):
+    return (
+        value.replace("\\", "\\\\")
+        .replace("\n", "\\n")
+        .replace('"', '\\"')
+    )
+
+
+## registry all actors report to, unless told otherwise
+REGISTRY = MetricsRegistry()
@@ -0,0 +1,98 @@
+import asyncio
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from minions.actors.actor import Actor
+
+
+_shared_executor = None
+
+
+def _get_shared_executor():
+    global _shared_executor
+    if _shared_executor is None:
+        _shared_executor = ProcessPoolExecutor()
+    return _shared_executor
+
+
+def _replace_shared_executor(broken):
+    """Drop the broken shared pool, only the first actor to notice does"""
+    global _shared_executor
+    if _shared_executor is broken:
+        _shared_executor = None
+        broken.shutdown(wait=False)
+
+
+def _run(cls, message, sender):
+    """Executed in the worker process"""
+    return cls.process(message, sender)
+
+
+class ProcessActor(Actor):
+    """
+    Runs process(message, sender) in a worker process,
+    so CPU bound work does not block the event loop.
+
+    process() has to be a staticmethod or classmethod of a class
+    defined at module level, it has no access to the actor instance.
+    Message and answer have to be picklable, a sender that is an
+    Actor is passed by its name. ProcessActors share one
+    ProcessPoolExecutor, unless max_workers is given, then the actor
+    gets a pool of its own. If a worker process dies, the actors
+    with a message in that pool crash and their parents handle it
+    like any other crash. A broken shared pool is replaced once, the
+    next messages of all actors go to the new one, a broken own pool
+    is replaced on the next start().
+    """
+    def __init__(self, *args, max_workers=None, **kwargs):
+        self._max_workers = max_workers
+        self._executor = None
+        super().__init__(*args, **kwargs)
+
+    @staticmethod
+    def process(message, sender):
+        """Override in your own ProcessActor subclass"""
+        raise NotImplementedError(
+            'Please subclass ProcessActor and implement process() method'
+        )
+
+    def start(self):
+        if self._max_workers and self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self._max_workers
+            )
+        super().start()
+
+    async def handle_message(self, message, sender):
+        if isinstance(sender, Actor):
+            sender = sender.name
+        if self._max_workers:
+            executor = self._executor
+            future = executor.submit(_run, type(self), message, sender)
+        else:
+            executor = _get_shared_executor()
+            try:
+                future = executor.submit(_run, type(self), message, sender)
+            except BrokenProcessPool:
+                ## broken by a message of another actor, this one never ran
+                _replace_shared_executor(executor)
+                executor = _get_shared_executor()
+                future = executor.submit(_run, type(self), message, sender)
+        try:
+            return await asyncio.wrap_future(future, loop=self._loop)
+        except BrokenProcessPool:
+            self._logger.error(
+                f"{self} lost its worker process while handling {message}"
+            )
+            if self._max_workers:
+                self._executor = None
+                executor.shutdown(wait=False)
+            else:
+                _replace_shared_executor(executor)
+            raise
+
+    async def _stop(self, drain=True):
+        await super()._stop(drain)
+        if self._max_workers and self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
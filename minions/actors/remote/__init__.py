@@ -0,0 +1,8 @@
+from minions.actors.remote.protocol import RemoteError, ActorNotFoundError
+from minions.actors.remote.protocol import AuthenticationError
+from minions.actors.remote.channel import Channel
+from minions.actors.remote.server import ActorServer
+from minions.actors.remote.ref import ActorRef
+from minions.actors.remote.sharding import Shards, ShardedSystem
+from minions.actors.remote.pool import ConnectionPool
+from minions.actors.remote.node import ActorNode
@@ -0,0 +1,173 @@
+import asyncio
+from itertools import count
+import logging
+
+from minions.actors.remote.protocol import REPLY, ERROR
+from minions.actors.remote.protocol import encode, read_frame
+
+
+class Channel:
+    """
+    Client side of one multiplexed connection.
+
+    Requests get a request id, their result future is resolved when
+    the reply frame with the same id comes back, so any number of
+    requests can be in flight. connect is an async callable returning
+    (reader, writer), it is called lazily on the first write and again
+    after the connection was lost. Frames written while connecting are
+    kept and flushed once connected. After a failed attempt the next
+    one waits retry_delay seconds, doubling up to max_retry_delay.
+    Listeners (see add_listener) are called with the channel when a
+    connection is lost or could not be opened.
+    """
+    def __init__(
+        self,
+        connect,
+        name="channel",
+        retry_delay=0.1,
+        max_retry_delay=5.0
+    ):
+        self._logger = logging.getLogger('top')
+        self.name = name
+        self._connect = connect
+        self._loop = asyncio.get_event_loop()
+        self._ids = count(1)
+        self._pending = {}
+        self._backlog = []
+        self._writer = None
+        self._connecting = None
+        self._reading = None
+        self._closed = False
+        self._retry_delay = retry_delay
+        self._max_retry_delay = max_retry_delay
+        self._delay = 0
+        self._listeners = []
+
+    def __str__(self):
+        return f"<{type(self).__name__} \"{self.name}\">"
+
+    @property
+    def connected(self):
+        return self._writer is not None
+
+    @property
+    def in_flight(self):
+        return len(self._pending)
+
+    def add_listener(self, listener):
+        """Call listener(channel) whenever the connection is lost"""
+        self._listeners.append(listener)
+
+    def remove_listener(self, listener):
+        if listener in self._listeners:
+            self._listeners.remove(listener)
+
+    def _lost(self):
+        for listener in list(self._listeners):
+            listener(self)
+
+    def request(self, kind, payload, result=None):
+        """Send a frame, return the future resolved by its reply"""
+        if result is None:
+            result = self._loop.create_future()
+        request_id = next(self._ids)
+        self._pending[request_id] = result
+        try:
+            self._write(encode(kind, request_id, payload))
+        except Exception:
+            del self._pending[request_id]
+            raise
+        return result
+
+    def send(self, kind, payload):
+        """Send a frame nobody waits a reply for"""
+        self._write(encode(kind, 0, payload))
+
+    async def connect(self):
+        """Wait until the channel is connected"""
+        if self._writer is None:
+            self._start_connecting()
+            await asyncio.shield(self._connecting)
+        if self._writer is None:
+            raise ConnectionError(f"{self} failed to connect")
+
+    async def close(self):
+        self._closed = True
+        for task in (self._connecting, self._reading):
+            if task is not None and not task.done():
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+        self._fail_pending(ConnectionError("Channel closed"))
+
+    def _write(self, frame):
+        if self._closed:
+            raise ConnectionError("Channel closed")
+        if self._writer is not None:
+            self._writer.write(frame)
+        else:
+            self._backlog.append(frame)
+            self._start_connecting()
+
+    def _start_connecting(self):
+        if self._connecting is None or self._connecting.done():
+            self._connecting = self._loop.create_task(self._open())
+
+    async def _open(self):
+        if self._delay:
+            await asyncio.sleep(self._delay)
+        try:
+            reader, writer = await self._connect()
+        except Exception as err:
+            self._logger.error(f"{self} failed to connect with {err}")
+            self._delay = min(
+                self._delay * 2 or self._retry_delay,
+                self._max_retry_delay
+            )
+            self._backlog.clear()
+            self._fail_pending(ConnectionError(str(err)))
+            self._lost()
+            return
+        self._delay = 0
+        self._writer = writer
+        if self._backlog:
+            writer.write(b"".join(self._backlog))
+            self._backlog.clear()
+        self._reading = self._loop.create_task(self._read(reader))
+
+    async def _read(self, reader):
+        try:
+            while True:
+                kind, request_id, payload = await read_frame(reader)
+                result = self._pending.pop(request_id, None)
+                if result is None or result.done():
+                    continue
+                if kind == REPLY:
+                    result.set_result(payload)
+                elif kind == ERROR:
+                    result.set_exception(payload)
+        except (asyncio.IncompleteReadError, ConnectionError) as err:
+            self._logger.debug(f"{self} lost its connection with {err}")
+        except Exception as err:
+            self._logger.error(
+                f"{self} closes its connection after a malformed frame "\
+                f"with {err!r}"
+            )
+        finally:
+            if self._writer is not None:
+                self._writer.close()
+                self._writer = None
+            self._fail_pending(ConnectionError("Connection lost"))
+            if not self._closed:
+                self._lost()
+
+    def _fail_pending(self, err):
+        pending, self._pending = self._pending, {}
+        for result in pending.values():
+            if not result.done():
+                result.set_exception(err)
@@ -0,0 +1,120 @@
+import asyncio
+import ipaddress
+import logging
+
+from minions.actors.source import Source
+from minions.actors.remote.protocol import STOP
+from minions.actors.remote.server import ActorServer
+
+
+class ActorNodeSession:
+    def __init__(self, actor, hostname, secret):
+        self._logger = logging.getLogger('top')
+        self._actor = actor
+        self._hostname = hostname
+        self._server = ActorServer(actor.registry, actor._control, secret)
+        self.listening = asyncio.Event()
+
+    def start(self):
+        self.listening.clear()
+        self._task = asyncio.create_task(self.serve())
+
+    async def serve(self):
+        try:
+            ## keeps the port picked for port 0 across restarts
+            server = await self._server.start_tcp(
+                self._hostname,
+                self._actor.port
+            )
+            self._actor.port = server.sockets[0].getsockname()[1]
+            self.listening.set()
+            await server.serve_forever()
+        except asyncio.CancelledError:
+            raise
+        except Exception as err:
+            self._logger.error(
+                f"ActorNodeSession-Server crashed, because {err}."
+            )
+            await asyncio.sleep(1)
+            await self._actor.stop()
+
+    async def stop(self):
+        await self._server.stop()
+        if not self._task.done():
+            try:
+                self._task.cancel()
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+
+def _is_loopback(hostname):
+    if hostname == "localhost":
+        return True
+    try:
+        return ipaddress.ip_address(hostname).is_loopback
+    except ValueError:
+        return False
+
+
+class ActorNode(Source):
+    """
+    Exposes actors to other hosts over TCP, reach them with
+    ConnectionPool(hostname, port).ref(name). Port 0 picks a free
+    port, it is set on the node once listening.
+
+    Trust model: messages are pickled, so a peer that may send frames
+    can run any code in this process. By default the node only
+    listens on loopback and trusts every local user. To listen on
+    any other address, pass a secret shared with the trusted peers
+    (ConnectionPool(..., secret=secret)): connections that don't
+    prove they know it are closed before their first frame is read.
+    The secret does not encrypt traffic, use a private network or a
+    tunnel between hosts.
+    """
+    def __init__(
+        self,
+        hostname: str = "127.0.0.1",
+        port: int = 0,
+        actors=(),
+        *args,
+        secret=None,
+        **kwargs
+    ):
+        if secret is None and not _is_loopback(hostname):
+            raise ValueError(
+                f"ActorNode needs a secret to listen on {hostname!r}"
+            )
+        self.registry = {}
+        self.port = port
+        for actor in actors:
+            self.expose(actor)
+        self._session = ActorNodeSession(
+            actor=self,
+            hostname=hostname,
+            secret=secret,
+        )
+        super().__init__(
+            *args,
+            **kwargs,
+            server=self._session
+        )
+
+    def expose(self, actor, name=None):
+        """Make actor reachable under name, defaults to its name"""
+        self.registry[name or actor.name] = actor
+
+    def conceal(self, name):
+        self.registry.pop(name, None)
+
+    async def _control(self, kind, payload):
+        if kind == STOP:
+            name, drain = payload
+            actor = self.registry.pop(name)
+            await actor.stop(drain=drain)
+            return name
+        raise ValueError(f"Unknown frame kind {kind}")
+
+    async def listening(self):
+        """Wait until the node accepts connections"""
+        await self._session.listening.wait()
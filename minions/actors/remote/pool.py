@@ -0,0 +1,91 @@
+import asyncio
+
+from minions.actors.remote.channel import Channel
+from minions.actors.remote.protocol import HANDSHAKE_TIMEOUT, greet
+from minions.actors.remote.ref import ActorRef
+
+
+class ConnectionPool:
+    """
+    size multiplexed TCP Channels to one ActorNode. Every request goes
+    to the channel with the fewest requests in flight, channels
+    reconnect on their own with exponential backoff. secret has to
+    match the one of the node, see ActorNode.
+
+        pool = ConnectionPool("10.0.0.2", 7000, secret=secret)
+        echo = pool.ref("echo")
+        await echo("hello", "me")
+    """
+    def __init__(
+        self,
+        hostname,
+        port,
+        size=2,
+        retry_delay=0.1,
+        max_retry_delay=5.0,
+        secret=None
+    ):
+        self._hostname = hostname
+        self._port = port
+        self._secret = secret
+        self._channels = [
+            Channel(
+                self._connect,
+                name=f"{hostname}:{port}",
+                retry_delay=retry_delay,
+                max_retry_delay=max_retry_delay
+            )
+            for _ in range(size)
+        ]
+
+    def __str__(self):
+        return f"<{type(self).__name__} {self._hostname}:{self._port}>"
+
+    def __len__(self):
+        return len(self._channels)
+
+    async def _connect(self):
+        reader, writer = await asyncio.open_connection(
+            self._hostname,
+            self._port
+        )
+        if self._secret is not None:
+            try:
+                await asyncio.wait_for(
+                    greet(reader, writer, self._secret),
+                    HANDSHAKE_TIMEOUT
+                )
+            except BaseException:
+                writer.close()
+                raise
+        return reader, writer
+
+    def ref(self, name):
+        """Return an ActorRef to the actor exposed as name"""
+        return ActorRef(name, self)
+
+    def channel(self):
+        return min(self._channels, key=lambda channel: channel.in_flight)
+
+    def add_listener(self, listener):
+        """Call listener(channel) whenever a channel lost its connection"""
+        for channel in self._channels:
+            channel.add_listener(listener)
+
+    def remove_listener(self, listener):
+        for channel in self._channels:
+            channel.remove_listener(listener)
+
+    def request(self, kind, payload, result=None):
+        return self.channel().request(kind, payload, result)
+
+    def send(self, kind, payload):
+        self.channel().send(kind, payload)
+
+    async def connect(self):
+        for channel in self._channels:
+            await channel.connect()
+
+    async def close(self):
+        for channel in self._channels:
+            await channel.close()
@@ -0,0 +1,102 @@
+import hashlib
+import hmac
+import os
+import pickle
+import struct
+
+
+## frame kinds
+CALL = 1
+TELL = 2
+REPLY = 3
+ERROR = 4
+SPAWN = 5
+STOP = 6
+SHUTDOWN = 7
+
+## payload length, kind, request id
+HEADER = struct.Struct("!IBQ")
+## random bytes each side has to sign with the shared secret
+CHALLENGE_SIZE = 32
+## seconds a peer gets to authenticate
+HANDSHAKE_TIMEOUT = 10
+
+
+class RemoteError(Exception):
+    """Stands in for a remote exception that could not be pickled"""
+
+
+class ActorNotFoundError(Exception):
+    """No actor with this name is registered at the remote end"""
+
+
+class AuthenticationError(Exception):
+    """The peer does not know the shared secret"""
+
+
+class MalformedFrameError(Exception):
+    """A frame whose payload could not be unpickled"""
+    def __init__(self, request_id, reason):
+        super().__init__(request_id, reason)
+        self.request_id = request_id
+
+    def __str__(self):
+        return f"Malformed frame {self.args[0]}: {self.args[1]}"
+
+
+def encode(kind, request_id, payload):
+    """Return one frame: HEADER followed by the pickled payload"""
+    body = pickle.dumps(payload, protocol=pickle.HIGHEST_PROTOCOL)
+    return HEADER.pack(len(body), kind, request_id) + body
+
+
+def encode_error(request_id, err):
+    try:
+        return encode(ERROR, request_id, err)
+    except Exception:
+        return encode(ERROR, request_id, RemoteError(repr(err)))
+
+
+async def read_frame(reader):
+    """Return (kind, request_id, payload) of the next frame"""
+    header = await reader.readexactly(HEADER.size)
+    length, kind, request_id = HEADER.unpack(header)
+    body = await reader.readexactly(length)
+    try:
+        return kind, request_id, pickle.loads(body)
+    except Exception as err:
+        raise MalformedFrameError(request_id, repr(err)) from err
+
+
+def _sign(secret, challenge):
+    if isinstance(secret, str):
+        secret = secret.encode()
+    return hmac.new(secret, challenge, hashlib.sha256).digest()
+
+
+async def _challenge(reader, writer, secret):
+    challenge = os.urandom(CHALLENGE_SIZE)
+    writer.write(challenge)
+    signature = await reader.readexactly(hashlib.sha256().digest_size)
+    if not hmac.compare_digest(signature, _sign(secret, challenge)):
+        raise AuthenticationError("Peer failed the challenge")
+
+
+async def _answer(reader, writer, secret):
+    challenge = await reader.readexactly(CHALLENGE_SIZE)
+    writer.write(_sign(secret, challenge))
+
+
+async def accept(reader, writer, secret):
+    """
+    Server side of the handshake, both sides prove they know secret
+    before the first frame is unpickled
+    """
+    await _challenge(reader, writer, secret)
+    await _answer(reader, writer, secret)
+
+
+async def greet(reader, writer, secret):
+    """Client side of the handshake, see accept"""
+    await _answer(reader, writer, secret)
+    await _challenge(reader, writer, secret)
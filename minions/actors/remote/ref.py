@@ -0,0 +1,122 @@
+import asyncio
+import weakref
+
+from minions.actors.actor import Actor
+from minions.actors import tracing
+from minions.actors.mailbox import portable_sender
+from minions.actors.remote.protocol import CALL, TELL, STOP
+
+
+class ActorRef:
+    """
+    Stands in for an actor served by an ActorServer at the other end
+    of a Channel. Supports the same calls as a local Actor:
+    await ref(message, sender), ref.tell(message, sender), and can be
+    registered as child of a Router or Supervisor. Messages and answers
+    have to be picklable, senders are passed by name.
+
+    A ref with a parent crashes when its channel loses the connection,
+    the parent handles it like a crashed child: restarting the ref
+    reconnects, if that fails it crashes again. stop() stops the
+    remote actor and unregisters the ref from its parent.
+    """
+    def __init__(self, name, channel):
+        self.name = name
+        self._channel = channel
+        self._loop = asyncio.get_event_loop()
+        self._parent = None
+        self.status = Actor.RUNNING
+
+    def __str__(self):
+        return f"<{type(self).__name__} \"{self.name}\">"
+
+    @property
+    def alive(self):
+        return self.status is Actor.RUNNING
+
+    def __call__(
+        self,
+        message,
+        sender
+    ):
+        if self.status is not Actor.RUNNING:
+            raise asyncio.CancelledError()
+        result = self._loop.create_future()
+        self._post(message, sender, result)
+        return result
+
+    def tell(
+        self,
+        message,
+        sender
+    ):
+        if self.status is not Actor.RUNNING:
+            raise asyncio.CancelledError()
+        self._post(message, sender, None)
+
+    async def send(
+        self,
+        message,
+        sender
+    ):
+        return self(message, sender)
+
+    def _post(self, message, sender, result):
+        payload = (
+            self.name,
+            message,
+            portable_sender(sender),
+            tracing.outgoing()
+        )
+        if result is None:
+            self._channel.send(TELL, payload)
+        else:
+            self._channel.request(CALL, payload, result)
+
+    async def _put(self, message, sender, result):
+        self._post(message, sender, result)
+
+    async def stop(self, drain=True):
+        """Stop the remote actor"""
+        if self.status is not Actor.STOPPED:
+            self.status = Actor.STOPPING
+            try:
+                await self._channel.request(STOP, (self.name, drain))
+            finally:
+                self.status = Actor.STOPPED
+                if self._parent is not None:
+                    self._parent.unregister_child(self)
+
+    def restart(self):
+        return self._loop.create_task(self._restart())
+
+    async def _restart(self):
+        """Reconnect a crashed ref, crash again if that fails"""
+        if self.status is not Actor.CRASHED:
+            return
+        try:
+            await self._channel.connect()
+        except ConnectionError:
+            if self._parent is not None:
+                await self._parent._handle_child(self, "crashed")
+            return
+        self.status = Actor.RUNNING
+        if self._parent is not None:
+            self._parent._child_started(self)
+
+    def _channel_lost(self, channel):
+        if self.status is not Actor.RUNNING:
+            return
+        self.status = Actor.CRASHED
+        if self._parent is not None:
+            self._loop.create_task(
+                self._parent._handle_child(self, "crashed")
+            )
+
+    def register_parent(self, parent):
+        self._parent = weakref.proxy(parent)
+        self._channel.add_listener(self._channel_lost)
+
+    def unregister_parent(self, parent):
+        self._parent = None
+        self._channel.remove_listener(self._channel_lost)
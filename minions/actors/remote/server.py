@@ -0,0 +1,157 @@
+import asyncio
+from functools import partial
+import logging
+
+from minions.actors import tracing
+from minions.actors.remote.protocol import CALL, TELL, REPLY
+from minions.actors.remote.protocol import HANDSHAKE_TIMEOUT
+from minions.actors.remote.protocol import ActorNotFoundError
+from minions.actors.remote.protocol import AuthenticationError
+from minions.actors.remote.protocol import MalformedFrameError
+from minions.actors.remote.protocol import accept
+from minions.actors.remote.protocol import encode, encode_error, read_frame
+
+
+class ActorServer:
+    """
+    Serves the actors of a registry (name -> actor) to Channels.
+
+    Every CALL frame is handed to the actor right away and answered
+    when its result future is done, so replies can overtake each
+    other. All other frame kinds are passed to control(kind, payload),
+    its return value is sent back as reply.
+
+    Frames are unpickled, so whoever can connect can run code in
+    this process. With a secret, peers have to pass an HMAC
+    challenge (see protocol.accept) before their first frame is read.
+    A frame that can't be decoded or dispatched is answered with an
+    error, if it has a request id, and closes its connection.
+    """
+    def __init__(self, registry, control=None, secret=None):
+        self._logger = logging.getLogger('top')
+        self._registry = registry
+        self._control = control
+        self._secret = secret
+        self._server = None
+        self._connections = {}
+
+    async def start_unix(self, path):
+        self._server = await asyncio.start_unix_server(
+            self.handle_connection,
+            path=path
+        )
+        return self._server
+
+    async def start_tcp(self, host, port):
+        self._server = await asyncio.start_server(
+            self.handle_connection,
+            host=host,
+            port=port
+        )
+        return self._server
+
+    async def stop(self):
+        if self._server is not None:
+            self._server.close()
+            for writer in self._connections.values():
+                writer.close()
+            await asyncio.gather(
+                *self._connections,
+                return_exceptions=True
+            )
+            await self._server.wait_closed()
+            self._server = None
+
+    async def handle_connection(self, reader, writer):
+        task = asyncio.current_task()
+        self._connections[task] = writer
+        request_id = 0
+        try:
+            if self._secret is not None:
+                await asyncio.wait_for(
+                    accept(reader, writer, self._secret),
+                    HANDSHAKE_TIMEOUT
+                )
+            while True:
+                request_id = 0
+                kind, request_id, payload = await read_frame(reader)
+                if kind == CALL:
+                    self._call(writer, request_id, *payload)
+                elif kind == TELL:
+                    self._tell(*payload)
+                else:
+                    await self._handle_control(
+                        writer,
+                        request_id,
+                        kind,
+                        payload
+                    )
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        except (AuthenticationError, asyncio.TimeoutError) as err:
+            self._logger.warning(
+                f"{self} refused {writer.get_extra_info('peername')}, "\
+                f"it failed to authenticate with {err!r}"
+            )
+        except Exception as err:
+            if isinstance(err, MalformedFrameError):
+                request_id = err.request_id
+            self._logger.error(
+                f"{self} closes a connection after a malformed frame "\
+                f"{request_id} with {err!r}"
+            )
+            if request_id:
+                writer.write(encode_error(request_id, err))
+        finally:
+            del self._connections[task]
+            writer.close()
+
+    def _call(
+        self, writer, request_id, name, message, sender, trace=None
+    ):
+        try:
+            with tracing.incoming(trace):
+                result = self._registry[name](message, sender)
+        except KeyError:
+            writer.write(
+                encode_error(request_id, ActorNotFoundError(name))
+            )
+        except BaseException as err:
+            writer.write(encode_error(request_id, err))
+        else:
+            result.add_done_callback(
+                partial(self._reply, writer, request_id)
+            )
+
+    def _tell(self, name, message, sender, trace=None):
+        try:
+            with tracing.incoming(trace):
+                self._registry[name].tell(message, sender)
+        except BaseException as err:
+            self._logger.error(
+                f"{self} failed to tell {name} {message} with {err!r}"
+            )
+
+    def _reply(self, writer, request_id, result):
+        if writer.is_closing():
+            return
+        if result.cancelled():
+            frame = encode_error(request_id, asyncio.CancelledError())
+        elif result.exception() is not None:
+            frame = encode_error(request_id, result.exception())
+        else:
+            try:
+                frame = encode(REPLY, request_id, result.result())
+            except Exception as err:
+                frame = encode_error(request_id, err)
+        writer.write(frame)
+
+    async def _handle_control(self, writer, request_id, kind, payload):
+        try:
+            if self._control is None:
+                raise ValueError(f"Unknown frame kind {kind}")
+            answer = await self._control(kind, payload)
+        except Exception as err:
+            writer.write(encode_error(request_id, err))
+        else:
+            writer.write(encode(REPLY, request_id, answer))
@@ -0,0 +1,233 @@
+import asyncio
+import inspect
+import logging
+import multiprocessing
+import os
+import shutil
+import tempfile
+import zlib
+from contextlib import suppress
+
+from minions.actors.supervisor import Gru
+from minions.actors.remote.channel import Channel
+from minions.actors.remote.protocol import SPAWN, STOP, SHUTDOWN
+from minions.actors.remote.ref import ActorRef
+from minions.actors.remote.server import ActorServer
+
+
+class Shards:
+    """
+    Location transparent access to the actors of all shards.
+
+    ref() returns the actor itself if it lives on the local shard,
+    otherwise an ActorRef talking to the owning shard over its
+    Unix socket. Unless a shard is given, an actor name is placed
+    on shard crc32(name) % number of shards.
+    """
+    def __init__(self, paths, local=None, registry=None, root=None):
+        self._paths = paths
+        self._local = local
+        self._registry = registry if registry is not None else {}
+        self._root = root
+        self._channels = {}
+
+    def __len__(self):
+        return len(self._paths)
+
+    @property
+    def local(self):
+        """Index of the shard of this process, None in the parent"""
+        return self._local
+
+    def expose(self, actor, name=None):
+        """
+        Make an actor running on the local shard reachable under name,
+        defaults to its name
+        """
+        if self._local is None:
+            raise ValueError("Only shards can expose actors")
+        name = name or actor.name
+        if name in self._registry:
+            raise ValueError(f"An actor named {name} already exists")
+        self._registry[name] = actor
+        return actor
+
+    def shard_of(self, name):
+        return zlib.crc32(name.encode()) % len(self._paths)
+
+    def ref(self, name, shard=None):
+        if shard is None:
+            shard = self.shard_of(name)
+        if shard == self._local:
+            return self._registry[name]
+        return ActorRef(name, self.channel(shard))
+
+    async def spawn(self, factory, name, shard=None):
+        """
+        Start factory(name=name) on a shard and return a reference,
+        factory is usually a prepared Actor, see Actor.prepare
+        """
+        if shard is None:
+            shard = self.shard_of(name)
+        if shard == self._local:
+            spawn_local(self._root, self._registry, factory, name)
+        else:
+            await self.channel(shard).request(SPAWN, (factory, name))
+        return self.ref(name, shard)
+
+    def channel(self, shard):
+        try:
+            return self._channels[shard]
+        except KeyError:
+            path = self._paths[shard]
+            channel = self._channels[shard] = Channel(
+                lambda: asyncio.open_unix_connection(path),
+                name=f"shard-{shard}"
+            )
+            return channel
+
+    async def close(self):
+        for channel in self._channels.values():
+            await channel.close()
+        self._channels.clear()
+
+
+def spawn_local(root, registry, factory, name):
+    if name in registry:
+        raise ValueError(f"An actor named {name} already exists")
+    actor = factory(name=name)
+    registry[name] = actor
+    root.register_child(actor)
+    return actor
+
+
+def _run_shard(index, paths, setup):
+    asyncio.run(_serve_shard(index, paths, setup))
+
+
+async def _serve_shard(index, paths, setup):
+    root = Gru(name=f"shard-{index}")
+    registry = {}
+    shards = Shards(paths, index, registry, root)
+
+    async def control(kind, payload):
+        if kind == SPAWN:
+            factory, name = payload
+            spawn_local(root, registry, factory, name)
+            return name
+        if kind == STOP:
+            name, drain = payload
+            actor = registry.pop(name)
+            root.unregister_child(actor)
+            await actor.stop(drain=drain)
+            return name
+        if kind == SHUTDOWN:
+            root._loop.create_task(root.stop())
+            return index
+        raise ValueError(f"Unknown frame kind {kind}")
+
+    server = ActorServer(registry, control)
+    if setup is not None:
+        answer = setup(root, shards)
+        if inspect.isawaitable(answer):
+            await answer
+    await server.start_unix(paths[index])
+    try:
+        await root._root_idle.wait()
+    finally:
+        await server.stop()
+        await shards.close()
+
+
+class ShardedSystem:
+    """
+    Runs one event loop with its own Gru per worker process (shard)
+    and gives location transparent access to their actors.
+
+    setup(root, shards) is called in every shard before it accepts
+    messages, it has to be importable (module level) and may be async.
+    Shards talk to each other and to the parent over Unix sockets.
+
+        async with ShardedSystem(shards=4) as system:
+            ref = await system.spawn(EchoActor.prepare(), "echo-1")
+            await ref("hello", "me")
+    """
+    def __init__(
+        self,
+        shards=None,
+        setup=None,
+        directory=None,
+        start_timeout=10
+    ):
+        self._logger = logging.getLogger('top')
+        self._count = shards or os.cpu_count()
+        self._setup = setup
+        self._own_directory = directory is None
+        self._directory = directory or tempfile.mkdtemp(prefix="minions-")
+        self._paths = [
+            os.path.join(self._directory, f"shard-{index}.sock")
+            for index in range(self._count)
+        ]
+        self._start_timeout = start_timeout
+        self._processes = []
+        self.shards = Shards(self._paths)
+
+    def __len__(self):
+        return self._count
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.stop()
+
+    def ref(self, name, shard=None):
+        return self.shards.ref(name, shard)
+
+    async def spawn(self, factory, name, shard=None):
+        return await self.shards.spawn(factory, name, shard)
+
+    async def start(self):
+        context = multiprocessing.get_context("spawn")
+        for index in range(self._count):
+            process = context.Process(
+                target=_run_shard,
+                args=(index, self._paths, self._setup),
+                name=f"minions-shard-{index}",
+                daemon=True,
+            )
+            process.start()
+            self._processes.append(process)
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self._start_timeout
+        for index, process in enumerate(self._processes):
+            channel = self.shards.channel(index)
+            while True:
+                ## the socket file shows up before the shard listens
+                if os.path.exists(self._paths[index]):
+                    with suppress(ConnectionError):
+                        await channel.connect()
+                        break
+                if not process.is_alive() or loop.time() > deadline:
+                    await self.stop()
+                    raise RuntimeError(f"Shard {index} failed to start")
+                await asyncio.sleep(0.01)
+        self._logger.info(f"{self} started {self._count} shards")
+
+    async def stop(self):
+        for index, process in enumerate(self._processes):
+            if process.is_alive():
+                try:
+                    await self.shards.channel(index).request(SHUTDOWN, None)
+                except ConnectionError:
+                    pass
+        await self.shards.close()
+        loop = asyncio.get_running_loop()
+        for process in self._processes:
+            await loop.run_in_executor(None, process.join, 5)
+            if process.is_alive():
+                process.terminate()
+        self._processes.clear()
+        if self._own_directory:
+            shutil.rmtree(self._directory, ignore_errors=True)
@@ -1,41 +1,237 @@
 import asyncio
+import random
 
 from minions.actors.actor import Actor
+from minions.actors.mailbox import MailboxFullError
 from minions.actors.supervisor import Supervisor
 
 
+class QuorumNotReachedError(Exception):
+    __str__ = lambda x: "QuorumNotReachedError"
+
+
+class NoHealthyChildError(Exception):
+    """The router has no healthy child to route the message to"""
+
+
 class Router(Supervisor):
+    """
+    Hands every message to one of its children, picked by _route().
+
+    Routers keep the healthy (alive) children in _healthy, which
+    _route() picks from. Children leave it when they crash, stop or
+    get unregistered and come back when they (re)start, so routing
+    costs O(1) no matter how many children there are.
+    broadcast() and scatter() address several children at once.
+    """
+    def __init__(self, *args, **kwargs):
+        self._healthy = []
+        self._healthy_index = {}
+        super().__init__(*args, **kwargs)
+
     def __call__(
         self, 
         message, 
         sender
     ):
+        target = self._select_target(message, sender)
+        result = target._loop.create_future()
+        target._post(message, sender, result)
+        return result
+
+    def tell(
+        self,
+        message,
+        sender
+    ):
+        """Fire and forget, route message without a result future"""
+        target = self._select_target(message, sender)
+        target._post(message, sender, None)
+
+    async def send(
+        self,
+        message,
+        sender
+    ):
+        """
+        Route message like __call__, but wait for free space
+        in the mailbox of the target (see Actor.send)
+        """
+        target = self._select_target(message, sender)
+        result = target._loop.create_future()
+        await target._put(message, sender, result)
+        return result
+
+    def broadcast(
+        self,
+        message,
+        sender
+    ):
+        """
+        Tell message to every healthy child,
+        return the number of children it was delivered to
+        """
+        if self.status is not Actor.RUNNING or self._worker.done():
+            raise asyncio.CancelledError()
+        delivered = 0
+        for child in list(self._healthy):
+            if not child.alive:
+                continue
+            try:
+                child._post(message, sender, None)
+            except MailboxFullError:
+                self._logger.debug(
+                    f"{self} could not broadcast {message} to {child}, "\
+                    f"its mailbox is full"
+                )
+                continue
+            delivered += 1
+        return delivered
+
+    async def scatter(
+        self,
+        message,
+        sender,
+        k=None,
+        first=None,
+        quorum=None,
+        timeout=None,
+        return_exceptions=False
+    ):
+        """
+        Send message to k healthy children (all if k is None) and
+        yield (child, answer) pairs in the order the answers arrive.
+
+        Iteration ends after first answers, once quorum answers
+        arrived, after timeout seconds or once all children answered,
+        unanswered messages get cancelled - also if the consumer stops
+        iterating early, once the iterator is closed or collected.
+        Failed children are skipped, unless return_exceptions is set,
+        then (child, exception) is yielded. If fewer than quorum
+        answers arrived, or too many children failed to still reach
+        it, QuorumNotReachedError is raised.
+        Hedged request: scatter(message, sender, k=2, first=1)
+        """
         if self.status is not Actor.RUNNING or self._worker.done():
             raise asyncio.CancelledError()
-        if any(
-            ch.status is not Actor.RUNNING 
-            or ch._worker.done() for ch in self._children
-        ):
+        arrivals = asyncio.Queue()
+        pending = {}
+        for child in self._scatter_targets(message, sender, k):
+            result = self._loop.create_future()
+            try:
+                child._post(message, sender, result)
+            except MailboxFullError as err:
+                result.set_exception(err)
+            pending[result] = child
+            result.add_done_callback(arrivals.put_nowait)
+        timer = (
+            self._loop.call_later(timeout, arrivals.put_nowait, None)
+            if timeout is not None else None
+        )
+        wanted = [n for n in (first, quorum) if n is not None]
+        enough = min(wanted) if wanted else None
+        answered = 0
+        try:
+            while pending and (enough is None or answered < enough):
+                result = await arrivals.get()
+                if result is None:
+                    self._logger.debug(
+                        f"{self} stopped waiting for {len(pending)} "\
+                        f"answers to {message}"
+                    )
+                    break
+                child = pending.pop(result)
+                if result.cancelled():
+                    error = asyncio.CancelledError()
+                else:
+                    error = result.exception()
+                if error is None:
+                    answered += 1
+                    yield child, result.result()
+                elif return_exceptions:
+                    yield child, error
+                if quorum is not None and answered + len(pending) < quorum:
+                    break
+        finally:
+            if timer is not None:
+                timer.cancel()
+            for result in pending:
+                result.cancel()
+        if quorum is not None and answered < quorum:
+            raise QuorumNotReachedError()
+
+    def _scatter_targets(self, message, sender, k):
+        """Pick k healthy children, override for smarter choices"""
+        healthy = [child for child in self._healthy if child.alive]
+        if k is None or k >= len(healthy):
+            return healthy
+        return random.sample(healthy, k)
+
+    def _select_target(self, message, sender):
+        if self.status is not Actor.RUNNING or self._worker.done():
             raise asyncio.CancelledError()
-        self._logger.debug(
-            f"{self} received message {message} for routing"
-        )        
+        if self.metrics is not None:
+            self.metrics.received += 1
+        if self._debug:
+            self._logger.debug(
+                "%s received message %s for routing", self, message
+            )
         try:
             target = self._route(message,sender)
-        except Exception as err:
+            ## route around children that died since they were added
+            attempts = len(self._children)
+            while not target.alive:
+                self._remove_target(target)
+                attempts -= 1
+                if attempts < 0:
+                    raise asyncio.CancelledError()
+                target = self._route(message,sender)
+        except BaseException as err:
             self._logger.debug(
                 f"{self} has failed to route {message} "\
-                f"with {err}"
+                f"with {err!r}"
             )
             raise
-        self._logger.debug(
-            f"{self} is handing the message {message} "\
-            f"from {sender} to {target}."
-        )
-        result = target._loop.create_future()
-        target._inbox.put_nowait((message, sender, result))
-        return result
+        if self._debug:
+            self._logger.debug(
+                "%s is handing the message %s from %s to %s.",
+                self, message, sender, target
+            )
+        return target
     
     def _route(self, message, sender):
         """Override in your own Router subclass"""
         raise NotImplementedError
+
+    def _add_target(self, child):
+        """Mark child as healthy, extend in subclasses with an index"""
+        if child not in self._healthy_index:
+            self._healthy_index[child] = len(self._healthy)
+            self._healthy.append(child)
+
+    def _remove_target(self, child):
+        """Mark child as unhealthy, extend in subclasses with an index"""
+        position = self._healthy_index.pop(child, None)
+        if position is None:
+            return
+        last = self._healthy.pop()
+        if last is not child:
+            self._healthy[position] = last
+            self._healthy_index[last] = position
+
+    def register_child(self, child):
+        child = super().register_child(child)
+        if child.alive:
+            self._add_target(child)
+        return child
+
+    def unregister_child(self, child):
+        self._remove_target(child)
+        super().unregister_child(child)
+
+    def _child_started(self, child):
+        self._add_target(child)
+
+    async def _handle_child(self, child, state):
+        self._remove_target(child)
+        await super()._handle_child(child, state)
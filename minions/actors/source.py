@@ -1,21 +1,53 @@
 from minions.actors.actor import Actor
+from minions.actors.stream import Outlet, Stream
 
 
 class SourceDoesntAcceptMessagesError(Exception):
     __str__ = lambda x: "SourceDoesntAcceptMessagesError"
 
 
+class SourceHasNoStreamError(Exception):
+    __str__ = lambda x: "SourceHasNoStreamError"
+
+
 class Source(Actor):
     def __init__(self, server, *args, **kwargs):
         self._server = server
+        self._outlet = None
         super().__init__(*args, **kwargs)
         
+    @property
+    def alive(self):
+        return self.status is Actor.RUNNING
+
     def __call__(
         self, 
         message, 
         sender=None
     ):
-        raise SourceDoesntAcceptMessagesError        
+        raise SourceDoesntAcceptMessagesError
+
+    def tell(
+        self,
+        message,
+        sender=None
+    ):
+        raise SourceDoesntAcceptMessagesError
+
+    def stream(self, buffer=16):
+        """
+        Stream of the items the server push()es, it ends when the
+        source stops. Once buffer items wait for the stream, push()
+        waits too, so the server slows down to the pace of the stream.
+        """
+        self._outlet = Outlet(buffer)
+        return Stream(self._outlet)
+
+    async def push(self, item):
+        """Called by the server, hands item to the stream"""
+        if self._outlet is None:
+            raise SourceHasNoStreamError()
+        await self._outlet.push(item)
 
     def start(self):
         self._server.start()
@@ -24,13 +56,15 @@ class Source(Actor):
             f"{self} has resumed operation."
         )
     
-    async def stop(self):
+    async def stop(self, drain=True):
         if self.status is not Actor.STOPPED:
             self._logger.debug(
                 f"{self} received order to stop."
             )
             self.status = Actor.STOPPING
             await self._server.stop()
+            if self._outlet is not None:
+                self._outlet.close()
             self.status = Actor.STOPPED
             try:
                 await self.on_stop()
@@ -40,7 +74,7 @@ class Source(Actor):
                     f"{self} crashed while executing on_stop() with:"\
                     f"\n{err}"
                 )
-            if hasattr(self, "_parent") and self._parent:
+            if getattr(self, "_parent", None) is not None:
                 await self._parent._handle_child(
                     self,
                     "crashed"
@@ -0,0 +1,90 @@
+import pickle
+import re
+import sqlite3
+
+
+## table names are put into the SQL as they are
+_IDENTIFIER = re.compile(r"[A-Za-z_][A-Za-z0-9_]*")
+
+
+class InMemoryStore:
+    """
+    Keeps saved states in a dict, they outlive the actor
+    but not the process
+    """
+    def __init__(self):
+        self._states = {}
+
+    def __len__(self):
+        return len(self._states)
+
+    def load(self, key):
+        """Saved state of key, None if there is none"""
+        return self._states.get(key)
+
+    def save(self, key, state):
+        self._states[key] = state
+
+    def delete(self, key):
+        self._states.pop(key, None)
+
+
+class SQLiteStore:
+    """
+    Keeps saved states serialized by dumps (pickle by default) in
+    table of the SQLite database at path, keys have to be str, int
+    or bytes. Every call blocks the loop until the query is done,
+    fine for states of a few KB on a local disk. table has to be a
+    plain identifier (letters, digits and underscores).
+    """
+    def __init__(
+        self,
+        path,
+        table="states",
+        dumps=pickle.dumps,
+        loads=pickle.loads
+    ):
+        if not _IDENTIFIER.fullmatch(table):
+            raise ValueError(f"{table!r} is not a valid table name")
+        self._db = sqlite3.connect(path)
+        self._table = table
+        self._dumps = dumps
+        self._loads = loads
+        if path != ":memory:":
+            self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            f"CREATE TABLE IF NOT EXISTS {table} "\
+            f"(id PRIMARY KEY, state BLOB NOT NULL)"
+        )
+        self._db.commit()
+
+    def __len__(self):
+        return self._db.execute(
+            f"SELECT COUNT(*) FROM {self._table}"
+        ).fetchone()[0]
+
+    def load(self, key):
+        """Saved state of key, None if there is none"""
+        row = self._db.execute(
+            f"SELECT state FROM {self._table} WHERE id = ?",
+            (key,)
+        ).fetchone()
+        return self._loads(row[0]) if row is not None else None
+
+    def save(self, key, state):
+        with self._db:
+            self._db.execute(
+                f"INSERT OR REPLACE INTO {self._table} (id, state) "\
+                f"VALUES (?, ?)",
+                (key, self._dumps(state))
+            )
+
+    def delete(self, key):
+        with self._db:
+            self._db.execute(
+                f"DELETE FROM {self._table} WHERE id = ?",
+                (key,)
+            )
+
+    def close(self):
+        self._db.close()
@@ -0,0 +1,335 @@
+import asyncio
+from collections import deque
+import inspect
+
+
+class StreamClosedError(Exception):
+    __str__ = lambda x: "StreamClosedError"
+
+
+class _End:
+    def __str__(self):
+        return "END"
+
+
+## marks the end of a buffered stream
+END = _End()
+## a timed pull got no item
+_NOTHING = object()
+
+
+def _caller(target, sender):
+    """item -> awaitable, for actors, routers and (async) functions"""
+    if hasattr(target, "tell"):
+        async def ask(item):
+            ## waits for free space in a bounded mailbox
+            result = await target.send(item, sender)
+            return await result
+        return ask
+    if inspect.iscoroutinefunction(target):
+        return target
+
+    async def call(item):
+        return target(item)
+    return call
+
+
+async def _iterate(iterable):
+    for item in iterable:
+        yield item
+
+
+class _Pull:
+    """
+    Pulls the next item of an async iterator in a task of its own,
+    so waiting for it can time out without losing the item
+    """
+    def __init__(self, source):
+        self._iterator = source.__aiter__()
+        self._next = None
+
+    async def __call__(self, timeout=None):
+        """Next item, _NOTHING after timeout seconds"""
+        if self._next is None:
+            self._next = asyncio.ensure_future(self._iterator.__anext__())
+        done, _ = await asyncio.wait((self._next,), timeout=timeout)
+        if not done:
+            return _NOTHING
+        pulled, self._next = self._next, None
+        return pulled.result()
+
+    def cancel(self):
+        if self._next is not None:
+            self._next.cancel()
+            self._next = None
+
+
+class Outlet:
+    """
+    Bounded buffer between a Source and its Stream, push() waits
+    while size items are not pulled yet
+    """
+    def __init__(self, size=16):
+        self._queue = asyncio.Queue(size)
+        self._closed = False
+
+    async def push(self, item):
+        if self._closed:
+            raise StreamClosedError()
+        await self._queue.put(item)
+
+    def close(self):
+        """End the stream once the buffered items are pulled"""
+        self._closed = True
+        if not self._queue.full():
+            self._queue.put_nowait(END)
+
+    async def __aiter__(self):
+        queue = self._queue
+        while not (self._closed and queue.empty()):
+            item = await queue.get()
+            if item is END:
+                return
+            yield item
+
+
+class Stream:
+    """
+    Pipeline of stages over an (async) iterable, nothing runs until
+    the stream is consumed: async for, to_list(), foreach(), to(),
+    run(). Every stage pulls from the one before it only when it
+    needs the next item, so a slow consumer slows the whole pipeline
+    down up to the Source (demand flows upstream). Stages that run
+    ahead - buffer(), map_async() - hold a bounded number of items.
+
+        await Stream(source.stream()) \\
+            .map_async(router, parallelism=8) \\
+            .batch(100, timeout=0.5) \\
+            .to(sink)
+    """
+    def __init__(self, iterable):
+        self._iterable = iterable
+
+    def __aiter__(self):
+        if hasattr(self._iterable, "__aiter__"):
+            return self._iterable.__aiter__()
+        return _iterate(self._iterable)
+
+    def _then(self, stage, *args):
+        return Stream(stage(self, *args))
+
+    def map(self, func):
+        """func(item), synchronous"""
+        return self._then(_map, func)
+
+    def filter(self, predicate):
+        return self._then(_filter, predicate)
+
+    def map_async(self, target, parallelism=1, ordered=True, sender=None):
+        """
+        Hand every item to target - an actor, router or coroutine
+        function - with up to parallelism items in flight, across the
+        children of a router. Results come in upstream order, or in
+        the order they complete if ordered is False. Items are sent
+        to actors and routers (see Actor.send), a bounded mailbox
+        slows the stream. A failed item fails the stream.
+        """
+        if parallelism < 1:
+            raise ValueError("parallelism has to be at least 1")
+        return self._then(
+            _map_async,
+            _caller(target, sender),
+            parallelism,
+            ordered
+        )
+
+    def via(self, target, sender=None):
+        """map_async() through one actor, one item at a time"""
+        return self.map_async(target, sender=sender)
+
+    def buffer(self, size):
+        """Pull up to size items ahead of the consumer, in a task"""
+        if size < 1:
+            raise ValueError("size has to be at least 1")
+        return self._then(_buffer, size)
+
+    def batch(self, size, timeout=None):
+        """
+        Lists of up to size items, with timeout a list is emitted
+        at most timeout seconds after its first item arrived
+        """
+        if size < 1:
+            raise ValueError("size has to be at least 1")
+        return self._then(_batch, size, timeout)
+
+    def window(self, seconds):
+        """Lists of the items that arrived within each seconds window"""
+        return self._then(_window, seconds)
+
+    async def to_list(self):
+        return [item async for item in self]
+
+    async def foreach(self, func):
+        """Call func(item) - or await it - for every item"""
+        asynchronous = inspect.iscoroutinefunction(func)
+        async for item in self:
+            if asynchronous:
+                await func(item)
+            else:
+                func(item)
+
+    async def to(self, target, sender=None):
+        """
+        Tell every item to target, waiting for free space in its
+        mailbox (see Actor.send), a bounded mailbox slows the stream
+        """
+        async for item in self:
+            await target.send(item, sender)
+
+    async def run(self):
+        """Consume the stream, discarding the items"""
+        async for _ in self:
+            pass
+
+
+async def _map(source, func):
+    async for item in source:
+        yield func(item)
+
+
+async def _filter(source, predicate):
+    async for item in source:
+        if predicate(item):
+            yield item
+
+
+async def _map_async(source, call, parallelism, ordered):
+    iterator = source.__aiter__()
+    pending = deque()
+    pulling = None
+    exhausted = False
+    try:
+        while True:
+            if pulling is None and not exhausted \
+            and len(pending) < parallelism:
+                pulling = asyncio.ensure_future(iterator.__anext__())
+            waiting = list(pending) if not ordered or not pending \
+                else [pending[0]]
+            if pulling is not None:
+                waiting.append(pulling)
+            if not waiting:
+                return
+            await asyncio.wait(waiting, return_when=asyncio.FIRST_COMPLETED)
+            if pulling is not None and pulling.done():
+                try:
+                    item = pulling.result()
+                except StopAsyncIteration:
+                    exhausted = True
+                else:
+                    pending.append(asyncio.ensure_future(call(item)))
+                pulling = None
+            if ordered:
+                while pending and pending[0].done():
+                    yield pending.popleft().result()
+            else:
+                for result in [result for result in pending if result.done()]:
+                    pending.remove(result)
+                    yield result.result()
+    finally:
+        if pulling is not None:
+            pulling.cancel()
+        for result in pending:
+            result.cancel()
+
+
+async def _buffer(source, size):
+    queue = asyncio.Queue(size)
+
+    async def pump():
+        try:
+            async for item in source:
+                await queue.put((item, None))
+        except Exception as err:
+            await queue.put((END, err))
+        else:
+            await queue.put((END, None))
+
+    pumping = asyncio.ensure_future(pump())
+    try:
+        while True:
+            item, error = await queue.get()
+            if error is not None:
+                raise error
+            if item is END:
+                return
+            yield item
+    finally:
+        pumping.cancel()
+
+
+async def _batch(source, size, timeout):
+    if timeout is None:
+        batch = []
+        async for item in source:
+            batch.append(item)
+            if len(batch) == size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+        return
+    loop = asyncio.get_running_loop()
+    pull = _Pull(source)
+    batch = []
+    deadline = None
+    try:
+        while True:
+            remaining = (
+                deadline - loop.time() if deadline is not None else None
+            )
+            if remaining is not None and remaining <= 0:
+                item = _NOTHING
+            else:
+                try:
+                    item = await pull(remaining)
+                except StopAsyncIteration:
+                    break
+            if item is not _NOTHING:
+                if not batch:
+                    deadline = loop.time() + timeout
+                batch.append(item)
+            if batch and (item is _NOTHING or len(batch) == size):
+                yield batch
+                batch = []
+                deadline = None
+        if batch:
+            yield batch
+    finally:
+        pull.cancel()
+
+
+async def _window(source, seconds):
+    loop = asyncio.get_running_loop()
+    pull = _Pull(source)
+    window = []
+    closes = loop.time() + seconds
+    try:
+        while True:
+            remaining = closes - loop.time()
+            if remaining > 0:
+                try:
+                    item = await pull(remaining)
+                except StopAsyncIteration:
+                    break
+                if item is not _NOTHING:
+                    window.append(item)
+                    continue
+            if window:
+                yield window
+                window = []
+            while closes <= loop.time():
+                closes += seconds
+        if window:
+            yield window
+    finally:
+        pull.cancel()
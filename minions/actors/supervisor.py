@@ -1,8 +1,11 @@
+from collections import deque
 from functools import partial
+import random
 import signal
 import asyncio
 
-from minions.actors.actor import Actor
+from minions.actors.actor import Actor, SUSPEND
+from minions.actors.watchdog import LoopWatchdog, LoopProfiler
 
 
 class ExitPolicy:
@@ -29,16 +32,39 @@ SHUTDOWN = ExitPolicy("SHUTDOWN")
 
 
 class Supervisor(Actor):
+    """
+    Handles exited children according to policy.
+
+    With RESTART, children are restarted on a timer, the n-th restart
+    of a child within restart_window seconds waits
+    backoff * 2 ** (n - 1) seconds (at most max_backoff, with jitter).
+    If a child needs more than max_restarts restarts within
+    restart_window, the supervisor gives up and crashes itself,
+    so its parent decides (escalation), a supervisor without parent
+    stops. max_restarts=None restarts without limit.
+    Children that expired after actor_ttl idle seconds are unregistered.
+    """
     def __init__(
         self, 
         policy=RESTART, 
         children=[], 
         *args,
+        max_restarts=10,
+        restart_window=5.0,
+        backoff=0.01,
+        max_backoff=2.0,
         **kwargs
     ):
         super().__init__(*args,**kwargs)
         self._root_idle = asyncio.Event()
         self._policy = policy
+        self._max_restarts = max_restarts
+        self._restart_window = restart_window
+        self._backoff = backoff
+        self._max_backoff = max_backoff
+        ## child -> deque of restart times, child -> timer handle
+        self._restarts = {}
+        self._pending_restarts = {}
         self._children = []
         for child in children:
             self.register_child(child)
@@ -48,8 +74,23 @@ class Supervisor(Actor):
             f"{child}, a child of {self}, stopped, "\
             f"policy is {self._policy}"
         )
+        if state == "expired":
+            ## the child ended itself after actor_ttl idle seconds
+            self.unregister_child(child)
+            return
         if self._policy == RESTART:
-            await child.restart()
+            delay = self._restart_delay(child)
+            if delay is None:
+                self._loop.create_task(self._escalate(child))
+                return
+            self._logger.debug(
+                f"{self} restarts {child} in {delay:.3f}s"
+            )
+            self._pending_restarts[child] = self._loop.call_later(
+                delay,
+                self._restart_child,
+                child
+            )
 
         elif self._policy == RESUME:
             child.start()
@@ -62,11 +103,67 @@ class Supervisor(Actor):
             # if state == "crashed":
             #     child.clear()
     
+    def _restart_delay(self, child):
+        """
+        Record a restart of child, return the backoff delay
+        or None if it restarted too often
+        """
+        now = self._loop.time()
+        history = self._restarts.get(child)
+        if history is None:
+            history = self._restarts[child] = deque()
+        while history and history[0] <= now - self._restart_window:
+            history.popleft()
+        history.append(now)
+        if (
+            self._max_restarts is not None
+            and len(history) > self._max_restarts
+        ):
+            return None
+        delay = min(
+            self._backoff * 2 ** (len(history) - 1),
+            self._max_backoff
+        )
+        ## equal jitter, restarts of children that crashed together
+        ## do not happen at the same time
+        return delay / 2 + random.uniform(0, delay / 2)
+
+    def _restart_child(self, child):
+        self._pending_restarts.pop(child, None)
+        if self._policy != RESTART or child not in self._children:
+            return
+        if self.metrics is not None:
+            self.metrics.child_restarts += 1
+        child.restart()
+
+    async def _escalate(self, child):
+        self._logger.error(
+            f"{self} gave up on {child}, it needed more than "\
+            f"{self._max_restarts} restarts within "\
+            f"{self._restart_window}s"
+        )
+        if getattr(self, "_parent", None) is not None:
+            ## the worker reports the crash to the parent when it exits
+            self.status = Actor.CRASHED
+            if self.metrics is not None:
+                self.metrics.crashes += 1
+            await self._interrupt(SUSPEND)
+        else:
+            await self.stop(drain=False)
+
+    async def _restart(self):
+        """Restart, then restart the children that crashed"""
+        self._restarts.clear()
+        await super()._restart()
+        for child in list(self._children):
+            if child.status is Actor.CRASHED:
+                await child.restart()
+
     def spawn_child(self, cls, *args, **kwargs):
         """Start an instance of cls(*args, **kwargs) as child"""
         child = cls(*args, **kwargs)
         self._logger.debug(f"{self} spawned new child {child}")
-        self.register_child(child)
+        return self.register_child(child)
     
     def register_child(self, child):
         """Register an already running Actor as child"""
@@ -77,9 +174,18 @@ class Supervisor(Actor):
         self._logger.debug(
             f"{child} registered as child of {self}."
         )
+        return child
+
+    def _child_started(self, child):
+        """Called by a child whenever it (re)starts"""
+        pass
     
     def unregister_child(self, child):
         """Unregister a running Actor from the list of children"""
+        self._restarts.pop(child, None)
+        handle = self._pending_restarts.pop(child, None)
+        if handle is not None:
+            handle.cancel()
         try:
             child.unregister_parent(self)
             self._children.remove(child)
@@ -91,19 +197,22 @@ class Supervisor(Actor):
                 f"Unregistering {child} as child of {self} failed."
             )
     
-    async def stop(self):
+    async def stop(self, drain=True):
         self._policy = SHUTDOWN
         self._logger.debug(
             f"{self} is in controlled shutdown, "\
             f"changing restart policy to {self._policy}"
         )
+        for handle in self._pending_restarts.values():
+            handle.cancel()
+        self._pending_restarts.clear()
         for child in list(self._children):
-            await child.stop()
+            await child.stop(drain=drain)
         
         self._logger.debug(
             f"All children of {self} unregistered and stopped."
         )
-        await super().stop()
+        await super().stop(drain=drain)
         self._root_idle.set()
 
 
@@ -124,6 +233,8 @@ class Gru(Supervisor):
         self.register_signals()
         self.tracebacks = tracebacks
         self._auto_join = join
+        self.watchdog = None
+        self.profiler = None
 
     async def __aenter__(self):
         return self
@@ -142,9 +253,49 @@ class Gru(Supervisor):
             await self.stop()
             return not self.tracebacks
     
+    def enable_watchdog(self, threshold=0.1, on_stall=None):
+        """Report loop stalls longer than threshold, see LoopWatchdog"""
+        self.disable_watchdog()
+        self.watchdog = LoopWatchdog(
+            self._loop,
+            threshold=threshold,
+            on_stall=on_stall
+        )
+        self.watchdog.start()
+        return self.watchdog
+
+    def disable_watchdog(self):
+        if self.watchdog is not None:
+            self.watchdog.stop()
+            self.watchdog = None
+
+    def enable_profiler(self, interval=0.001):
+        """Account loop time to actors, see LoopProfiler"""
+        self.disable_profiler()
+        self.profiler = LoopProfiler(self._loop, interval=interval)
+        self.profiler.start()
+        return self.profiler
+
+    def disable_profiler(self):
+        """Stop profiling, return the loop time spent per actor"""
+        if self.profiler is None:
+            return {}
+        profile = self.profiler.stop()
+        self.profiler = None
+        return profile
+
+    async def stop(self, drain=True):
+        await super().stop(drain=drain)
+        self.disable_watchdog()
+        self.disable_profiler()
+
     def register_signals(self):
+        """
+        Stop on SIGTERM, SIGINT and SIGHUP right after the messages
+        being handled, queued messages are cancelled (drain=False)
+        """
         for s in self._signals:
             self._loop.add_signal_handler(
                 s,
-                lambda s=s: asyncio.create_task(self.stop())
+                lambda s=s: asyncio.create_task(self.stop(drain=False))
             )
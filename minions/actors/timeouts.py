@@ -0,0 +1,110 @@
+import asyncio
+import heapq
+import weakref
+from itertools import count
+
+
+class Timeout:
+    __slots__ = ("task", "expired")
+
+    def __init__(self, task):
+        self.task = task
+        self.expired = False
+
+
+class TimeoutScheduler:
+    """
+    Coarse grained per-message timeouts for all actors of one loop.
+
+    Deadlines live in a single heap and only one timer handle is armed,
+    for the earliest deadline rounded up to `resolution` seconds.
+    Overdue tasks get cancelled, run() turns that into TimeoutError.
+    """
+    def __init__(self, loop, resolution=0.01):
+        self._loop = loop
+        self._resolution = resolution
+        self._heap = []
+        self._seq = count()
+        self._cancelled = 0
+        self._timer = None
+        self._timer_when = None
+
+    def __len__(self):
+        return len(self._heap) - self._cancelled
+
+    def schedule(self, task, timeout):
+        """Cancel task after timeout seconds, unless cancel() is called"""
+        when = self._loop.time() + timeout
+        entry = Timeout(task)
+        heapq.heappush(self._heap, (when, next(self._seq), entry))
+        if self._timer is None or when < self._timer_when:
+            self._arm(when)
+        return entry
+
+    def cancel(self, entry):
+        if entry.task is None:
+            return
+        entry.task = None
+        if entry.expired:
+            return
+        self._cancelled += 1
+        ## drop cancelled entries, if they make up most of the heap
+        if self._cancelled > 1024 and self._cancelled * 2 > len(self._heap):
+            self._heap = [
+                item for item in self._heap if item[2].task is not None
+            ]
+            heapq.heapify(self._heap)
+            self._cancelled = 0
+
+    async def run(self, coro, timeout):
+        """Await coro in the current task, raise TimeoutError if overdue"""
+        task = asyncio.current_task()
+        entry = self.schedule(task, timeout)
+        try:
+            return await coro
+        except asyncio.CancelledError:
+            if entry.expired:
+                raise asyncio.TimeoutError() from None
+            raise
+        finally:
+            if entry.expired and hasattr(task, "uncancel"):
+                task.uncancel()
+            self.cancel(entry)
+
+    def _arm(self, when):
+        resolution = self._resolution
+        when = (int(when / resolution) + 1) * resolution
+        if self._timer is not None:
+            if when >= self._timer_when:
+                return
+            self._timer.cancel()
+        self._timer_when = when
+        self._timer = self._loop.call_at(when, self._fire)
+
+    def _fire(self):
+        self._timer = None
+        heap = self._heap
+        now = self._loop.time()
+        while heap and heap[0][0] <= now:
+            _, _, entry = heapq.heappop(heap)
+            if entry.task is None:
+                self._cancelled -= 1
+                continue
+            entry.expired = True
+            entry.task.cancel()
+        if heap:
+            self._arm(heap[0][0])
+
+
+_schedulers = weakref.WeakKeyDictionary()
+
+
+def get_scheduler(loop=None):
+    """Return the TimeoutScheduler of loop, create it if needed"""
+    if loop is None:
+        loop = asyncio.get_running_loop()
+    try:
+        return _schedulers[loop]
+    except KeyError:
+        scheduler = _schedulers[loop] = TimeoutScheduler(loop)
+        return scheduler
@@ -0,0 +1,215 @@
+from collections import deque, namedtuple
+from contextlib import contextmanager
+from contextvars import ContextVar
+import json
+import random
+import time
+
+
+## span of the message being handled, False if its trace is not sampled
+current_span = ContextVar("current_span", default=None)
+
+## trace of a message that arrived from another process
+SpanContext = namedtuple("SpanContext", ["trace_id", "span_id"])
+
+## Tracer all actors report to, tracing is off while it is None
+tracer = None
+
+
+def _new_id():
+    return random.getrandbits(64)
+
+
+class Span:
+    """
+    One hop of a message: enqueued into the mailbox of actor,
+    dequeued by its worker and completed by handle_message
+    (wall clock timestamps in seconds)
+    """
+    __slots__ = (
+        "tracer",
+        "trace_id",
+        "span_id",
+        "parent_id",
+        "actor",
+        "message_type",
+        "enqueued",
+        "dequeued",
+        "completed",
+        "error",
+    )
+
+    def __init__(self, tracer, trace_id, parent_id, actor, message_type):
+        self.tracer = tracer
+        self.trace_id = trace_id
+        self.span_id = _new_id()
+        self.parent_id = parent_id
+        self.actor = actor
+        self.message_type = message_type
+        self.enqueued = time.time()
+        self.dequeued = None
+        self.completed = None
+        self.error = None
+
+    @property
+    def queued(self):
+        """Seconds spent waiting in the mailbox"""
+        if self.dequeued is None:
+            return None
+        return self.dequeued - self.enqueued
+
+    @property
+    def handling(self):
+        """Seconds spent handling the message"""
+        if self.completed is None or self.dequeued is None:
+            return None
+        return self.completed - self.dequeued
+
+    def finish(self, error=None):
+        self.completed = time.time()
+        if error is not None:
+            self.error = type(error).__name__
+        self.tracer.exporter.export(self)
+
+    def to_dict(self):
+        return {
+            "trace_id": f"{self.trace_id:016x}",
+            "span_id": f"{self.span_id:016x}",
+            "parent_id": (
+                f"{self.parent_id:016x}"
+                if self.parent_id is not None else None
+            ),
+            "actor": self.actor,
+            "message_type": self.message_type,
+            "enqueued": self.enqueued,
+            "dequeued": self.dequeued,
+            "completed": self.completed,
+            "queued": self.queued,
+            "handling": self.handling,
+            "error": self.error,
+        }
+
+
+class Tracer:
+    """
+    Creates a Span for every message posted to an actor and hands
+    finished spans to exporter (anything with export(span)).
+
+    A message posted while another one is handled joins its trace,
+    otherwise a new trace is started for sample of the messages
+    (0.0 - 1.0), messages caused by an unsampled one are not traced.
+    """
+    def __init__(self, exporter, sample=1.0):
+        self.exporter = exporter
+        self.sample = sample
+
+    def enqueue(self, name, message):
+        """Span for a message posted to actor name, False if unsampled"""
+        parent = current_span.get()
+        if parent is None:
+            if self.sample < 1.0 and random.random() >= self.sample:
+                return False
+            return Span(self, _new_id(), None, name, type(message).__name__)
+        if parent is False:
+            return False
+        return Span(
+            self,
+            parent.trace_id,
+            parent.span_id,
+            name,
+            type(message).__name__
+        )
+
+    @contextmanager
+    def span(self, name):
+        """
+        Trace a block outside of any actor, e.g. a HTTP request,
+        messages posted inside it join its trace
+        """
+        span = self.enqueue(name, None)
+        if span:
+            span.dequeued = span.enqueued
+        token = current_span.set(span)
+        try:
+            yield span
+        except BaseException as err:
+            if span:
+                span.finish(err)
+                span = None
+            raise
+        finally:
+            current_span.reset(token)
+            if span:
+                span.finish()
+
+
+def set_tracer(new_tracer):
+    """Enable tracing with new_tracer, disable it with None"""
+    global tracer
+    tracer = new_tracer
+
+
+def outgoing():
+    """Context of the current span to send along to another process"""
+    span = current_span.get()
+    if not span:
+        return span
+    return (span.trace_id, span.span_id)
+
+
+@contextmanager
+def incoming(context):
+    """Continue the trace of a message from another process"""
+    if context is None:
+        yield
+        return
+    token = current_span.set(SpanContext(*context) if context else False)
+    try:
+        yield
+    finally:
+        current_span.reset(token)
+
+
+class InMemoryExporter:
+    """Keeps the last maxlen finished spans"""
+    def __init__(self, maxlen=None):
+        self.spans = deque(maxlen=maxlen)
+
+    def export(self, span):
+        self.spans.append(span)
+
+    def traces(self):
+        """Finished spans grouped by trace id"""
+        traces = {}
+        for span in self.spans:
+            traces.setdefault(span.trace_id, []).append(span)
+        return traces
+
+    def clear(self):
+        self.spans.clear()
+
+
+class JSONFileExporter:
+    """
+    Appends every finished span as one JSON object per line to path,
+    written in chunks of buffer spans and on flush() / close()
+    """
+    def __init__(self, path, buffer=256):
+        self._file = open(path, "a")
+        self._buffer = []
+        self._size = buffer
+
+    def export(self, span):
+        self._buffer.append(json.dumps(span.to_dict()))
+        if len(self._buffer) >= self._size:
+            self.flush()
+
+    def flush(self):
+        if self._buffer:
+            self._file.write("\n".join(self._buffer) + "\n")
+            self._buffer.clear()
+        self._file.flush()
+
+    def close(self):
+        self.flush()
+        self._file.close()
@@ -0,0 +1,242 @@
+import asyncio
+from collections import OrderedDict
+
+from minions.actors.actor import Actor
+from minions.actors.mailbox import MailboxFullError
+from minions.actors.stores import InMemoryStore
+from minions.actors.supervisor import Supervisor
+
+
+class VirtualActor(Actor):
+    """
+    Actor with a key, spawned by a VirtualActorRegistry.
+
+    Everything worth keeping goes into state: it is saved when the
+    actor gets passivated and handed to the next activation of key.
+    """
+    def __init__(self, key, state=None, *args, **kwargs):
+        self.key = key
+        self.state = state if state is not None else self.initial_state()
+        super().__init__(*args, **kwargs)
+
+    def initial_state(self):
+        """Override to give actors without a saved state a fresh one"""
+        return {}
+
+
+class VirtualActorRegistry(Supervisor):
+    """
+    Addresses VirtualActors by key and activates them on demand:
+    a message for a key without an active actor spawns
+    factory(key=key, state=saved state or None) as child.
+
+    Actors expire after ttl idle seconds (actor_ttl); once more
+    than max_active actors are active, the least recently used alive
+    one is stopped. Either way its state is saved to store and
+    the actor is dropped (passivation), only the state stays.
+    Messages for a key whose actor is being passivated or waits
+    for a restart are held back and delivered in order once it is
+    alive again. If the registry gives up on a child (see Supervisor),
+    all held back messages are cancelled. key(message) picks the key,
+    by default message[0].
+    """
+    def __init__(
+        self,
+        *args,
+        factory,
+        store=None,
+        key=None,
+        ttl=None,
+        max_active=None,
+        **kwargs
+    ):
+        if max_active is not None and max_active < 1:
+            raise ValueError("max_active has to be at least 1")
+        self._factory = factory
+        self._store = store if store is not None else InMemoryStore()
+        self._key = key if key is not None else lambda message: message[0]
+        self._actor_ttl = ttl
+        self._max_active = max_active
+        ## key -> actor, least recently used first
+        self._active = OrderedDict()
+        ## key -> actor stopped to make room
+        self._passivating = {}
+        ## key -> (message, sender, result) held back for its actor
+        self._waiting = {}
+        self._closing = False
+        super().__init__(*args, **kwargs)
+
+    @property
+    def active(self):
+        """Number of active actors"""
+        return len(self._active)
+
+    def get(self, key):
+        """Active actor of key, None if it is not active"""
+        return self._active.get(key)
+
+    def __call__(
+        self,
+        message,
+        sender
+    ):
+        result = self._loop.create_future()
+        self._deliver(message, sender, result)
+        return result
+
+    def tell(
+        self,
+        message,
+        sender
+    ):
+        """Fire and forget, deliver message without a result future"""
+        self._deliver(message, sender, None)
+
+    async def send(
+        self,
+        message,
+        sender
+    ):
+        """
+        Deliver message like __call__, but wait for free space
+        in the mailbox of the actor (see Actor.send)
+        """
+        key = self._key(message)
+        target = self._target(key)
+        result = self._loop.create_future()
+        if target is None:
+            self._waiting[key].append((message, sender, result))
+        else:
+            await target._put(message, sender, result)
+        return result
+
+    def _deliver(self, message, sender, result):
+        key = self._key(message)
+        target = self._target(key)
+        if target is None:
+            self._waiting[key].append((message, sender, result))
+        else:
+            target._post(message, sender, result)
+
+    def _target(self, key):
+        """
+        Alive actor of key, activated if needed, None if messages
+        have to be held back in _waiting[key]
+        """
+        if (
+            self.status is not Actor.RUNNING
+            or self._worker.done()
+            or self._closing
+        ):
+            raise asyncio.CancelledError()
+        if self.metrics is not None:
+            self.metrics.received += 1
+        actor = self._active.get(key)
+        if actor is None:
+            if key in self._passivating:
+                self._waiting.setdefault(key, [])
+                return None
+            return self._activate(key)
+        self._active.move_to_end(key)
+        if not actor.alive or key in self._waiting:
+            self._waiting.setdefault(key, [])
+            return None
+        return actor
+
+    def _activate(self, key):
+        kwargs = (
+            {"actor_ttl": self._actor_ttl}
+            if self._actor_ttl is not None else {}
+        )
+        actor = self.spawn_child(
+            self._factory,
+            key=key,
+            state=self._store.load(key),
+            name=f"{self.name}/{key}",
+            **kwargs
+        )
+        self._active[key] = actor
+        if self._max_active is not None:
+            self._evict()
+        return actor
+
+    def _evict(self):
+        """Stop least recently used alive actors beyond max_active"""
+        while len(self._active) > self._max_active:
+            for key, actor in self._active.items():
+                if actor.alive:
+                    break
+            else:
+                return
+            del self._active[key]
+            self._passivating[key] = actor
+            self._logger.debug(
+                f"{self} passivates {actor}, "\
+                f"{self._max_active} actors are active"
+            )
+            actor.stop()
+
+    def _child_started(self, child):
+        key = child.key
+        if self._active.get(key) is child and key in self._waiting:
+            self._flush(child, self._waiting.pop(key))
+
+    async def _handle_child(self, child, state):
+        if state in ("stopped", "expired"):
+            self._passivated(child)
+        else:
+            await super()._handle_child(child, state)
+
+    def _passivated(self, child):
+        """Save the state of child, deliver messages held back meanwhile"""
+        key = child.key
+        if self._active.get(key) is child:
+            del self._active[key]
+        elif self._passivating.get(key) is child:
+            del self._passivating[key]
+        else:
+            return
+        try:
+            self._store.save(key, child.state)
+        except Exception as err:
+            self._logger.error(
+                f"{self} failed to save the state of {child} with:"\
+                f"\n{err!r}"
+            )
+        self.unregister_child(child)
+        self._logger.debug(f"{self} passivated {child}")
+        waiting = self._waiting.pop(key, None)
+        if not waiting:
+            return
+        if self._closing or self.status is not Actor.RUNNING:
+            for _, _, result in waiting:
+                if result is not None:
+                    result.cancel()
+            return
+        self._flush(self._activate(key), waiting)
+
+    def _flush(self, actor, envelopes):
+        for message, sender, result in envelopes:
+            try:
+                actor._post(message, sender, result)
+            except MailboxFullError as err:
+                if result is not None and not result.done():
+                    result.set_exception(err)
+
+    async def _escalate(self, child):
+        ## no child is restarted before the parent decides
+        self._cancel_waiting()
+        await super()._escalate(child)
+
+    async def stop(self, drain=True):
+        """Stop all actors, their states get saved"""
+        self._closing = True
+        await super().stop(drain=drain)
+        self._cancel_waiting()
+
+    def _cancel_waiting(self):
+        waiting, self._waiting = self._waiting, {}
+        for envelopes in waiting.values():
+            for _, _, result in envelopes:
+                if result is not None:
+                    result.cancel()
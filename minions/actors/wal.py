@@ -0,0 +1,400 @@
+import asyncio
+from bisect import bisect_right
+from collections import Counter
+from contextlib import suppress
+import logging
+import mmap
+import os
+import struct
+import zlib
+
+
+## record kinds
+MESSAGE = 0
+ACK = 1
+ATTEMPT = 2
+EVENT = 3
+
+## payload length, checksum, sequence number, kind
+HEADER = struct.Struct("<IIQB")
+
+SEGMENT_SUFFIX = ".log"
+
+
+def _checksum(seq, kind, payload):
+    ## seeded with seq and kind, a flipped header bit fails the check too
+    return zlib.crc32(payload, (seq * 4 + kind) & 0xffffffff)
+
+
+def encode(seq, kind, payload=b""):
+    return HEADER.pack(
+        len(payload),
+        _checksum(seq, kind, payload),
+        seq,
+        kind
+    ) + payload
+
+
+def decode(path):
+    """
+    Yield the (seq, kind, payload) records of the segment at path,
+    read through mmap, up to the first torn or corrupt record
+    """
+    for _, seq, kind, payload in records(path):
+        yield seq, kind, payload
+
+
+def records(path):
+    """Like decode(), yields (offset, seq, kind, payload)"""
+    with open(path, "rb") as file:
+        if os.fstat(file.fileno()).st_size == 0:
+            return
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            offset = 0
+            while True:
+                record = read_at(data, offset)
+                if record is None:
+                    return
+                seq, kind, payload = record
+                yield offset, seq, kind, payload
+                offset += HEADER.size + len(payload)
+
+
+def read_at(data, offset):
+    """(seq, kind, payload) of the record at offset, None if torn or corrupt"""
+    if offset + HEADER.size > len(data):
+        return None
+    size, checksum, seq, kind = HEADER.unpack_from(data, offset)
+    start = offset + HEADER.size
+    if start + size > len(data):
+        return None
+    payload = data[start:start + size]
+    if _checksum(seq, kind, payload) != checksum:
+        return None
+    return seq, kind, payload
+
+
+def segments(path):
+    """(first sequence number, file path) of the segments in path, in order"""
+    found = []
+    for name in os.listdir(path):
+        if name.endswith(SEGMENT_SUFFIX):
+            stem = name[:-len(SEGMENT_SUFFIX)]
+            if stem.isdigit():
+                found.append((int(stem), os.path.join(path, name)))
+    return sorted(found)
+
+
+class SegmentWriter:
+    """
+    Appends records to segment files in directory path.
+
+    Records are buffered and written by one executor thread at a
+    time, everything appended while a write (and fsync) is running
+    goes out with the next one (group commit). A new segment is
+    started once the current one holds segment_size bytes. With
+    fsync, the directory is synced too after segments were created
+    or removed, so they are still there (or gone) after a crash.
+    Once a write failed, the segment may end in a torn record and
+    whatever follows it could not be read back: later records are
+    dropped and every commit raises the error of that write.
+    """
+    def __init__(self, path, segment_size=64 << 20, fsync=True):
+        os.makedirs(path, exist_ok=True)
+        self.path = path
+        self._segment_size = segment_size
+        self._fsync = fsync
+        self._loop = asyncio.get_event_loop()
+        self._logger = logging.getLogger('top')
+        self._file = None
+        self._size = 0
+        ## [file, bytearray] chunks not written yet, files to close
+        self._chunks = []
+        self._retired = []
+        self._appended = 0
+        self._written = 0
+        self._writing = None
+        self._scheduled = False
+        ## segments were created or removed since the last write
+        self._directory_changed = False
+        ## error of a failed write, nothing is written after it
+        self._error = None
+        ## (appended count, future) waiting for a commit
+        self._waiters = []
+        ## called with no arguments after every successful write
+        self.on_written = None
+
+    @property
+    def closed(self):
+        return self._file is None
+
+    @property
+    def broken(self):
+        """True once a write failed, commit() raises from then on"""
+        return self._error is not None
+
+    @property
+    def offset(self):
+        """Bytes appended to the current segment"""
+        return self._size
+
+    @property
+    def rotating(self):
+        """True if the next record starts a new segment"""
+        return self._file is None or self._size >= self._segment_size
+
+    def open_segment(self, first):
+        """Start the segment of the records from first on, return its path"""
+        if self._file is not None:
+            self._retired.append(self._file)
+        path = os.path.join(self.path, f"{first:020d}{SEGMENT_SUFFIX}")
+        self._file = open(path, "ab")
+        self._size = 0
+        self._directory_changed = True
+        return path
+
+    def remove_segment(self, path):
+        """Delete a segment, committed with the next write"""
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            return
+        self._directory_changed = True
+        self._schedule()
+
+    def append(self, record):
+        chunks = self._chunks
+        if chunks and chunks[-1][0] is self._file:
+            chunks[-1][1] += record
+        else:
+            chunks.append([self._file, bytearray(record)])
+        self._size += len(record)
+        self._appended += 1
+        self._schedule()
+
+    def close_segment(self):
+        """Close the current segment once its records are written"""
+        if self._file is not None:
+            self._retired.append(self._file)
+            self._file = None
+            self._schedule()
+
+    async def commit(self):
+        """Wait until all records appended so far are written"""
+        if self._error is not None:
+            raise self._error
+        if (
+            self._written >= self._appended
+            and self._writing is None
+            and not self._retired
+            and not self._directory_changed
+        ):
+            return
+        waiter = self._loop.create_future()
+        self._waiters.append((self._appended, waiter))
+        self._schedule()
+        await waiter
+
+    def _schedule(self):
+        if not self._scheduled and self._writing is None:
+            self._scheduled = True
+            self._loop.call_soon(self._flush)
+
+    def _flush(self):
+        self._scheduled = False
+        if self._writing is not None:
+            return
+        if self._error is not None:
+            ## records after torn bytes could never be read back
+            self._chunks = []
+            for file in self._retired:
+                with suppress(OSError):
+                    file.close()
+            self._retired = []
+            self._directory_changed = False
+            self._release(self._appended, self._error)
+            return
+        if (
+            not self._chunks
+            and not self._retired
+            and not self._directory_changed
+        ):
+            self._release(self._appended, None)
+            return
+        chunks, self._chunks = self._chunks, []
+        retired, self._retired = self._retired, []
+        directory_changed, self._directory_changed = (
+            self._directory_changed,
+            False
+        )
+        target = self._appended
+        self._writing = self._loop.run_in_executor(
+            None,
+            self._write,
+            chunks,
+            retired,
+            directory_changed
+        )
+        self._writing.add_done_callback(
+            lambda writing: self._written_up_to(target, writing)
+        )
+
+    def _write(self, chunks, retired, directory_changed):
+        """Executed in a worker thread"""
+        for file, data in chunks:
+            file.write(data)
+            file.flush()
+            if self._fsync:
+                os.fsync(file.fileno())
+        for file in retired:
+            file.close()
+        if directory_changed and self._fsync:
+            directory = os.open(self.path, os.O_RDONLY)
+            try:
+                os.fsync(directory)
+            finally:
+                os.close(directory)
+
+    def _written_up_to(self, target, writing):
+        self._writing = None
+        error = writing.exception()
+        if error is not None:
+            self._logger.error(
+                f"Writing the log in {self.path} failed with {error!r}, "\
+                f"it accepts no more records"
+            )
+            self._error = error
+            target = self._appended
+        else:
+            self._written = target
+        self._release(target, error)
+        if self.on_written is not None and error is None:
+            self.on_written()
+        if self._chunks or self._retired or self._directory_changed:
+            self._schedule()
+
+    def _release(self, target, error):
+        waiters = []
+        for appended, waiter in self._waiters:
+            if appended > target:
+                waiters.append((appended, waiter))
+            elif not waiter.done():
+                if error is None:
+                    waiter.set_result(None)
+                else:
+                    waiter.set_exception(error)
+        self._waiters = waiters
+
+
+class MessageLog:
+    """
+    Write-ahead log of the messages of one DurableActor.
+
+    Messages get increasing sequence numbers, acknowledgements and
+    failed delivery attempts are appended as records of their own.
+    On open, all segments are read (mmap) to find the messages that
+    were never acknowledged, see recover(). Segments are deleted
+    from the oldest one on, once all their messages are acknowledged,
+    so acknowledgements in later segments never refer to messages
+    of a deleted one.
+    """
+    def __init__(self, path, segment_size=64 << 20, fsync=True):
+        self._writer = SegmentWriter(path, segment_size, fsync)
+        self._writer.on_written = self._compact
+        ## first sequence numbers, [path, unacknowledged messages]
+        self._firsts = []
+        self._segments = []
+        self._recovered = []
+        self.seq = 0
+        self._load()
+
+    def _load(self):
+        messages = {}
+        acked = set()
+        attempts = Counter()
+        for first, path in segments(self._writer.path):
+            live = set()
+            for seq, kind, payload in decode(path):
+                if kind == MESSAGE:
+                    messages[seq] = payload
+                    live.add(seq)
+                    self.seq = max(self.seq, seq + 1)
+                elif kind == ACK:
+                    acked.add(seq)
+                elif kind == ATTEMPT:
+                    attempts[seq] += 1
+            self._firsts.append(first)
+            self._segments.append([path, live])
+        if self._firsts:
+            ## new segments never reuse the name of an existing one
+            self.seq = max(self.seq, self._firsts[-1] + 1)
+        for segment in self._segments:
+            segment[1] = len(segment[1] - acked)
+        self._recovered = [
+            (seq, messages[seq], attempts[seq])
+            for seq in sorted(messages)
+            if seq not in acked
+        ]
+        self._compact()
+
+    def recover(self):
+        """
+        (seq, payload, failed attempts) of the messages that were not
+        acknowledged when the log was opened, returned once
+        """
+        recovered, self._recovered = self._recovered, []
+        return recovered
+
+    @property
+    def unacknowledged(self):
+        return sum(segment[1] for segment in self._segments)
+
+    def append(self, payload):
+        """Append a message, return its sequence number"""
+        seq = self.seq
+        self.seq += 1
+        if self._writer.rotating:
+            self._open(seq)
+        self._segments[-1][1] += 1
+        self._writer.append(encode(seq, MESSAGE, payload))
+        return seq
+
+    def ack(self, seq):
+        """Acknowledge message seq, it is not recovered any more"""
+        self._record(seq, ACK)
+        index = bisect_right(self._firsts, seq) - 1
+        if index >= 0:
+            self._segments[index][1] -= 1
+
+    def attempt(self, seq):
+        """Record a failed delivery of message seq"""
+        self._record(seq, ATTEMPT)
+
+    def _record(self, seq, kind):
+        if self._writer.closed:
+            self._open(self.seq)
+        self._writer.append(encode(seq, kind))
+
+    def _open(self, first):
+        path = self._writer.open_segment(first)
+        ## reopened after close()
+        if not self._firsts or self._firsts[-1] != first:
+            self._firsts.append(first)
+            self._segments.append([path, 0])
+
+    async def commit(self):
+        """Wait until all records appended so far are on disk"""
+        await self._writer.commit()
+
+    async def close(self):
+        """Write everything and close the segment, append reopens it"""
+        self._writer.close_segment()
+        await self._writer.commit()
+
+    def _compact(self):
+        ## the newest segment is written to, records may follow
+        while len(self._segments) > 1 and self._segments[0][1] <= 0:
+            path = self._segments[0][0]
+            del self._firsts[0]
+            del self._segments[0]
+            self._writer.remove_segment(path)
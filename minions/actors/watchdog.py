@@ -0,0 +1,203 @@
+import asyncio
+from collections import Counter, deque, namedtuple
+import logging
+import reprlib
+import sys
+import threading
+import time
+from time import perf_counter
+import traceback
+import weakref
+
+
+## blocked: seconds the loop was blocked when the stall was detected
+Stall = namedtuple("Stall", ["blocked", "actor", "message", "stack"])
+
+_repr = reprlib.Repr()
+_repr.maxstring = 120
+_repr.maxother = 120
+
+
+def _owner(task):
+    """(actor name or task name, message) of a task"""
+    frame = getattr(task.get_coro(), "cr_frame", None)
+    variables = frame.f_locals if frame is not None else {}
+    actor = variables.get("self")
+    if actor is None or not hasattr(actor, "_inbox"):
+        return task.get_name(), None
+    if "message" in variables:
+        message = _repr.repr(variables["message"])
+    elif variables.get("in_flight"):
+        message = _repr.repr(
+            [envelope[0] for envelope in variables["in_flight"]]
+        )
+    else:
+        message = None
+    return actor.name, message
+
+
+class LoopWatchdog:
+    """
+    Reports the loop being blocked for more than threshold seconds.
+
+    A callback on the loop updates a heartbeat every interval seconds,
+    a thread checks it. Once the heartbeat is overdue, the stack of the
+    loop thread and the actor and message being handled are logged,
+    kept in stalls and passed to on_stall(stall) in the watchdog thread.
+    """
+    def __init__(self, loop, threshold=0.1, interval=None, on_stall=None):
+        self._loop = loop
+        self.threshold = threshold
+        self._interval = interval or threshold / 4
+        self._on_stall = on_stall
+        self._logger = logging.getLogger('top')
+        self.stalls = deque(maxlen=100)
+        self._beat = time.monotonic()
+        self._handle = None
+        self._thread = None
+        self._stopped = threading.Event()
+
+    def start(self):
+        """Start watching, has to be called from the loop thread"""
+        self._loop_thread = threading.get_ident()
+        self._stopped.clear()
+        self._heartbeat()
+        self._thread = threading.Thread(
+            target=self._watch,
+            name="minions-watchdog",
+            daemon=True
+        )
+        self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+        if self._handle is not None:
+            self._handle.cancel()
+            self._handle = None
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _heartbeat(self):
+        self._beat = time.monotonic()
+        self._handle = self._loop.call_later(self._interval, self._heartbeat)
+
+    def _watch(self):
+        reported = None
+        while not self._stopped.wait(self._interval):
+            beat = self._beat
+            blocked = time.monotonic() - beat - self._interval
+            if blocked < self.threshold or reported == beat:
+                continue
+            reported = beat
+            frame = sys._current_frames().get(self._loop_thread)
+            if frame is None:
+                continue
+            task = asyncio.current_task(self._loop)
+            actor, message = (
+                _owner(task) if task is not None else (None, None)
+            )
+            stall = Stall(
+                blocked,
+                actor,
+                message,
+                "".join(traceback.format_stack(frame))
+            )
+            self.stalls.append(stall)
+            self._logger.error(
+                f"Event loop blocked for {blocked:.3f}s by {actor} "\
+                f"handling {message}:\n{stall.stack}"
+            )
+            if self._on_stall is not None:
+                try:
+                    self._on_stall(stall)
+                except Exception as err:
+                    self._logger.error(
+                        f"{self} on_stall failed with {err!r}"
+                    )
+
+
+def _in_select(frame):
+    """The loop thread polls its selector"""
+    return (
+        frame.f_code.co_name == "select"
+        and frame.f_code.co_filename.endswith("selectors.py")
+    )
+
+
+class LoopProfiler:
+    """
+    Samples the loop thread every interval seconds from a thread of
+    its own and accounts the time since the last sample to the actor
+    (or task) the loop is stepping, "<loop>" if it runs no task and
+    "<idle>" if it waits in its selector with nothing to do.
+    The loop thread releases the GIL while polling its selector, so
+    most samples land there: with callbacks ready to run, the time
+    is split between the actors they step.
+    Only this loop is observed, nothing is patched, other loops and
+    threads run as usual. Loops without selectors module and ready
+    queue (uvloop) report their idle time as "<loop>". Meant to be
+    switched on for a while (see Gru.enable_profiler).
+    """
+    def __init__(self, loop, interval=0.001):
+        self._loop = loop
+        self._interval = interval
+        ## actor name -> seconds
+        self.samples = Counter()
+        self._owners = weakref.WeakKeyDictionary()
+        self._thread = None
+        self._stopped = threading.Event()
+
+    def start(self):
+        """Start sampling, has to be called from the loop thread"""
+        if self._thread is not None:
+            raise RuntimeError(f"{self} is already running")
+        self._loop_thread = threading.get_ident()
+        self._stopped.clear()
+        self._thread = threading.Thread(
+            target=self._sample,
+            name="minions-profiler",
+            daemon=True
+        )
+        self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        return self.profile()
+
+    def profile(self):
+        """Seconds per actor, largest first"""
+        return dict(self.samples.most_common())
+
+    def _sample(self):
+        last = perf_counter()
+        while not self._stopped.wait(self._interval):
+            frame = sys._current_frames().get(self._loop_thread)
+            if frame is None:
+                return
+            task = asyncio.current_task(self._loop)
+            if task is not None:
+                names = [self._name(task)]
+            elif _in_select(frame):
+                names = [
+                    self._name(getattr(handle._callback, "__self__", None))
+                    for handle in list(getattr(self._loop, "_ready", ()))
+                ] or ["<idle>"]
+            else:
+                names = ["<loop>"]
+            now = perf_counter()
+            share = (now - last) / len(names)
+            for name in names:
+                self.samples[name] += share
+            last = now
+
+    def _name(self, task):
+        if not isinstance(task, asyncio.Task):
+            return "<loop>"
+        name = self._owners.get(task)
+        if name is None:
+            name = self._owners[task] = _owner(task)[0]
+        return name
@@ -29,7 +29,7 @@ class TestRestRoot:
             resp.text = (
                 'Hello World'
             )
-            self._handler(
+            self._handler.tell(
                 "Hi","me"
             )
             print("get done!")
@@ -67,7 +67,7 @@ class WatcherServer:
                 #     "Wait for message",
                 #     'me'
                 # )
-                self._actor._handler(
+                self._actor._handler.tell(
                     "Fire and Forget Message",
                     'me'
                 )
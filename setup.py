@@ -27,6 +27,7 @@ setup(
     ],
     packages=[
         "minions.actors",
+        "minions.actors.remote",
         "minions.actors.custom.routers",
         "minions.actors.custom.sources",
     ],
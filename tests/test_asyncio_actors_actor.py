@@ -1,4 +1,4 @@
-import functools, weakref, asyncio
+import functools, weakref, asyncio, logging, os, signal
 
 import pytest
 
@@ -25,6 +25,22 @@ class DelayActor(Actor):
         await asyncio.sleep(2)
         return message
 
+class SleepActor(Actor):
+    async def handle_message(self, message, sender):
+        await asyncio.sleep(message)
+        return message
+
+
+class BatchActor(Actor):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.batches = []
+
+    async def handle_batch(self, messages):
+        self.batches.append(len(messages))
+        return [message for message, sender in messages]
+
+
 class WatcherActor(Source):
     pass
 
@@ -182,6 +198,32 @@ async def test_actor_timeout():
     assert actor.status == Actor.STOPPED
 
 
+@pytest.mark.asyncio
+async def test_actor_keeps_working_after_timeout():
+    actor = SleepActor(actor_timeout=0.1)
+    with pytest.raises(asyncio.TimeoutError):
+        await actor(1, 'me')
+    assert await actor(0.01, 'me') == 0.01
+    assert actor.status == Actor.RUNNING
+    assert len(actor._timeouts) == 0
+    await actor.stop()
+    assert actor.status == Actor.STOPPED
+
+
+@pytest.mark.asyncio
+async def test_actor_timeouts_share_one_scheduler():
+    actors = [DelayActor(actor_timeout=0.1) for i in range(20)]
+    pending = [actor('hello', 'me') for actor in actors]
+    await asyncio.sleep(0)
+    scheduler = actors[0]._timeouts
+    assert all(actor._timeouts is scheduler for actor in actors)
+    assert len(scheduler) == 20
+    results = await asyncio.gather(*pending, return_exceptions=True)
+    assert all(isinstance(r, asyncio.TimeoutError) for r in results)
+    for actor in actors:
+        await actor.stop()
+
+
 @pytest.mark.asyncio
 async def test_actor_prepare():
     prepared_actor = EchoActor.prepare(name="Prepared Actor")
@@ -245,6 +287,19 @@ async def test_supervisor_enter():
         await root.stop()
 
 
+@pytest.mark.asyncio
+async def test_gru_signal_skips_backlog():
+    root = Gru()
+    child = root.spawn_child(SleepActor)
+    results = [child(0.05, 'me') for _ in range(20)]
+    await asyncio.sleep(0)
+    os.kill(os.getpid(), signal.SIGTERM)
+    await asyncio.wait_for(root._root_idle.wait(), 0.5)
+    assert child.status == Actor.STOPPED
+    assert await results[0] == 0.05
+    assert all(result.cancelled() for result in results[1:])
+
+
 @pytest.mark.asyncio
 async def test_actor_crash_with_parent():
     supervisor = Supervisor()
@@ -266,4 +321,168 @@ async def test_actor_crash_with_parent():
     assert supervisor.status == Actor.STOPPED
 
 
+@pytest.mark.asyncio
+async def test_batch_draining():
+    messages = [object() for i in range(10)]
+    actor = BatchActor(max_batch=4)
+    pending = [actor(message, 'me') for message in messages]
+    responses = await asyncio.gather(*pending)
+    assert responses == messages
+    assert actor.batches == [4, 4, 2]
+    await actor.join()
+    await actor.stop()
+    assert actor.status == Actor.STOPPED
+
+
+@pytest.mark.asyncio
+async def test_batch_linger():
+    actor = BatchActor(max_batch=10, max_linger=0.2)
+    first = actor('first', 'me')
+    await asyncio.sleep(0.05)
+    second = actor('second', 'me')
+    assert await asyncio.gather(first, second) == ['first', 'second']
+    assert actor.batches == [2]
+    await actor.stop()
+
+
+@pytest.mark.asyncio
+async def test_batch_default_handle_batch():
+    messages = [object() for i in range(5)]
+    echo_actor = EchoActor(max_batch=3)
+    responses = await asyncio.gather(
+        *[echo_actor(message, 'me') for message in messages]
+    )
+    assert responses == messages
+    await echo_actor.stop()
+
+
+@pytest.mark.asyncio
+async def test_no_message_formatting_without_debug():
+    class Payload:
+        formatted = 0
+        def __repr__(self):
+            Payload.formatted += 1
+            return "Payload"
+        __str__ = __repr__
+
+    logging.getLogger('top').setLevel(logging.INFO)
+    try:
+        echo_actor = EchoActor()
+        message = Payload()
+        assert await echo_actor(message, 'me') is message
+        assert Payload.formatted == 0
+        await echo_actor.stop()
+    finally:
+        logging.getLogger('top').setLevel(logging.NOTSET)
+
+
+@pytest.mark.asyncio
+async def test_tell():
+    received = []
+
+    class CollectActor(Actor):
+        async def handle_message(self, message, sender):
+            received.append((message, sender))
+
+    actor = CollectActor()
+    assert actor.tell('hello', 'me') is None
+    await actor.join()
+    assert received == [('hello', 'me')]
+    await actor.stop()
+    with pytest.raises(asyncio.CancelledError):
+        actor.tell('hello again', 'me')
+
+
+@pytest.mark.asyncio
+async def test_tell_crash_with_parent():
+    supervisor = Supervisor()
+    child = CrashActor(name="CrashActor2")
+    supervisor.register_child(child)
+    child.tell('crash', 'me')
+    await child.join()
+    ## wait a bit so that crasher can restart
+    await asyncio.sleep(0.1)
+    assert child.status == Actor.RUNNING
+    assert await child('no crash', 'me') is None
+    await supervisor.stop()
+    assert child.status == Actor.STOPPED
+
+
+async def crash(child):
+    with pytest.raises(NameError):
+        await child('crash', 'me')
+
+
+async def restarted(child, timeout=1):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not child.alive:
+        assert asyncio.get_running_loop().time() < deadline
+        await asyncio.sleep(0.005)
+
+
+@pytest.mark.asyncio
+async def test_supervisor_restarts_with_backoff():
+    supervisor = Supervisor(backoff=0.1, max_backoff=0.4)
+    child = supervisor.spawn_child(CrashActor)
+    await crash(child)
+    await asyncio.sleep(0.02)
+    assert child.status == Actor.CRASHED
+    await restarted(child)
+    assert supervisor._restart_delay(child) >= 0.1
+    await supervisor.stop()
+
+
+@pytest.mark.asyncio
+async def test_supervisor_stop_cancels_pending_restart():
+    supervisor = Supervisor(backoff=10)
+    child = supervisor.spawn_child(CrashActor)
+    crashed = child('crash', 'me')
+    queued = child('after the crash', 'me')
+    with pytest.raises(NameError):
+        await crashed
+    assert supervisor._pending_restarts
+    await asyncio.wait_for(supervisor.stop(), 1)
+    assert queued.cancelled()
+    assert child.status == Actor.STOPPED
+    assert not supervisor._pending_restarts
+
+
+@pytest.mark.asyncio
+async def test_supervisor_without_parent_stops_after_restart_limit():
+    supervisor = Supervisor(max_restarts=2, backoff=0)
+    child = supervisor.spawn_child(CrashActor)
+    for _ in range(2):
+        await crash(child)
+        await restarted(child)
+    await crash(child)
+    await asyncio.sleep(0.05)
+    assert supervisor.status == Actor.STOPPED
+    assert child.status == Actor.STOPPED
+
+
+@pytest.mark.asyncio
+async def test_supervisor_escalates_to_parent():
+    parent = Supervisor(name="parent", backoff=0)
+    supervisor = parent.spawn_child(
+        Supervisor,
+        name="supervisor",
+        max_restarts=1,
+        backoff=0
+    )
+    child = supervisor.spawn_child(CrashActor)
+    await crash(child)
+    await restarted(child)
+    await crash(child)
+    ## the supervisor crashed, its parent restarted it and the child
+    await restarted(supervisor)
+    await restarted(child)
+    assert supervisor.metrics.crashes == 1
+    assert parent.metrics.child_restarts == 1
+    ## the restart history starts over
+    await crash(child)
+    await restarted(child)
+    assert supervisor.alive
+    await parent.stop()
+
+
 ## python -m pytest -s tests/test_asyncio_actors_actor.py
\ No newline at end of file
@@ -0,0 +1,94 @@
+import asyncio
+import weakref
+
+import pytest
+
+from minions.actors import Actor, CompactActor, Supervisor
+from minions.actors.custom.routers import RoundRobinRouter
+
+
+class EchoActor(CompactActor):
+    __slots__ = ()
+
+    async def handle_message(self, message, sender):
+        if message == 'crash':
+            exec("crashed")
+        if message == 'sleep':
+            await asyncio.sleep(0.05)
+        return message
+
+
+class CollectActor(CompactActor):
+    __slots__ = ("received",)
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.received = []
+
+    async def handle_message(self, message, sender):
+        self.received.append(message)
+
+
+@pytest.mark.asyncio
+async def test_compact_actor_has_no_dict_and_is_weakrefable():
+    actor = EchoActor(weight=2)
+    assert not hasattr(actor, "__dict__")
+    assert weakref.ref(actor)() is actor
+    assert actor.context.weight == 2
+    assert actor.name.startswith("compact-")
+    assert EchoActor(name="named").name == "named"
+
+
+@pytest.mark.asyncio
+async def test_compact_actor_worker_only_while_busy():
+    actor = CollectActor()
+    assert actor._worker is None and actor._mailbox is None
+    for i in range(5):
+        actor.tell(i, 'me')
+    assert actor._worker is not None
+    assert await actor('last', 'me') is None
+    await actor.join()
+    assert actor.received == [0, 1, 2, 3, 4, 'last']
+    assert actor._worker is None and actor._mailbox is None
+    await actor.stop()
+    assert actor.status is Actor.STOPPED
+    with pytest.raises(asyncio.CancelledError):
+        actor('hello', 'me')
+
+
+@pytest.mark.asyncio
+async def test_compact_actor_stop_without_drain():
+    actor = EchoActor()
+    first = actor('sleep', 'me')
+    rest = [actor(i, 'me') for i in range(3)]
+    await asyncio.sleep(0)
+    await actor.stop(drain=False)
+    assert await first == 'sleep'
+    assert all(result.cancelled() for result in rest)
+
+
+@pytest.mark.asyncio
+async def test_compact_actor_is_restarted_by_supervisor():
+    supervisor = Supervisor(backoff=0)
+    actor = supervisor.spawn_child(EchoActor)
+    crashed = actor('crash', 'me')
+    queued = actor('after the crash', 'me')
+    with pytest.raises(NameError):
+        await crashed
+    assert not actor.alive
+    assert await queued == 'after the crash'
+    assert actor.alive
+    await supervisor.stop()
+    assert actor.status is Actor.STOPPED
+
+
+@pytest.mark.asyncio
+async def test_compact_actors_behind_router():
+    children = [CollectActor() for _ in range(3)]
+    router = RoundRobinRouter(children=children)
+    for i in range(6):
+        router.tell(i, 'me')
+    for child in children:
+        await child.join()
+    assert [child.received for child in children] == [[0, 3], [1, 4], [2, 5]]
+    await router.stop()
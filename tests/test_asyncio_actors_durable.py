@@ -0,0 +1,225 @@
+import asyncio
+import os
+import pickle
+import stat
+import subprocess
+import sys
+import textwrap
+
+import pytest
+
+from minions.actors import Actor, DurableActor, Supervisor
+from minions.actors.wal import MessageLog, SegmentWriter, segments
+
+
+class Recorder(DurableActor):
+    async def handle_message(self, message, sender):
+        self.context.seen.append((message, sender))
+        if message == 'poison':
+            exec("crashed")
+        if message == 'flaky' and self.context.seen.count(
+            (message, sender)
+        ) == 1:
+            exec("crashed")
+        return message
+
+
+@pytest.mark.asyncio
+async def test_durable_actor_acknowledges_handled_messages(tmp_path):
+    path = str(tmp_path / "log")
+    actor = Recorder(path=path, seen=[])
+    assert await asyncio.gather(*[actor(i, 'me') for i in range(5)]) \
+        == list(range(5))
+    actor.tell('told', 'me')
+    await actor.join()
+    await actor.stop()
+    reopened = Recorder(path=path, seen=[])
+    await reopened.join()
+    assert reopened.context.seen == []
+    await reopened.stop()
+
+
+@pytest.mark.asyncio
+async def test_durable_actor_recovers_after_process_exit(tmp_path):
+    path = str(tmp_path / "log")
+    script = textwrap.dedent(f"""
+        import asyncio, os
+        from minions.actors import DurableActor
+
+        class Stuck(DurableActor):
+            async def handle_message(self, message, sender):
+                await asyncio.Event().wait()
+
+        async def main():
+            actor = Stuck(path={path!r})
+            for i in range(3):
+                actor.tell(i, 'sender')
+            await actor.send('sent', actor)
+            await asyncio.sleep(0.01)
+            os._exit(0)
+
+        asyncio.run(main())
+    """)
+    subprocess.run([sys.executable, "-c", script], check=True)
+    actor = Recorder(path=path, seen=[])
+    await actor.join()
+    assert actor.context.seen == [
+        (0, 'sender'), (1, 'sender'), (2, 'sender'), ('sent', 'actor-0')
+    ]
+    actor('new', 'me')
+    await actor.stop()
+    assert MessageLog(path).recover() == []
+
+
+@pytest.mark.asyncio
+async def test_durable_actor_recovers_more_than_mailbox_size(tmp_path):
+    path = str(tmp_path / "log")
+    log = MessageLog(path)
+    for i in range(5):
+        log.append(pickle.dumps((i, 'sender')))
+    await log.close()
+    actor = Recorder(path=path, seen=[], mailbox_size=2)
+    await actor.join()
+    assert actor.context.seen == [(i, 'sender') for i in range(5)]
+    await actor.stop()
+    assert MessageLog(path).recover() == []
+
+
+@pytest.mark.asyncio
+async def test_durable_actor_redelivers_after_crash(tmp_path):
+    supervisor = Supervisor(backoff=0)
+    actor = supervisor.spawn_child(
+        Recorder,
+        path=str(tmp_path / "log"),
+        seen=[]
+    )
+    flaky = actor('flaky', 'me')
+    after = actor('after', 'me')
+    assert await flaky == 'flaky'
+    assert await after == 'after'
+    assert actor.context.seen == [
+        ('flaky', 'me'), ('flaky', 'me'), ('after', 'me')
+    ]
+    await supervisor.stop()
+
+
+@pytest.mark.asyncio
+async def test_durable_actor_gives_up_on_poison_message(tmp_path):
+    supervisor = Supervisor(backoff=0)
+    actor = supervisor.spawn_child(
+        Recorder,
+        path=str(tmp_path / "log"),
+        max_redeliveries=2,
+        seen=[]
+    )
+    poison = actor('poison', 'me')
+    after = actor('after', 'me')
+    with pytest.raises(NameError):
+        await poison
+    assert await after == 'after'
+    assert actor.context.seen.count(('poison', 'me')) == 3
+    await supervisor.stop()
+    assert MessageLog(str(tmp_path / "log")).recover() == []
+
+
+@pytest.mark.asyncio
+async def test_message_log_deletes_acknowledged_segments(tmp_path):
+    path = str(tmp_path / "log")
+    log = MessageLog(path, segment_size=64, fsync=False)
+    seqs = [log.append(b"x" * 40) for _ in range(10)]
+    await log.commit()
+    ## two records per segment
+    assert len(segments(path)) == 5
+    for seq in seqs[:-1]:
+        log.ack(seq)
+    await log.commit()
+    assert len(segments(path)) <= 2
+    await log.close()
+    reopened = MessageLog(path)
+    assert [seq for seq, _, _ in reopened.recover()] == [seqs[-1]]
+
+
+@pytest.mark.asyncio
+async def test_message_log_stops_at_torn_record(tmp_path):
+    path = str(tmp_path / "log")
+    log = MessageLog(path)
+    log.append(b"first")
+    log.append(b"second")
+    log.attempt(0)
+    await log.close()
+    (_, segment), = segments(path)
+    with open(segment, "ab") as file:
+        file.write(b"\x05\x00\x00")
+    reopened = MessageLog(path)
+    assert reopened.recover() == [(0, b"first", 1), (1, b"second", 0)]
+    reopened.ack(0)
+    await reopened.close()
+    assert MessageLog(path).recover() == [(1, b"second", 0)]
+
+
+@pytest.mark.asyncio
+async def test_stopping_crashed_actor_keeps_requeued_messages(tmp_path):
+    path = str(tmp_path / "log")
+    actor = Recorder(path=path, seen=[])
+    flaky = actor('flaky', 'me')
+    after = actor('after', 'me')
+    ## no parent restarts it, the message waits in the mailbox
+    await asyncio.sleep(0.01)
+    assert actor.status is Actor.CRASHED
+    await actor.stop()
+    assert flaky.cancelled() and after.cancelled()
+    recovered = MessageLog(path).recover()
+    assert [pickle.loads(payload)[0] for _, payload, _ in recovered] \
+        == ['flaky', 'after']
+    assert [attempts for _, _, attempts in recovered] == [1, 0]
+
+
+@pytest.mark.asyncio
+async def test_segment_writer_syncs_directory(tmp_path, monkeypatch):
+    synced = []
+    fsync = os.fsync
+
+    def record(fd):
+        synced.append(stat.S_ISDIR(os.fstat(fd).st_mode))
+        fsync(fd)
+    monkeypatch.setattr(os, "fsync", record)
+    writer = SegmentWriter(str(tmp_path), segment_size=64)
+    path = writer.open_segment(0)
+    writer.append(b"x")
+    await writer.commit()
+    assert synced == [False, True]
+    writer.close_segment()
+    await writer.commit()
+    writer.remove_segment(path)
+    await writer.commit()
+    assert synced == [False, True, True]
+
+
+@pytest.mark.asyncio
+async def test_message_log_refuses_records_after_failed_write(
+    tmp_path,
+    monkeypatch
+):
+    path = str(tmp_path / "log")
+    log = MessageLog(path)
+    log.append(b"first")
+    await log.commit()
+    write = SegmentWriter._write
+
+    def torn(self, chunks, *args):
+        ## half a record reaches the file
+        for file, data in chunks:
+            file.write(data[:len(data) // 2])
+            file.flush()
+        raise OSError("disk full")
+    monkeypatch.setattr(SegmentWriter, "_write", torn)
+    log.append(b"second")
+    with pytest.raises(OSError):
+        await log.commit()
+    monkeypatch.setattr(SegmentWriter, "_write", write)
+    log.append(b"third")
+    with pytest.raises(OSError):
+        await log.commit()
+    with pytest.raises(OSError):
+        await log.close()
+    assert MessageLog(path).recover() == [(0, b"first", 0)]
@@ -0,0 +1,169 @@
+import asyncio
+
+import pytest
+
+from minions.actors import EventSourcedActor, Supervisor
+from minions.actors import FileJournal, InMemoryJournal, InMemoryStore
+from minions.actors.wal import SegmentWriter
+
+
+class Account(EventSourcedActor):
+    applied = 0
+
+    def initial_state(self):
+        return {"balance": 0}
+
+    def apply(self, state, event):
+        Account.applied += 1
+        kind, amount = event
+        if kind == "deposited":
+            return {"balance": state["balance"] + amount}
+        return {"balance": state["balance"] - amount}
+
+    async def handle_command(self, command, sender):
+        kind, amount = command
+        if kind == "deposit":
+            self.emit(("deposited", amount))
+        elif kind == "withdraw":
+            if amount > self.state["balance"]:
+                raise ValueError("insufficient funds")
+            self.emit(("withdrawn", amount))
+        elif kind == "crash":
+            self.emit(("deposited", amount))
+            exec("crashed")
+        elif kind == "split":
+            for _ in range(amount):
+                self.emit(("deposited", 1))
+        return self.state["balance"]
+
+
+@pytest.mark.asyncio
+async def test_events_are_applied_after_the_command():
+    account = Account(name="account")
+    assert await account(("deposit", 10), 'me') == 0
+    assert await account(("withdraw", 3), 'me') == 10
+    assert account.state == {"balance": 7}
+    assert account.seq == 2
+    assert list(account._journal.read(account.persistence_id)) == [
+        (1, ("deposited", 10)), (2, ("withdrawn", 3))
+    ]
+    await account.stop()
+
+
+def test_persistence_id_is_required():
+    ## a generated name differs between runs, the events would be lost
+    with pytest.raises(ValueError):
+        Account()
+
+
+@pytest.mark.asyncio
+async def test_restart_rebuilds_state_from_the_journal():
+    supervisor = Supervisor(backoff=0)
+    account = supervisor.spawn_child(Account, name="account")
+    await account(("deposit", 10), 'me')
+    account.state["balance"] = 1000
+    with pytest.raises(NameError):
+        await account(("crash", 5), 'me')
+    await asyncio.sleep(0.01)
+    assert account.alive
+    with pytest.raises(ValueError):
+        await account(("withdraw", 50), 'me')
+    assert account.state == {"balance": 10}
+    assert account.seq == 1
+    await supervisor.stop()
+
+
+@pytest.mark.asyncio
+async def test_snapshots_bound_the_replay():
+    journal = InMemoryJournal()
+    snapshots = InMemoryStore()
+    account = Account(
+        journal=journal,
+        snapshots=snapshots,
+        persistence_id="account-1",
+        snapshot_every=3
+    )
+    for _ in range(7):
+        await account(("deposit", 1), 'me')
+    assert snapshots.load("account-1")[0] == 6
+    await account.stop()
+    applied = Account.applied
+    recovered = Account(
+        journal=journal,
+        snapshots=snapshots,
+        persistence_id="account-1"
+    )
+    assert recovered.state == {"balance": 7}
+    assert recovered.seq == 7
+    assert Account.applied == applied + 1
+    await recovered.stop()
+
+
+@pytest.mark.asyncio
+async def test_file_journal_survives_reopening(tmp_path):
+    path = str(tmp_path / "journal")
+    journal = FileJournal(path, segment_size=128)
+    accounts = [
+        Account(journal=journal, persistence_id=f"account-{i}")
+        for i in range(3)
+    ]
+    for account in accounts:
+        await account(("split", 5), 'me')
+    await accounts[1](("withdraw", 2), 'me')
+    for account in accounts:
+        await account.stop()
+    await journal.close()
+    journal = FileJournal(path)
+    balances = []
+    for i in range(3):
+        account = Account(journal=journal, persistence_id=f"account-{i}")
+        balances.append((account.state["balance"], account.seq))
+        await account.stop()
+    assert balances == [(5, 5), (3, 6), (5, 5)]
+    await journal.close()
+
+
+@pytest.mark.asyncio
+async def test_file_journal_batches_writes_of_actors(tmp_path, monkeypatch):
+    writes = []
+    write = SegmentWriter._write
+
+    def counting(self, chunks, *args):
+        writes.append(len(chunks))
+        write(self, chunks, *args)
+
+    monkeypatch.setattr(SegmentWriter, "_write", counting)
+    journal = FileJournal(str(tmp_path / "journal"))
+    accounts = [
+        Account(journal=journal, persistence_id=f"account-{i}")
+        for i in range(20)
+    ]
+    await asyncio.gather(
+        *[account(("deposit", 1), 'me') for account in accounts]
+    )
+    assert 0 < len(writes) < 5
+    for account in accounts:
+        await account.stop()
+    await journal.close()
+
+
+@pytest.mark.asyncio
+async def test_file_journal_fails_writes_after_failed_write(
+    tmp_path,
+    monkeypatch
+):
+    path = str(tmp_path / "journal")
+    journal = FileJournal(path)
+    await journal.write("account", 0, ["opened"])
+    write = SegmentWriter._write
+
+    def failing(self, chunks, *args):
+        raise OSError("disk full")
+    monkeypatch.setattr(SegmentWriter, "_write", failing)
+    with pytest.raises(OSError):
+        await journal.write("account", 1, ["deposited"])
+    monkeypatch.setattr(SegmentWriter, "_write", write)
+    with pytest.raises(OSError):
+        await journal.write("account", 1, ["deposited"])
+    assert list(journal.read("account")) == [(1, "opened")]
+    assert list(FileJournal(path).read("account")) == [(1, "opened")]
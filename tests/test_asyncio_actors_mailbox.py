@@ -0,0 +1,170 @@
+import asyncio
+
+import pytest
+
+from minions.actors import Actor
+from minions.actors import BLOCK, DROP_NEW, DROP_OLD, REJECT
+from minions.actors import MailboxFullError, MessageDroppedError
+from minions.actors.custom.routers import ShortestQueueRouter
+
+
+class GateActor(Actor):
+    """Handles messages only after the gate was opened"""
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.gate = asyncio.Event()
+
+    async def handle_message(self, message, sender):
+        await self.gate.wait()
+        return message
+
+
+async def fill(actor, count):
+    results = [actor(0, 'me')]
+    ## let the worker take the first message out of the mailbox
+    await asyncio.sleep(0)
+    return results + [actor(i, 'me') for i in range(1, count)]
+
+
+@pytest.mark.asyncio
+async def test_mailbox_reject():
+    actor = GateActor(mailbox_size=2, overflow=REJECT)
+    results = await fill(actor, 3)
+    with pytest.raises(MailboxFullError):
+        actor('too much', 'me')
+    assert actor._inbox.rejected == 1
+    actor.gate.set()
+    assert await asyncio.gather(*results) == [0, 1, 2]
+    await actor.stop()
+
+
+@pytest.mark.asyncio
+async def test_mailbox_drop_new():
+    actor = GateActor(mailbox_size=2, overflow=DROP_NEW)
+    results = await fill(actor, 3)
+    dropped = actor('too much', 'me')
+    actor.tell('too much', 'me')
+    assert actor._inbox.dropped == 2
+    with pytest.raises(MessageDroppedError):
+        await dropped
+    actor.gate.set()
+    assert await asyncio.gather(*results) == [0, 1, 2]
+    await actor.stop()
+
+
+@pytest.mark.asyncio
+async def test_mailbox_drop_old():
+    actor = GateActor(mailbox_size=2, overflow=DROP_OLD)
+    results = await fill(actor, 3)
+    newest = actor(3, 'me')
+    assert actor._inbox.dropped == 1
+    with pytest.raises(MessageDroppedError):
+        await results[1]
+    actor.gate.set()
+    assert await asyncio.gather(results[0], results[2], newest) == [0, 2, 3]
+    await actor.join()
+    await actor.stop()
+
+
+@pytest.mark.asyncio
+async def test_mailbox_block_send():
+    actor = GateActor(mailbox_size=2, overflow=BLOCK)
+    results = await fill(actor, 3)
+    with pytest.raises(MailboxFullError):
+        actor('too much', 'me')
+    send = asyncio.create_task(actor.send(3, 'me'))
+    await asyncio.sleep(0.01)
+    assert not send.done()
+    actor.gate.set()
+    result = await send
+    assert await asyncio.gather(*results, result) == [0, 1, 2, 3]
+    await actor.stop()
+
+
+@pytest.mark.asyncio
+async def test_shortest_queue_router_skips_full_children():
+    children = [
+        GateActor(mailbox_size=size, overflow=REJECT) for size in (1, 5)
+    ]
+    router = ShortestQueueRouter(children=children)
+    results = [router(i, 'me') for i in range(2)]
+    await asyncio.sleep(0)
+    results += [router(i, 'me') for i in range(2, 6)]
+    assert children[0]._inbox.full()
+    assert children[1]._inbox.qsize() == 3
+    for child in children:
+        child.gate.set()
+    assert await asyncio.gather(*results) == list(range(6))
+    await router.stop()
+
+
+@pytest.mark.asyncio
+async def test_mailbox_priority():
+    actor = GateActor(priority=lambda message: message)
+    results = await fill(actor, 1)
+    results += [actor(i, 'me') for i in (5, 3, 4, 1, 2)]
+    order = []
+    for result in results:
+        result.add_done_callback(lambda fut: order.append(fut.result()))
+    actor.gate.set()
+    await asyncio.gather(*results)
+    assert order == [0, 1, 2, 3, 4, 5]
+    await actor.stop()
+
+
+@pytest.mark.asyncio
+async def test_stop_without_draining():
+    actor = GateActor()
+    results = await fill(actor, 100)
+    stop_task = actor.stop(drain=False)
+    await asyncio.sleep(0)
+    actor.gate.set()
+    await stop_task
+    assert actor.status == Actor.STOPPED
+    assert await results[0] == 0
+    assert all(result.cancelled() for result in results[1:])
+    assert actor._inbox.qsize() == 0
+
+
+@pytest.mark.asyncio
+async def test_stop_cancels_blocked_send():
+    actor = GateActor(mailbox_size=1, overflow=BLOCK)
+    results = await fill(actor, 2)
+    send = asyncio.create_task(actor.send(2, 'me'))
+    await asyncio.sleep(0.01)
+    assert not send.done()
+    stop_task = actor.stop(drain=False)
+    await asyncio.sleep(0)
+    actor.gate.set()
+    await stop_task
+    with pytest.raises(asyncio.CancelledError):
+        await send
+    assert await results[0] == 0
+    assert results[1].cancelled()
+    assert actor._inbox.qsize() == 0
+
+
+@pytest.mark.asyncio
+async def test_restart_skips_queue_and_keeps_messages():
+    actor = GateActor()
+    results = await fill(actor, 10)
+    old_worker = actor._worker
+    restart_task = actor.restart()
+    await asyncio.sleep(0)
+    actor.gate.set()
+    await restart_task
+    assert actor._worker is not old_worker
+    assert actor.status == Actor.RUNNING
+    assert await asyncio.gather(*results) == list(range(10))
+    await actor.stop()
+
+
+@pytest.mark.asyncio
+async def test_batch_stops_at_system_message():
+    actor = GateActor(max_batch=10)
+    results = await fill(actor, 5)
+    stop_task = actor.stop(drain=False)
+    actor.gate.set()
+    await stop_task
+    assert await results[0] == 0
+    assert all(result.cancelled() for result in results[1:])
@@ -0,0 +1,134 @@
+import asyncio
+
+import pytest
+from falcon import testing
+
+from minions.actors import Actor, Supervisor, MetricsRegistry
+from minions.actors import RESTART, DROP_NEW
+from minions.actors.custom.sources import ASGIRestApi
+
+
+class EchoActor(Actor):
+    async def handle_message(self, message, sender):
+        if message == 'crash':
+            exec("crashed")
+        if message == 'sleep':
+            await asyncio.sleep(1)
+        return message
+
+
+@pytest.mark.asyncio
+async def test_actor_counters():
+    registry = MetricsRegistry(sample=1)
+    actor = EchoActor(name="echo", metrics_registry=registry)
+    await asyncio.gather(*[actor(i, 'me') for i in range(10)])
+    actor.tell('told', 'me')
+    await actor.join()
+    assert actor.metrics.received == 11
+    assert actor.metrics.handled == 11
+    assert sum(actor.metrics.latency.counts) == 11
+    await actor.stop()
+
+
+@pytest.mark.asyncio
+async def test_latency_is_sampled():
+    registry = MetricsRegistry(sample=4)
+    actor = EchoActor(metrics_registry=registry)
+    await asyncio.gather(*[actor(i, 'me') for i in range(10)])
+    assert actor.metrics.handled == 10
+    assert sum(actor.metrics.latency.counts) == 3
+    await actor.stop()
+
+
+@pytest.mark.asyncio
+async def test_timeouts_crashes_and_restarts():
+    registry = MetricsRegistry()
+    child = EchoActor(
+        name="child",
+        actor_timeout=0.01,
+        metrics_registry=registry
+    )
+    parent = Supervisor(
+        name="parent",
+        policy=RESTART,
+        children=[child],
+        metrics_registry=registry
+    )
+    with pytest.raises(asyncio.TimeoutError):
+        await child('sleep', 'me')
+    with pytest.raises(NameError):
+        await child('crash', 'me')
+    await asyncio.sleep(0.01)
+    assert child.metrics.timeouts == 1
+    assert child.metrics.crashes == 1
+    assert child.metrics.restarts == 1
+    assert parent.metrics.child_restarts == 1
+    await parent.stop()
+
+
+@pytest.mark.asyncio
+async def test_disabled_metrics():
+    actor = EchoActor(metrics_registry=None)
+    assert await actor('hello', 'me') == 'hello'
+    assert actor.metrics is None
+    await actor.stop()
+
+
+@pytest.mark.asyncio
+async def test_prometheus_text_format():
+    registry = MetricsRegistry(sample=1)
+    actor = EchoActor(
+        name='echo "1"',
+        mailbox_size=1,
+        overflow=DROP_NEW,
+        metrics_registry=registry
+    )
+    actor.tell('a', 'me')
+    actor.tell('b', 'me')
+    await actor.join()
+    text = registry.render()
+    labels = '{actor="echo \\"1\\"",class="EchoActor"}'
+    assert "# TYPE minions_messages_handled_total counter" in text
+    assert f"minions_messages_received_total{labels} 2" in text
+    assert f"minions_messages_handled_total{labels} 1" in text
+    assert f"minions_mailbox_dropped_total{labels} 1" in text
+    assert f"minions_mailbox_depth{labels} 0" in text
+    assert "# TYPE minions_handler_seconds histogram" in text
+    assert (
+        'minions_handler_seconds_bucket'
+        '{actor="echo \\"1\\"",class="EchoActor",le="+Inf"} 1'
+    ) in text
+    assert f"minions_handler_seconds_count{labels} 1" in text
+    await actor.stop()
+
+
+@pytest.mark.asyncio
+async def test_actors_sharing_a_name_share_a_series():
+    registry = MetricsRegistry(sample=1)
+    actors = [
+        EchoActor(name="echo", metrics_registry=registry) for _ in range(2)
+    ]
+    await asyncio.gather(
+        *[actor(i, 'me') for actor in actors for i in range(3)]
+    )
+    text = registry.render()
+    labels = '{actor="echo",class="EchoActor"}'
+    assert text.count(f"minions_messages_handled_total{labels}") == 1
+    assert f"minions_messages_handled_total{labels} 6" in text
+    assert f"minions_handler_seconds_count{labels} 6" in text
+    for actor in actors:
+        await actor.stop()
+
+
+@pytest.mark.asyncio
+async def test_metrics_route():
+    registry = MetricsRegistry()
+    actor = EchoActor(name="echo", metrics_registry=registry)
+    await actor('hello', 'me')
+    app = ASGIRestApi(metrics_registry=registry)
+    async with testing.ASGIConductor(app) as conductor:
+        response = await conductor.simulate_get('/metrics')
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    assert 'minions_messages_handled_total{actor="echo"' in response.text
+    await actor.stop()
@@ -0,0 +1,70 @@
+import asyncio
+from concurrent.futures.process import BrokenProcessPool
+import os
+
+import pytest
+
+from minions.actors import Actor, Supervisor, ProcessActor
+
+
+class PidActor(ProcessActor):
+    @staticmethod
+    def process(message, sender):
+        if message == 'die':
+            os._exit(1)
+        return message, sender, os.getpid()
+
+
+@pytest.mark.asyncio
+async def test_process_actor():
+    actor = PidActor(max_workers=1)
+    message, sender, pid = await actor({'payload': [1, 2, 3]}, 'me')
+    assert message == {'payload': [1, 2, 3]}
+    assert sender == 'me'
+    assert pid != os.getpid()
+    await actor.stop()
+    assert actor.status == Actor.STOPPED
+
+
+@pytest.mark.asyncio
+async def test_process_actor_passes_sender_by_name():
+    actor = PidActor(max_workers=1)
+    sender = Actor(name="sender")
+    _, name, _ = await actor('hello', sender)
+    assert name == "sender"
+    await actor.stop()
+    await sender.stop()
+
+
+@pytest.mark.asyncio
+async def test_process_actor_worker_crash_with_parent():
+    supervisor = Supervisor()
+    child = PidActor(name="ProcessActor1", max_workers=1)
+    supervisor.register_child(child)
+    with pytest.raises(BrokenProcessPool):
+        await child('die', 'me')
+    ## wait a bit so that the child can restart
+    await asyncio.sleep(0.5)
+    assert child.status == Actor.RUNNING
+    message, _, _ = await child('alive', 'me')
+    assert message == 'alive'
+    await supervisor.stop()
+    assert child.status == Actor.STOPPED
+
+
+@pytest.mark.asyncio
+async def test_process_actor_siblings_survive_broken_shared_pool():
+    supervisor = Supervisor()
+    poisoned = PidActor(name="poisoned")
+    sibling = PidActor(name="sibling")
+    supervisor.register_child(poisoned)
+    supervisor.register_child(sibling)
+    _, _, before = await sibling('first', 'me')
+    with pytest.raises(BrokenProcessPool):
+        await poisoned('die', 'me')
+    ## the sibling did not crash, its next message goes to a new pool
+    message, _, after = await sibling('second', 'me')
+    assert message == 'second'
+    assert after != before
+    assert sibling.status == Actor.RUNNING
+    await supervisor.stop()
@@ -0,0 +1,241 @@
+import asyncio
+import os
+
+import pytest
+
+from minions.actors import Actor
+from minions.actors.custom.routers import RoundRobinRouter
+from minions.actors.remote import ShardedSystem, ActorNotFoundError
+from minions.actors.remote import ActorNode, ConnectionPool
+from minions.actors.remote.protocol import CALL, ERROR, HEADER, CHALLENGE_SIZE
+from minions.actors.remote.protocol import MalformedFrameError
+from minions.actors.remote.protocol import encode, read_frame
+
+
+class PidActor(Actor):
+    async def handle_message(self, message, sender):
+        return message, sender, os.getpid()
+
+
+class ForwardActor(Actor):
+    """Asks the actor named in the message, wherever it lives"""
+    async def handle_message(self, message, sender):
+        ref = self.context.shards.ref(*message)
+        return await ref("forwarded", self)
+
+
+def setup_shard(root, shards):
+    shards.expose(root.register_child(
+        ForwardActor(name=f"forward-{shards.local}", shards=shards)
+    ))
+
+
+@pytest.mark.asyncio
+async def test_sharded_system():
+    async with ShardedSystem(shards=2) as system:
+        refs = [
+            await system.spawn(PidActor.prepare(), f"pid-{i}", shard=i % 2)
+            for i in range(4)
+        ]
+        answers = await asyncio.gather(
+            *[ref("hello", "me") for ref in refs]
+        )
+        assert [answer[:2] for answer in answers] == [("hello", "me")] * 4
+        pids = [answer[2] for answer in answers]
+        assert pids[0] == pids[2] and pids[1] == pids[3]
+        assert pids[0] != pids[1]
+        assert os.getpid() not in pids
+
+        with pytest.raises(ActorNotFoundError):
+            await system.ref("missing", shard=0)("hello", "me")
+
+        await refs[0].stop()
+        with pytest.raises(ActorNotFoundError):
+            await system.ref("pid-0", shard=0)("hello", "me")
+
+
+@pytest.mark.asyncio
+async def test_sharded_router_and_cross_shard_calls():
+    async with ShardedSystem(shards=2, setup=setup_shard) as system:
+        refs = [
+            await system.spawn(PidActor.prepare(), f"worker-{i}", shard=i % 2)
+            for i in range(4)
+        ]
+        router = RoundRobinRouter(children=refs)
+        answers = await asyncio.gather(*[router(i, "me") for i in range(8)])
+        assert len({answer[2] for answer in answers}) == 2
+
+        ## forward-0 lives on shard 0 and asks worker-1 on shard 1
+        forward = system.ref("forward-0", shard=0)
+        answer = await forward(("worker-1", 1), "me")
+        assert answer[:2] == ("forwarded", "forward-0")
+        assert answer[2] == answers[1][2]
+
+        ## stopping the router stops the remote children
+        await router.stop()
+        with pytest.raises(ActorNotFoundError):
+            await forward(("worker-1", 1), "me")
+
+
+class EchoActor(Actor):
+    async def handle_message(self, message, sender):
+        await asyncio.sleep(0.01)
+        return message, sender
+
+
+class CrashActor(Actor):
+    async def handle_message(self, message, sender):
+        raise ValueError(message)
+
+
+@pytest.mark.asyncio
+async def test_remote_actor_over_tcp():
+    echo = EchoActor(name="echo")
+    node = ActorNode("127.0.0.1", 0, actors=[echo])
+    await node.listening()
+    pool = ConnectionPool("127.0.0.1", node.port, size=2)
+    ref = pool.ref("echo")
+    answers = await asyncio.gather(*[ref(i, echo) for i in range(50)])
+    assert answers == [(i, "echo") for i in range(50)]
+    assert all(channel.connected for channel in pool._channels)
+
+    ref.tell("told", "me")
+    await asyncio.sleep(0.05)
+    await echo.join()
+
+    with pytest.raises(ActorNotFoundError):
+        await pool.ref("missing")("hello", "me")
+
+    await pool.close()
+    await node.stop()
+    await echo.stop()
+
+
+@pytest.mark.asyncio
+async def test_remote_actor_errors():
+    crash = CrashActor(name="crash")
+    node = ActorNode("127.0.0.1", 0, actors=[crash])
+    await node.listening()
+    pool = ConnectionPool("127.0.0.1", node.port, size=1)
+    with pytest.raises(ValueError):
+        await pool.ref("crash")("boom", "me")
+    await pool.close()
+    await node.stop()
+    await crash.stop()
+
+
+@pytest.mark.asyncio
+async def test_remote_actor_reconnects():
+    echo = EchoActor(name="echo")
+    node = ActorNode("127.0.0.1", 0, actors=[echo])
+    await node.listening()
+    pool = ConnectionPool("127.0.0.1", node.port, size=1, retry_delay=0.01)
+    ref = pool.ref("echo")
+    assert await ref("first", "me") == ("first", "me")
+
+    await node.stop()
+    with pytest.raises(ConnectionError):
+        await ref("lost", "me")
+
+    node.start()
+    await node.listening()
+    assert await ref("second", "me") == ("second", "me")
+    await pool.close()
+    await node.stop()
+    await echo.stop()
+
+
+@pytest.mark.asyncio
+async def test_remote_refs_leave_router():
+    echoes = [EchoActor(name=f"echo-{i}") for i in range(2)]
+    node = ActorNode(actors=echoes)
+    await node.listening()
+    pool = ConnectionPool("127.0.0.1", node.port, size=1, retry_delay=0.01)
+    refs = [pool.ref(echo.name) for echo in echoes]
+    router = RoundRobinRouter(children=refs)
+    assert await router("hello", "me") == ("hello", "me")
+
+    ## a stopped ref no longer gets traffic
+    await refs[0].stop()
+    assert router._healthy == [refs[1]]
+    assert refs[0] not in router._children
+
+    ## a lost connection crashes the ref until it reconnects
+    await node.stop()
+    await asyncio.sleep(0.01)
+    assert not refs[1].alive
+    assert not router._healthy
+    node.start()
+    await node.listening()
+    for _ in range(100):
+        if refs[1].alive:
+            break
+        await asyncio.sleep(0.01)
+    assert router._healthy == [refs[1]]
+    assert await router("back", "me") == ("back", "me")
+
+    ## stopping the router stopped the remote actors
+    await router.stop()
+    assert all(echo.status == Actor.STOPPED for echo in echoes)
+    await pool.close()
+    await node.stop()
+
+
+@pytest.mark.asyncio
+async def test_remote_node_survives_malformed_frames():
+    echo = EchoActor(name="echo")
+    node = ActorNode(actors=[echo])
+    await node.listening()
+
+    reader, writer = await asyncio.open_connection("127.0.0.1", node.port)
+    ## a call whose payload does not unpack into name, message, sender
+    writer.write(encode(CALL, 7, ("echo",)))
+    kind, request_id, err = await read_frame(reader)
+    assert (kind, request_id, type(err)) == (ERROR, 7, TypeError)
+    assert await reader.read() == b""
+    writer.close()
+
+    reader, writer = await asyncio.open_connection("127.0.0.1", node.port)
+    writer.write(HEADER.pack(3, CALL, 8) + b"bad")
+    kind, request_id, err = await read_frame(reader)
+    assert (kind, request_id, type(err)) == (ERROR, 8, MalformedFrameError)
+    assert await reader.read() == b""
+    writer.close()
+
+    pool = ConnectionPool("127.0.0.1", node.port, size=1)
+    assert await pool.ref("echo")("still", "me") == ("still", "me")
+    await pool.close()
+    await node.stop()
+    await echo.stop()
+
+
+@pytest.mark.asyncio
+async def test_remote_node_with_secret():
+    with pytest.raises(ValueError):
+        ActorNode("0.0.0.0", 0)
+
+    echo = EchoActor(name="echo")
+    node = ActorNode(actors=[echo], secret=b"shared")
+    await node.listening()
+    pool = ConnectionPool("127.0.0.1", node.port, size=1, secret=b"shared")
+    assert await pool.ref("echo")("hello", "me") == ("hello", "me")
+    await pool.close()
+
+    ## frames of a peer without the secret are never unpickled
+    reader, writer = await asyncio.open_connection("127.0.0.1", node.port)
+    await reader.readexactly(CHALLENGE_SIZE)
+    writer.write(encode(CALL, 1, ("echo", "hello", "me")))
+    assert await reader.read() == b""
+    writer.close()
+
+    intruder = ConnectionPool(
+        "127.0.0.1",
+        node.port,
+        size=1,
+        secret=b"guessed"
+    )
+    with pytest.raises(ConnectionError):
+        await intruder.ref("echo")("hello", "me")
+    await intruder.close()
+    await node.stop()
+    await echo.stop()
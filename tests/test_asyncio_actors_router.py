@@ -0,0 +1,487 @@
+import asyncio
+
+import pytest
+
+from minions.actors import Actor, Router, QuorumNotReachedError
+from minions.actors import NoHealthyChildError
+from minions.actors.supervisor import SHUTDOWN
+from minions.actors.custom.routers import RandomRouter
+from minions.actors.custom.routers import RoundRobinRouter
+from minions.actors.custom.routers import ShortestQueueRouter
+from minions.actors.custom.routers import ConsistentHashRouter
+from minions.actors.custom.routers import ElasticRouter
+from minions.actors.custom.routers import WeightedRoundRobinRouter
+
+
+class EchoActor(Actor):
+    async def handle_message(self, message, sender):
+        return message
+
+
+class CollectActor(Actor):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.received = []
+
+    async def handle_message(self, message, sender):
+        self.received.append(message)
+        return self.name
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "router_cls",
+    [
+        RandomRouter,
+        RoundRobinRouter,
+        WeightedRoundRobinRouter,
+        ShortestQueueRouter
+    ]
+)
+async def test_router_call(router_cls):
+    router = router_cls(children=[EchoActor() for i in range(3)])
+    messages = [object() for i in range(10)]
+    responses = await asyncio.gather(
+        *[router(message, 'me') for message in messages]
+    )
+    assert responses == messages
+    await router.stop()
+    assert router.status == Actor.STOPPED
+
+
+@pytest.mark.asyncio
+async def test_router_tell():
+    children = [CollectActor() for i in range(3)]
+    router = RoundRobinRouter(children=children)
+    for i in range(6):
+        assert router.tell(i, 'me') is None
+    for child in children:
+        await child.join()
+    assert [child.received for child in children] == [[0, 3], [1, 4], [2, 5]]
+    await router.stop()
+
+
+class CrashActor(Actor):
+    async def handle_message(self, message, sender):
+        if message == 'crash':
+            exec("crashed")
+        return self.name
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "router_cls",
+    [
+        RandomRouter,
+        RoundRobinRouter,
+        WeightedRoundRobinRouter,
+        ShortestQueueRouter
+    ]
+)
+async def test_router_routes_around_unhealthy_child(router_cls):
+    children = [EchoActor(name=f"child-{i}") for i in range(3)]
+    router = router_cls(children=children)
+    assert len(router._healthy) == 3
+    ## stop a child behind the router's back
+    children[0].status = Actor.STOPPING
+    ## enough messages that RandomRouter surely picks child-0 once
+    responses = await asyncio.gather(
+        *[router(i, 'me') for i in range(100)]
+    )
+    assert responses == list(range(100))
+    assert children[0] not in router._healthy
+    children[0].status = Actor.RUNNING
+    await router.stop()
+
+
+@pytest.mark.asyncio
+async def test_router_healthy_children_follow_restarts():
+    child = CrashActor(name="crasher")
+    other = CrashActor(name="other")
+    router = RandomRouter(children=[child, other])
+    with pytest.raises(NameError):
+        await child('crash', 'me')
+    ## wait a bit so that crasher can restart
+    await asyncio.sleep(0.1)
+    assert child.alive
+    assert set(router._healthy) == {child, other}
+    router.unregister_child(other)
+    assert router._healthy == [child]
+    assert await router('hello', 'me') == "crasher"
+    await router.stop()
+    await other.stop()
+
+
+@pytest.mark.asyncio
+async def test_router_without_healthy_children():
+    child = EchoActor()
+    router = RandomRouter(children=[child])
+    child.status = Actor.STOPPING
+    with pytest.raises(NoHealthyChildError):
+        router('hello', 'me')
+    child.status = Actor.RUNNING
+    await router.stop()
+
+
+class GateActor(Actor):
+    """Handles messages only after the gate was opened"""
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.gate = asyncio.Event()
+
+    async def handle_message(self, message, sender):
+        await self.gate.wait()
+        return self.name
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("choices", [None, 2])
+async def test_shortest_queue_router_balances_depth(choices):
+    children = [GateActor(name=f"gate-{i}") for i in range(4)]
+    router = ShortestQueueRouter(children=children, choices=choices)
+    ## preload one child
+    preloaded = [children[0](i, 'me') for i in range(10)]
+    results = [router(i, 'me') for i in range(30)]
+    depths = [child._inbox.qsize() for child in children]
+    assert sum(depths) == 40
+    if choices is None:
+        assert depths == [10, 10, 10, 10]
+        assert router._min_depth == 10
+    for child in children:
+        child.gate.set()
+    await asyncio.gather(*preloaded, *results)
+    if choices is None:
+        assert router._min_depth == 0
+    await router.stop()
+
+
+@pytest.mark.asyncio
+async def test_shortest_queue_router_index_follows_children():
+    children = [GateActor(name=f"gate-{i}") for i in range(3)]
+    router = ShortestQueueRouter(children=children)
+    router.unregister_child(children[0])
+    assert not children[0]._inbox._listeners
+    assert children[0] not in router._depth
+    results = [router(i, 'me') for i in range(4)]
+    assert children[0]._inbox.qsize() == 0
+    router.register_child(children[0])
+    results.append(router(4, 'me'))
+    assert children[0]._inbox.qsize() == 1
+    for child in children:
+        child.gate.set()
+    await asyncio.gather(*results)
+    await router.stop()
+
+
+@pytest.mark.asyncio
+async def test_shortest_queue_routers_share_children():
+    children = [GateActor(name=f"gate-{i}") for i in range(2)]
+    first = ShortestQueueRouter(children=children)
+    second = ShortestQueueRouter(children=children)
+    results = [first(i, 'me') for i in range(3)]
+    ## both indexes follow the mailboxes
+    for router in (first, second):
+        assert sorted(router._depth.values()) == [1, 2]
+    results += [second(i, 'me') for i in range(3)]
+    assert [child._inbox.qsize() for child in children] == [3, 3]
+    first.unregister_child(children[0])
+    results.append(second(6, 'me'))
+    assert second._depth[children[0]] + second._depth[children[1]] == 7
+    for child in children:
+        child.gate.set()
+    await asyncio.gather(*results)
+    for child in children:
+        second.unregister_child(child)
+    await second.stop()
+    await first.stop()
+    await children[0].stop()
+
+
+@pytest.mark.asyncio
+async def test_consistent_hash_router_is_sticky():
+    children = [CollectActor(name=f"cache-{i}") for i in range(4)]
+    router = ConsistentHashRouter(
+        children=children,
+        key=lambda message: message["user"]
+    )
+    first = await asyncio.gather(
+        *[router({"user": f"user-{i}"}, 'me') for i in range(100)]
+    )
+    second = await asyncio.gather(
+        *[router({"user": f"user-{i}", "n": 2}, 'me') for i in range(100)]
+    )
+    assert first == second
+    assert len(set(first)) == 4
+    await router.stop()
+
+
+@pytest.mark.asyncio
+async def test_consistent_hash_router_moves_minimal_keys():
+    children = [EchoActor(name=f"cache-{i}") for i in range(4)]
+    router = ConsistentHashRouter(children=children)
+    keys = [f"key-{i}" for i in range(1000)]
+    before = {key: router._route(key, 'me') for key in keys}
+
+    router.unregister_child(children[0])
+    after = {key: router._route(key, 'me') for key in keys}
+    moved = [key for key in keys if before[key] is not after[key]]
+    assert moved
+    assert all(before[key] is children[0] for key in moved)
+
+    newcomer = EchoActor(name="cache-4")
+    router.register_child(newcomer)
+    grown = {key: router._route(key, 'me') for key in keys}
+    moved = [key for key in keys if after[key] is not grown[key]]
+    assert 0 < len(moved) < len(keys) / 2
+    assert all(grown[key] is newcomer for key in moved)
+
+    await router.stop()
+    await children[0].stop()
+
+
+@pytest.mark.asyncio
+async def test_consistent_hash_router_removes_only_its_points():
+    children = [EchoActor(name=f"cache-{i}") for i in range(4)]
+    router = ConsistentHashRouter(children=children, replicas=10)
+    ring = list(zip(router._ring, router._owners))
+    router.unregister_child(children[1])
+    assert list(zip(router._ring, router._owners)) == [
+        (point, owner) for point, owner in ring if owner is not children[1]
+    ]
+    await router.stop()
+    await children[1].stop()
+
+
+@pytest.mark.asyncio
+async def test_consistent_hash_router_rejects_unstable_keys():
+    children = [EchoActor(name=f"cache-{i}") for i in range(2)]
+    router = ConsistentHashRouter(children=children)
+    assert router._route(42, 'me') is router._route(42, 'me')
+    assert router._route(b"key", 'me') is router._route("key", 'me')
+    with pytest.raises(TypeError):
+        router._route(object(), 'me')
+    await router.stop()
+
+
+@pytest.mark.asyncio
+async def test_elastic_router_grows_and_shrinks():
+    router = ElasticRouter(
+        factory=GateActor.prepare(),
+        min_children=1,
+        max_children=4,
+        high_watermark=2,
+        low_watermark=1,
+        interval=0.01,
+        cooldown=0,
+    )
+    assert router.size == 1
+    results = [router(i, 'me') for i in range(20)]
+    await asyncio.sleep(0.05)
+    assert router.size == 4
+    results += [router(i, 'me') for i in range(20)]
+    for child in router._children:
+        child.gate.set()
+    answers = await asyncio.gather(*results)
+    assert len(set(answers)) == 4
+    await asyncio.sleep(0.1)
+    assert router.size == 1
+    await router.stop()
+
+
+@pytest.mark.asyncio
+async def test_elastic_router_validates_bounds():
+    with pytest.raises(ValueError):
+        ElasticRouter(factory=GateActor.prepare(), min_children=0)
+    with pytest.raises(ValueError):
+        ElasticRouter(
+            factory=GateActor.prepare(),
+            high_watermark=1,
+            low_watermark=1
+        )
+
+
+@pytest.mark.asyncio
+async def test_round_robin_router_follows_child_churn():
+    children = [CollectActor(name=f"child-{i}") for i in range(3)]
+    router = RoundRobinRouter(children=children)
+    for i in range(3):
+        router.tell(i, 'me')
+    router.unregister_child(children[1])
+    newcomer = CollectActor(name="child-3")
+    router.register_child(newcomer)
+    for i in range(3, 9):
+        router.tell(i, 'me')
+    for child in children + [newcomer]:
+        await child.join()
+    assert children[1].received == [1]
+    assert len(newcomer.received) == 2
+    assert len(children[0].received) == len(children[2].received) == 3
+    await router.stop()
+    await children[1].stop()
+
+
+@pytest.mark.asyncio
+async def test_round_robin_router_stays_fair_when_child_leaves_mid_cycle():
+    children = [EchoActor(name=f"child-{i}") for i in range(5)]
+    router = RoundRobinRouter(children=children)
+    served = [router._route(i, 'me') for i in range(3)]
+    ## swap-removing child-2 moves child-4 behind the cursor
+    router.unregister_child(children[2])
+    ## the rest of the cycle serves the children that had no turn yet
+    rest = [router._route(i, 'me') for i in range(2)]
+    assert served == children[:3]
+    assert set(rest) == {children[3], children[4]}
+    remaining = [children[i] for i in (0, 1, 3, 4)]
+    for _ in range(3):
+        assert set(router._route(i, 'me') for i in range(4)) \
+            == set(remaining)
+    await router.stop()
+    await children[2].stop()
+
+
+@pytest.mark.asyncio
+async def test_weighted_round_robin_router():
+    children = [
+        CollectActor(name="small", weight=1),
+        CollectActor(name="big", weight=3),
+    ]
+    router = WeightedRoundRobinRouter(children=children)
+    answers = await asyncio.gather(*[router(i, 'me') for i in range(8)])
+    assert answers.count("big") == 6
+    ## smooth schedule, no run of four big in a row
+    assert answers[:4].count("small") == 1
+
+    router.register_child(CollectActor(name="medium", weight=2))
+    router.unregister_child(children[0])
+    answers = await asyncio.gather(*[router(i, 'me') for i in range(10)])
+    assert "small" not in answers
+    assert answers.count("big") == 6
+    assert answers.count("medium") == 4
+    await router.stop()
+    await children[0].stop()
+
+
+class SleepActor(Actor):
+    """Answers its name after sleeping context.delay seconds"""
+    async def handle_message(self, message, sender):
+        await asyncio.sleep(self.context.delay)
+        return self.name
+
+
+@pytest.mark.asyncio
+async def test_router_broadcast():
+    children = [CollectActor(name=f"child-{i}") for i in range(3)]
+    router = RandomRouter(children=children)
+    assert router.broadcast('hello', 'me') == 3
+    for child in children:
+        await child.join()
+    assert [child.received for child in children] == [['hello']] * 3
+    await router.stop()
+
+
+@pytest.mark.asyncio
+async def test_router_scatter_streams_answers_in_arrival_order():
+    children = [
+        SleepActor(name=f"child-{i}", delay=0.03 * (3 - i))
+        for i in range(3)
+    ]
+    router = RandomRouter(children=children)
+    answers = [
+        answer async for _, answer in router.scatter('hello', 'me')
+    ]
+    assert answers == ["child-2", "child-1", "child-0"]
+    await router.stop()
+
+
+@pytest.mark.asyncio
+async def test_router_scatter_hedged_request_cancels_stragglers():
+    fast = SleepActor(name="fast", delay=0.01)
+    slow = SleepActor(name="slow", delay=0.3)
+    router = RandomRouter(children=[slow, fast])
+    answers = [
+        answer async for _, answer
+        in router.scatter('hello', 'me', k=2, first=1)
+    ]
+    assert answers == ["fast"]
+    ## the straggler keeps running, its answer is discarded
+    assert slow.alive
+    await router.stop(drain=False)
+
+
+@pytest.mark.asyncio
+async def test_router_scatter_deadline_and_quorum():
+    children = [
+        SleepActor(name="fast", delay=0.01),
+        SleepActor(name="slow", delay=0.3),
+        CrashActor(name="crash"),
+    ]
+    router = RandomRouter(children=children, policy=SHUTDOWN)
+    answers = []
+    with pytest.raises(QuorumNotReachedError):
+        async for child, answer in router.scatter(
+            'crash', 'me', timeout=0.1, quorum=2, return_exceptions=True
+        ):
+            answers.append((child.name, type(answer)))
+    assert answers == [("crash", NameError), ("fast", str)]
+    await router.stop(drain=False)
+
+
+@pytest.mark.asyncio
+async def test_router_scatter_ends_once_quorum_is_reached():
+    children = [
+        SleepActor(name="fast", delay=0.01),
+        SleepActor(name="quick", delay=0.02),
+        SleepActor(name="slow", delay=0.3),
+    ]
+    router = RandomRouter(children=children)
+    started = asyncio.get_running_loop().time()
+    answers = [
+        answer async for _, answer in router.scatter('hello', 'me', quorum=2)
+    ]
+    assert sorted(answers) == ["fast", "quick"]
+    assert asyncio.get_running_loop().time() - started < 0.2
+    await router.stop(drain=False)
+
+
+@pytest.mark.asyncio
+async def test_router_scatter_fails_once_quorum_is_out_of_reach():
+    children = [
+        CrashActor(name="crash-0"),
+        CrashActor(name="crash-1"),
+        SleepActor(name="slow", delay=0.3),
+    ]
+    router = RandomRouter(children=children, policy=SHUTDOWN)
+    with pytest.raises(QuorumNotReachedError):
+        async for _ in router.scatter('crash', 'me', quorum=2):
+            pass
+    await router.stop(drain=False)
+
+
+@pytest.mark.asyncio
+async def test_router_scatter_cancels_when_abandoned():
+    fast = SleepActor(name="fast", delay=0.01)
+    slow = SleepActor(name="slow", delay=0.3)
+    posted = []
+    post = slow._post
+    slow._post = lambda message, sender, result: (
+        posted.append(result), post(message, sender, result)
+    )
+    router = RandomRouter(children=[fast, slow])
+    async for _, answer in router.scatter('hello', 'me'):
+        break
+    assert answer == "fast"
+    ## no aclose(), the loop closes the collected iterator
+    for _ in range(3):
+        await asyncio.sleep(0)
+    assert posted[0].cancelled()
+    await router.stop(drain=False)
+
+
+@pytest.mark.asyncio
+async def test_scatter_targets_follow_routing():
+    children = [EchoActor(name=f"cache-{i}") for i in range(4)]
+    router = ConsistentHashRouter(children=children)
+    targets = router._scatter_targets('key', 'me', 2)
+    assert len(set(targets)) == 2
+    assert targets[0] is router._route('key', 'me')
+    await router.stop()
@@ -0,0 +1,194 @@
+import asyncio
+
+import pytest
+
+from minions.actors import Actor, Source, Stream
+from minions.actors.custom.routers import RoundRobinRouter
+from minions.actors.source import SourceHasNoStreamError
+
+
+class SleepActor(Actor):
+    async def handle_message(self, message, sender):
+        self.context.running[0] += 1
+        self.context.running[1] = max(
+            self.context.running[1], self.context.running[0]
+        )
+        await asyncio.sleep(self.context.delay(message))
+        self.context.running[0] -= 1
+        if message == 'fail':
+            raise asyncio.TimeoutError()
+        return message * 2
+
+
+class CollectActor(Actor):
+    async def handle_message(self, message, sender):
+        self.context.items.append(message)
+
+
+class CountingServer:
+    def __init__(self, source):
+        self._source = source
+        self.pushed = 0
+
+    def start(self):
+        self._task = asyncio.ensure_future(self.produce())
+
+    async def produce(self):
+        while True:
+            await self._source.push(self.pushed)
+            self.pushed += 1
+
+    async def stop(self):
+        self._task.cancel()
+
+
+class IdleServer:
+    def start(self):
+        pass
+
+    async def stop(self):
+        pass
+
+
+class CountingSource(Source):
+    def __init__(self, *args, **kwargs):
+        self.server = CountingServer(self)
+        super().__init__(self.server, *args, **kwargs)
+
+
+@pytest.mark.asyncio
+async def test_map_and_filter():
+    stream = Stream(range(10)).map(lambda x: x * 3).filter(lambda x: x % 2)
+    assert await stream.to_list() == [3, 9, 15, 21, 27]
+
+    async def numbers():
+        for i in range(3):
+            yield i
+    seen = []
+    await Stream(numbers()).foreach(seen.append)
+    assert seen == [0, 1, 2]
+
+
+@pytest.mark.asyncio
+async def test_map_async_fans_out_across_router():
+    running = [0, 0]
+    router = RoundRobinRouter(children=[
+        SleepActor(running=running, delay=lambda m: 0.01)
+        for _ in range(4)
+    ])
+    result = await Stream(range(20)) \
+        .map_async(router, parallelism=3) \
+        .to_list()
+    assert result == [i * 2 for i in range(20)]
+    assert running[1] == 3
+    await router.stop()
+
+
+@pytest.mark.asyncio
+async def test_map_async_waits_for_bounded_mailbox():
+    running = [0, 0]
+    actor = SleepActor(
+        running=running,
+        delay=lambda m: 0.005,
+        mailbox_size=2
+    )
+    result = await Stream(range(20)) \
+        .map_async(actor, parallelism=8) \
+        .to_list()
+    assert result == [i * 2 for i in range(20)]
+    await actor.stop()
+
+
+@pytest.mark.asyncio
+async def test_map_async_unordered():
+    async def double(item):
+        await asyncio.sleep(0.05 if item == 0 else 0)
+        return item * 2
+    result = await Stream(range(4)) \
+        .map_async(double, parallelism=2, ordered=False) \
+        .to_list()
+    assert result == [2, 4, 6, 0]
+    assert await Stream(range(3)).map_async(double).to_list() == [0, 2, 4]
+
+
+@pytest.mark.asyncio
+async def test_failed_item_fails_the_stream():
+    actor = SleepActor(running=[0, 0], delay=lambda m: 0)
+    with pytest.raises(asyncio.TimeoutError):
+        await Stream([1, 'fail', 2]).via(actor).buffer(2).to_list()
+    await actor.stop()
+
+
+@pytest.mark.asyncio
+async def test_batch_by_size_and_timeout():
+    assert await Stream(range(7)).batch(3).to_list() == [
+        [0, 1, 2], [3, 4, 5], [6]
+    ]
+
+    async def bursts():
+        for i in range(3):
+            yield i
+        await asyncio.sleep(0.05)
+        for i in range(3, 8):
+            yield i
+    assert await Stream(bursts()).batch(4, timeout=0.02).to_list() == [
+        [0, 1, 2], [3, 4, 5, 6], [7]
+    ]
+
+
+@pytest.mark.asyncio
+async def test_window():
+    async def ticks():
+        for i in range(6):
+            yield i
+            if i % 3 == 2:
+                await asyncio.sleep(0.06)
+    assert await Stream(ticks()).window(0.04).to_list() == [
+        [0, 1, 2], [3, 4, 5]
+    ]
+
+
+@pytest.mark.asyncio
+async def test_source_slows_down_for_a_lagging_stream():
+    idle = Source(IdleServer())
+    with pytest.raises(SourceHasNoStreamError):
+        await idle.push(1)
+    await idle.stop()
+    source = CountingSource()
+    stream = source.stream(buffer=4)
+    await asyncio.sleep(0.01)
+    assert source.server.pushed == 4
+    consumed = []
+    async for batch in stream.batch(3):
+        consumed.append(batch)
+        await asyncio.sleep(0.01)
+        assert source.server.pushed <= 3 * len(consumed) + 4 + 1
+        if len(consumed) == 3:
+            break
+    assert consumed == [[0, 1, 2], [3, 4, 5], [6, 7, 8]]
+    await source.stop()
+
+
+@pytest.mark.asyncio
+async def test_stream_ends_when_source_stops():
+    source = CountingSource()
+    stream = source.stream(buffer=2)
+    items = []
+
+    async def consume():
+        async for item in stream:
+            items.append(item)
+            if item == 5:
+                await source.stop()
+    await asyncio.wait_for(consume(), 1)
+    assert items[:6] == list(range(6))
+    assert len(items) <= 8
+
+
+@pytest.mark.asyncio
+async def test_stream_to_bounded_mailbox():
+    sink = CollectActor(items=[], mailbox_size=2)
+    await Stream(range(10)).to(sink, 'me')
+    await sink.join()
+    assert sink.context.items == list(range(10))
+    await sink.stop()
@@ -0,0 +1,145 @@
+import asyncio
+import json
+
+import pytest
+from falcon import testing
+
+from minions.actors import Actor, Tracer, set_tracer
+from minions.actors import InMemoryExporter, JSONFileExporter
+from minions.actors.custom.routers import RoundRobinRouter
+from minions.actors.custom.sources import ASGIRestApi, TracingMiddleware
+from minions.actors.remote import ActorNode, ConnectionPool
+
+
+class EchoActor(Actor):
+    async def handle_message(self, message, sender):
+        if message == 'sleep':
+            await asyncio.sleep(1)
+        return message
+
+
+class ForwardActor(Actor):
+    """Forwards every message to context.target"""
+    async def handle_message(self, message, sender):
+        await asyncio.sleep(0.01)
+        return await self.context.target(message, self)
+
+
+class Resource:
+    def __init__(self, actor):
+        self._actor = actor
+
+    async def on_get(self, req, resp):
+        resp.media = await self._actor('hello', 'api')
+
+
+@pytest.fixture
+def exporter():
+    exporter = InMemoryExporter()
+    set_tracer(Tracer(exporter))
+    yield exporter
+    set_tracer(None)
+
+
+@pytest.mark.asyncio
+async def test_trace_follows_message_across_actors(exporter):
+    echo = EchoActor(name="echo")
+    forward = ForwardActor(name="forward", target=echo)
+    assert await forward('hello', 'me') == 'hello'
+    inner, outer = exporter.spans
+    assert (outer.actor, inner.actor) == ("forward", "echo")
+    assert inner.trace_id == outer.trace_id
+    assert inner.parent_id == outer.span_id
+    assert outer.parent_id is None
+    assert outer.enqueued <= outer.dequeued <= inner.enqueued
+    assert inner.dequeued <= inner.completed <= outer.completed
+    assert outer.handling >= 0.01
+    assert inner.queued >= 0
+    await forward.stop()
+    await echo.stop()
+
+
+@pytest.mark.asyncio
+async def test_unrelated_messages_start_own_traces(exporter):
+    echo = EchoActor()
+    router = RoundRobinRouter(children=[echo, EchoActor()])
+    await asyncio.gather(*[router(i, 'me') for i in range(4)])
+    assert len(exporter.traces()) == 4
+    assert echo.name in [span.actor for span in exporter.spans]
+    await router.stop()
+
+
+@pytest.mark.asyncio
+async def test_trace_records_errors(exporter):
+    echo = EchoActor(actor_timeout=0.01)
+    with pytest.raises(asyncio.TimeoutError):
+        await echo('sleep', 'me')
+    assert exporter.spans[0].error == "TimeoutError"
+    await echo.stop()
+
+
+@pytest.mark.asyncio
+async def test_trace_sampling():
+    exporter = InMemoryExporter()
+    set_tracer(Tracer(exporter, sample=0.0))
+    try:
+        echo = EchoActor()
+        forward = ForwardActor(target=echo)
+        await forward('hello', 'me')
+        assert not exporter.spans
+        await forward.stop()
+        await echo.stop()
+    finally:
+        set_tracer(None)
+
+
+@pytest.mark.asyncio
+async def test_tracing_disabled():
+    echo = EchoActor()
+    forward = ForwardActor(target=echo)
+    assert await forward('hello', 'me') == 'hello'
+    await forward.stop()
+    await echo.stop()
+
+
+@pytest.mark.asyncio
+async def test_request_span_and_json_export(tmp_path):
+    path = tmp_path / "spans.jsonl"
+    exporter = JSONFileExporter(path)
+    set_tracer(Tracer(exporter))
+    try:
+        echo = EchoActor(name="echo")
+        app = ASGIRestApi(
+            routes={"/hello": Resource(echo)},
+            middleware=[TracingMiddleware()]
+        )
+        async with testing.ASGIConductor(app) as conductor:
+            response = await conductor.simulate_get('/hello')
+        assert response.json == 'hello'
+        await echo.stop()
+    finally:
+        set_tracer(None)
+    exporter.close()
+    spans = [json.loads(line) for line in path.read_text().splitlines()]
+    actor, request = spans
+    assert request["actor"] == "GET /hello"
+    assert actor["actor"] == "echo"
+    assert actor["trace_id"] == request["trace_id"]
+    assert actor["parent_id"] == request["span_id"]
+
+
+@pytest.mark.asyncio
+async def test_trace_crosses_remote_hop(exporter):
+    echo = EchoActor(name="echo")
+    node = ActorNode("127.0.0.1", 0, actors=[echo])
+    await node.listening()
+    pool = ConnectionPool("127.0.0.1", node.port, size=1)
+    forward = ForwardActor(name="forward", target=pool.ref("echo"))
+    assert await forward('hello', 'me') == 'hello'
+    inner, outer = exporter.spans
+    assert (outer.actor, inner.actor) == ("forward", "echo")
+    assert inner.parent_id == outer.span_id
+    await forward.stop()
+    await pool.close()
+    await node.stop()
+    await echo.stop()
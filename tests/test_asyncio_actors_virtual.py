@@ -0,0 +1,206 @@
+import asyncio
+
+import pytest
+
+from minions.actors import Actor, Supervisor
+from minions.actors.supervisor import SHUTDOWN
+from minions.actors import VirtualActor, VirtualActorRegistry
+from minions.actors import InMemoryStore, SQLiteStore
+
+
+class Counter(VirtualActor):
+    def initial_state(self):
+        return {"count": 0}
+
+    async def handle_message(self, message, sender):
+        _, command = message
+        if command == 'crash':
+            exec("crashed")
+        if command == 'slow':
+            await asyncio.sleep(0.05)
+        if command == 'slower':
+            await asyncio.sleep(0.2)
+        self.state["count"] += 1
+        return self.state["count"]
+
+
+class IdleActor(Actor):
+    stopped = 0
+
+    async def handle_message(self, message, sender):
+        return message
+
+    async def on_stop(self):
+        IdleActor.stopped += 1
+
+
+@pytest.mark.asyncio
+async def test_actor_ttl_expires_idle_actor():
+    supervisor = Supervisor()
+    actor = supervisor.spawn_child(IdleActor, actor_ttl=0.05)
+    for _ in range(3):
+        await asyncio.sleep(0.03)
+        assert await actor('ping', 'me') == 'ping'
+    stopped = IdleActor.stopped
+    await asyncio.sleep(0.1)
+    assert actor.status is Actor.STOPPED
+    assert IdleActor.stopped == stopped + 1
+    assert actor not in supervisor._children
+    with pytest.raises(asyncio.CancelledError):
+        actor('ping', 'me')
+    await supervisor.stop()
+
+
+@pytest.mark.asyncio
+async def test_actor_ttl_with_batches():
+    actor = IdleActor(actor_ttl=0.05, max_batch=4)
+    assert await asyncio.gather(*[actor(i, 'me') for i in range(6)]) \
+        == list(range(6))
+    await asyncio.sleep(0.1)
+    assert actor.status is Actor.STOPPED
+
+
+@pytest.mark.asyncio
+async def test_registry_activates_on_demand():
+    registry = VirtualActorRegistry(factory=Counter)
+    assert registry.active == 0
+    assert await registry(('a', 'inc'), 'me') == 1
+    assert await registry(('a', 'inc'), 'me') == 2
+    assert await registry(('b', 'inc'), 'me') == 1
+    assert registry.active == 2
+    assert registry.get('a').name == f"{registry.name}/a"
+    assert registry.get('c') is None
+    await registry.stop()
+    assert registry.active == 0
+
+
+@pytest.mark.asyncio
+async def test_registry_passivates_after_ttl():
+    store = InMemoryStore()
+    registry = VirtualActorRegistry(factory=Counter, store=store, ttl=0.05)
+    assert await registry(('a', 'inc'), 'me') == 1
+    first = registry.get('a')
+    await asyncio.sleep(0.1)
+    assert registry.get('a') is None
+    assert first.status is Actor.STOPPED
+    assert store.load('a') == {"count": 1}
+    assert await registry(('a', 'inc'), 'me') == 2
+    assert registry.get('a') is not first
+    await registry.stop()
+    assert store.load('a') == {"count": 2}
+
+
+@pytest.mark.asyncio
+async def test_registry_evicts_least_recently_used():
+    store = InMemoryStore()
+    registry = VirtualActorRegistry(
+        factory=Counter,
+        store=store,
+        max_active=2
+    )
+    await registry(('a', 'inc'), 'me')
+    await registry(('b', 'inc'), 'me')
+    await registry(('a', 'inc'), 'me')
+    await registry(('c', 'inc'), 'me')
+    await asyncio.sleep(0.01)
+    assert registry.get('b') is None
+    assert store.load('b') == {"count": 1}
+    assert registry.active == 2
+    assert await registry(('b', 'inc'), 'me') == 2
+    await asyncio.sleep(0.01)
+    assert registry.get('a') is None
+    await registry.stop()
+    assert store.load('a') == {"count": 2}
+
+
+@pytest.mark.asyncio
+async def test_registry_holds_messages_during_passivation():
+    registry = VirtualActorRegistry(factory=Counter, max_active=1)
+    slow = registry(('a', 'slow'), 'me')
+    await asyncio.sleep(0)
+    registry.tell(('b', 'inc'), 'me')
+    ## a drains its mailbox while it is passivated
+    held = [registry(('a', 'inc'), 'me') for _ in range(3)]
+    assert await slow == 1
+    assert await asyncio.gather(*held) == [2, 3, 4]
+    await registry.stop()
+
+
+@pytest.mark.asyncio
+async def test_registry_passivates_evicted_actor_after_others_expired():
+    store = InMemoryStore()
+    registry = VirtualActorRegistry(
+        factory=Counter,
+        store=store,
+        ttl=0.05,
+        max_active=1
+    )
+    slow = registry(('a', 'slower'), 'me')
+    await asyncio.sleep(0)
+    registry.tell(('b', 'inc'), 'me')
+    await asyncio.sleep(0.1)
+    ## b expired, a is still busy with its message
+    assert registry.active == 0
+    assert await slow == 1
+    await asyncio.sleep(0.01)
+    assert store.load('a') == {"count": 1}
+    assert await asyncio.wait_for(registry(('a', 'inc'), 'me'), 1) == 2
+    await registry.stop()
+
+
+@pytest.mark.asyncio
+async def test_registry_holds_messages_until_restart():
+    registry = VirtualActorRegistry(factory=Counter, backoff=0.02)
+    assert await registry(('a', 'inc'), 'me') == 1
+    crashed = registry(('a', 'crash'), 'me')
+    with pytest.raises(NameError):
+        await crashed
+    assert not registry.get('a').alive
+    assert await registry(('a', 'inc'), 'me') == 2
+    await registry.stop()
+    with pytest.raises(asyncio.CancelledError):
+        registry(('a', 'inc'), 'me')
+
+
+@pytest.mark.asyncio
+async def test_registry_with_sqlite_store(tmp_path):
+    path = str(tmp_path / "states.db")
+    store = SQLiteStore(path)
+    registry = VirtualActorRegistry(factory=Counter, store=store)
+    for key in ('a', 'b', 1):
+        await registry((key, 'inc'), 'me')
+    await registry(('a', 'inc'), 'me')
+    await registry.stop()
+    store.close()
+    store = SQLiteStore(path)
+    assert len(store) == 3
+    assert store.load('a') == {"count": 2}
+    assert store.load(1) == {"count": 1}
+    assert store.load('1') is None
+    store.delete('a')
+    assert store.load('a') is None
+    store.close()
+
+
+def test_sqlite_store_rejects_bad_table_names():
+    with pytest.raises(ValueError):
+        SQLiteStore(":memory:", table="states; DROP TABLE states")
+
+
+@pytest.mark.asyncio
+async def test_registry_cancels_held_messages_when_giving_up():
+    parent = Supervisor(policy=SHUTDOWN)
+    registry = parent.spawn_child(
+        VirtualActorRegistry,
+        factory=Counter,
+        max_restarts=0
+    )
+    with pytest.raises(NameError):
+        await registry(('a', 'crash'), 'me')
+    ## held back until the crashed actor restarts, which never happens
+    held = registry(('a', 'inc'), 'me')
+    with pytest.raises(asyncio.CancelledError):
+        await asyncio.wait_for(held, 1)
+    assert registry.status is Actor.CRASHED
+    await parent.stop()
+    await registry.stop()
@@ -0,0 +1,90 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from minions.actors import Actor, Gru
+
+
+class BlockingActor(Actor):
+    """Forgets to await, blocks the loop"""
+    async def handle_message(self, message, sender):
+        time.sleep(message)
+        return message
+
+
+class BusyActor(Actor):
+    """Burns CPU in slices, lets the loop run in between"""
+    async def handle_message(self, message, sender):
+        deadline = time.monotonic() + message
+        while time.monotonic() < deadline:
+            sum(range(1000))
+            await asyncio.sleep(0)
+        return message
+
+
+@pytest.mark.asyncio
+async def test_watchdog_reports_blocking_actor():
+    stalls = []
+    root = Gru(name="root")
+    actor = root.spawn_child(BlockingActor, name="blocker")
+    watchdog = root.enable_watchdog(threshold=0.05, on_stall=stalls.append)
+    await asyncio.sleep(0.02)
+    await actor(0.3, 'me')
+    await asyncio.sleep(0.02)
+    assert len(stalls) == 1
+    stall = stalls[0]
+    assert stall.actor == "blocker"
+    assert stall.message == "0.3"
+    assert stall.blocked >= 0.05
+    assert "time.sleep(message)" in stall.stack
+    assert list(watchdog.stalls) == stalls
+    root.disable_watchdog()
+    assert root.watchdog is None
+    await root.stop()
+
+
+@pytest.mark.asyncio
+async def test_watchdog_ignores_short_steps():
+    root = Gru(name="root")
+    actor = root.spawn_child(BlockingActor)
+    watchdog = root.enable_watchdog(threshold=0.2)
+    for _ in range(5):
+        await actor(0.01, 'me')
+    await asyncio.sleep(0.05)
+    assert not watchdog.stalls
+    await root.stop()
+    assert root.watchdog is None
+
+
+@pytest.mark.asyncio
+async def test_profiler_attributes_loop_time_to_actors():
+    root = Gru(name="root")
+    busy = root.spawn_child(BusyActor, name="busy")
+    lazy = root.spawn_child(BusyActor, name="lazy")
+    root.enable_profiler()
+    await asyncio.gather(busy(0.2, 'me'), lazy(0.02, 'me'))
+    await asyncio.sleep(0.05)
+    profile = root.disable_profiler()
+    assert root.profiler is None
+    assert max(profile, key=profile.get) == "busy"
+    assert profile["busy"] > 0.1
+    assert profile["busy"] > 3 * profile.get("lazy", 0)
+    assert profile.get("<idle>", 0) > 0.01
+    await root.stop()
+
+
+@pytest.mark.asyncio
+async def test_profiler_leaves_loop_alone():
+    root = Gru(name="root")
+    handle_run = asyncio.events.Handle._run
+    profiler = root.enable_profiler()
+    assert asyncio.events.Handle._run is handle_run
+    with pytest.raises(RuntimeError):
+        profiler.start()
+    await root.stop()
+    assert root.profiler is None
+    assert not any(
+        thread.name == "minions-profiler" for thread in threading.enumerate()
+    )